@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Compares the git, native and index describe engines on a repository
+
+usage: benchmark_describe.py [path] [--runs N] [--all-components]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from tagversion.refs import RefReader  # noqa: E402
+from tagversion.snapshot import (  # noqa: E402
+    DESCRIBE_ENGINES,
+    RepoSnapshot,
+    describe_components,
+)
+
+
+def time_engine(engine, runs, all_components=False):
+    timings = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        if all_components:
+            result = describe_components(refs=RefReader(), engine=engine)
+        else:
+            result = RepoSnapshot.collect(
+                branch=False, refs=RefReader(), engine=engine
+            ).describe
+        timings.append(time.perf_counter() - start)
+
+    return result, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", nargs="?", default=".")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument(
+        "--all-components",
+        action="store_true",
+        help="describe every monorepo component instead of HEAD's nearest tag",
+    )
+    args = parser.parse_args()
+
+    os.chdir(args.path)
+
+    results = {}
+    for engine in DESCRIBE_ENGINES:
+        result, timings = time_engine(engine, args.runs, args.all_components)
+        results[engine] = result
+
+        print(
+            "{:<8} {:>9.2f} ms median {:>9.2f} ms min  {}".format(
+                engine,
+                statistics.median(timings) * 1000,
+                min(timings) * 1000,
+                "{} components".format(len(result)) if args.all_components else result,
+            )
+        )
+
+    if any(x != results[DESCRIBE_ENGINES[0]] for x in results.values()):
+        print("engines disagree: {}".format(results), file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
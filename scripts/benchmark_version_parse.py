@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""
+Compares Version parsing with the hand-written parser against SEMVER_RE
+
+usage: benchmark_version_parse.py [--count N] [--runs N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from tagversion import version as version_module  # noqa: E402
+from tagversion.version import SEMVER_RE, Version  # noqa: E402
+
+SUFFIXES = ("", "rc1", "-rc2", "-3-gabcdef1-feature--thing")
+
+
+def make_tags(count, seed=0):
+    rnd = random.Random(seed)
+
+    return [
+        "{}{}.{}.{}{}".format(
+            rnd.choice(("", "api/", "web/")),
+            rnd.randint(0, 20),
+            rnd.randint(0, 50),
+            rnd.randint(0, 500),
+            rnd.choice(SUFFIXES),
+        )
+        for _ in range(count)
+    ]
+
+
+def parse_regex(tags):
+    for tag in tags:
+        matches = SEMVER_RE.match(tag)
+        if matches:
+            Version(**matches.groupdict())
+
+
+def parse_parser(tags):
+    version_module._parse_semver.cache_clear()
+    for _version in Version.parse_many(tags, ignore_errors=True):
+        pass
+
+
+def best_of(func, tags, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(tags)
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    distinct = make_tags(args.count)
+    repeated = make_tags(200) * (args.count // 200)
+    # long digit runs make the regular expression backtrack through every split
+    pathological = ["1.{}!".format("1" * n) for n in range(100, 200)]
+
+    cases = (
+        ("distinct tags", distinct),
+        ("repeated tags", repeated),
+        ("malformed long", pathological),
+    )
+
+    for name, tags in cases:
+        regex = best_of(parse_regex, tags, args.runs)
+        parser_s = best_of(parse_parser, tags, args.runs)
+
+        print(
+            "{:<16} regex {:>9.2f} us  parser {:>9.2f} us  {:>6.1f}x".format(
+                name,
+                regex / len(tags) * 1e6,
+                parser_s / len(tags) * 1e6,
+                regex / parser_s,
+            )
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Times `tag-version write` substitution on a large generated file
+
+usage: benchmark_write.py [--size MB] [--placeholders N] [--legacy]
+
+The legacy engine copies the rest of the file on every placeholder, so with
+`--legacy` it is best run with a smaller `--size`.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from tagversion.write import (  # noqa: E402
+    DEFAULT_VERSION_PATTERN,
+    get_placeholder_re,
+    get_version_re,
+    substitute,
+    substitute_whole,
+)
+
+LINE = "var filler = 'lorem ipsum dolor sit amet, consectetur adipiscing elit';\n"
+PLACEHOLDER = "var version = '{{ version }}';\n"
+REPLACEMENTS = {None: "1.2.3-4-gabcdef1-feature--thing"}
+
+
+def make_file(path, size, placeholders):
+    lines = max(size // len(LINE), placeholders)
+    every = max(lines // placeholders, 1)
+
+    with open(path, "w") as fh:
+        for i in range(lines):
+            fh.write(
+                PLACEHOLDER if i % every == 0 and i // every < placeholders else LINE
+            )
+
+
+def run_streaming(src, dst):
+    with open(src) as infile, open(dst, "w") as outfile:
+        return substitute(
+            get_placeholder_re(DEFAULT_VERSION_PATTERN), REPLACEMENTS, infile, outfile
+        )
+
+
+def run_legacy(src, dst):
+    with open(src) as infile, open(dst, "w") as outfile:
+        version_re = get_version_re(DEFAULT_VERSION_PATTERN)
+        outfile.write(substitute_whole(version_re, REPLACEMENTS, infile.read()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100, help="file size in MB")
+    parser.add_argument("--placeholders", type=int, default=5000)
+    parser.add_argument(
+        "--legacy", action="store_true", help="also time the whole-file engine"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "bundle.js")
+        dst = os.path.join(tmp, "out.js")
+
+        make_file(src, args.size * 1024 * 1024, args.placeholders)
+        print(
+            "{:.1f} MB, {} placeholders".format(
+                os.path.getsize(src) / 1024 / 1024, args.placeholders
+            )
+        )
+
+        start = time.perf_counter()
+        count = run_streaming(src, dst)
+        print(
+            "streaming {:>8.2f} s  {} replaced".format(
+                time.perf_counter() - start, count
+            )
+        )
+
+        if args.legacy:
+            start = time.perf_counter()
+            run_legacy(src, dst)
+            print("legacy    {:>8.2f} s".format(time.perf_counter() - start))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
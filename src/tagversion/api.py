@@ -0,0 +1,233 @@
+"""
+Python interface to the version of a repository
+
+Nothing here reads command line arguments or prints; errors are raised.  Results
+are kept in memory keyed on HEAD, the tag refs and the checked out branch, so
+asking again while none of those changed only costs a few file reads.
+"""
+import atexit
+import collections
+import os
+import threading
+import time
+import typing
+
+from .cache import VersionCache
+from .exceptions import RefError, VersionError
+from .formats import parse_formats
+from .refs import RefReader
+from .runner import GitRunner, use_runner
+from .snapshot import DESCRIBE_GIT, RepoSnapshot, clean_branch, get_branch
+from .version import Version
+
+# the number of versions kept in memory, one per repository, component and options
+MAX_RESULTS = 256
+
+
+class VersionOptions(typing.NamedTuple):
+    """
+    Settings for computing a version, the command line flags of the same names
+
+    Attributes:
+        branch: append the branch name when HEAD is not tagged
+        build: build metadata to set on the version
+        prefix: replace the prefix of the tag
+        prefix_separator: replace the separator between prefix and version
+        display_prefix: include the prefix when rendering the version
+        describe: `git` to run git describe, `native` to walk history in-process,
+            `index` to use the commit index
+        cache: reuse and update the on-disk cache in the git directory
+        concurrent: run the independent git queries at the same time
+        timeout: seconds after which git commands still running are stopped; the
+            in-process work of the native and index describe engines is not bounded
+        branch_name: the branch name to use instead of GIT_BRANCH, e.g. the one a
+            daemon's client was given
+    """
+
+    branch: bool = True
+    build: typing.Optional[str] = None
+    prefix: typing.Optional[str] = None
+    prefix_separator: typing.Optional[str] = None
+    display_prefix: bool = True
+    describe: str = DESCRIBE_GIT
+    cache: bool = True
+    concurrent: bool = True
+    timeout: typing.Optional[float] = None
+    branch_name: typing.Optional[str] = None
+
+
+DEFAULT_OPTIONS = VersionOptions()
+
+_results = collections.OrderedDict()
+_results_lock = threading.Lock()
+
+_runners = {}
+_runners_lock = threading.Lock()
+
+
+def _get_runner(path: str) -> GitRunner:
+    path = os.path.realpath(path)
+
+    with _runners_lock:
+        runner = _runners.get(path)
+        if runner is None:
+            runner = _runners[path] = GitRunner(cwd=path)
+            atexit.register(runner.close)
+
+    return runner
+
+
+def _get_refs(path: str) -> typing.Optional[RefReader]:
+    try:
+        return RefReader(path)
+    except RefError:
+        return None
+
+
+def _state_key(
+    refs: RefReader, component: typing.Optional[str], options: VersionOptions
+) -> typing.Optional[tuple]:
+    """
+    Returns the in-memory cache key for the repository state, None when unknown
+    """
+    key_options = {"component": component} if component else {}
+    state = VersionCache(refs).key(**key_options)
+    if state is None:
+        return None
+
+    return (
+        component,
+        refs.git_dir,
+        state,
+        # the branch can change without moving HEAD, e.g. `git checkout -b`
+        refs.read_ref("HEAD"),
+        options.branch_name or os.environ.get("GIT_BRANCH"),
+        options.branch,
+        options.describe,
+    )
+
+
+def _compute(
+    path: str,
+    refs: typing.Optional[RefReader],
+    component: typing.Optional[str],
+    options: VersionOptions,
+) -> typing.Optional[Version]:
+    cache = VersionCache(refs) if refs is not None and options.cache else None
+
+    runner = _get_runner(path)
+    if options.timeout is not None:
+        # a runner of its own so the deadline does not apply to other callers
+        deadline = time.monotonic() + options.timeout
+        runner = GitRunner(cwd=runner.cwd, deadline=deadline)
+
+    try:
+        with use_runner(runner):
+            snapshot = RepoSnapshot.collect(
+                branch=options.branch,
+                refs=refs,
+                engine=options.describe,
+                cache=cache,
+                component=component,
+                concurrent=options.concurrent,
+                branch_name=options.branch_name,
+            )
+
+            version_s = snapshot.describe
+            if not version_s:
+                return None
+
+            if options.branch and not snapshot.is_tagged:
+                branch = snapshot.branch
+                if branch is None:
+                    branch = get_branch(refs=refs, name=options.branch_name)
+
+                version_s = "{}-{}".format(version_s, clean_branch(branch))
+    finally:
+        if options.timeout is not None:
+            runner.close()
+
+    return Version.parse(version_s)
+
+
+def get_version_info(
+    path: str = ".",
+    component: typing.Optional[str] = None,
+    options: VersionOptions = DEFAULT_OPTIONS,
+) -> typing.Optional[Version]:
+    """
+    Returns the current version of the repository, None when it has no commits
+
+    Without a tag the version is the abbreviated commit id, like `git describe
+    --always`.  The returned version is a copy and may be modified.
+
+    Args:
+        path: a directory within the working copy
+        component: only consider the tags of this monorepo component
+        options: how to compute the version
+    """
+    refs = _get_refs(path)
+    key = _state_key(refs, component, options) if refs is not None else None
+
+    with _results_lock:
+        found = key is not None and key in _results
+        if found:
+            _results.move_to_end(key)
+            version = _results[key]
+
+    if not found:
+        version = _compute(path, refs, component, options)
+
+        if key is not None:
+            with _results_lock:
+                _results[key] = version
+                while len(_results) > MAX_RESULTS:
+                    _results.popitem(last=False)
+
+    if version is None:
+        return None
+
+    version = version.copy()
+    for attr in ("build", "prefix", "prefix_separator"):
+        value = getattr(options, attr)
+        if value:
+            setattr(version, attr, value)
+
+    return version
+
+
+def get_version(
+    path: str = ".",
+    component: typing.Optional[str] = None,
+    fmt: str = "default",
+    options: VersionOptions = DEFAULT_OPTIONS,
+) -> str:
+    """
+    Returns the current version of the repository rendered in the given format
+
+    Args:
+        path: a directory within the working copy
+        component: only consider the tags of this monorepo component
+        fmt: a format name such as `docker`, or a template such as `{major}.{minor}`
+        options: how to compute the version
+
+    Raises:
+        VersionError: when the repository has no commits or the format is invalid
+    """
+    formats = parse_formats(fmt)
+    if len(formats) != 1:
+        raise VersionError("expected a single format, got {}".format(fmt))
+
+    version = get_version_info(path, component=component, options=options)
+    if version is None:
+        raise VersionError("no commits found in {}".format(path))
+
+    return formats[0].render(version, args=options)
+
+
+def clear_cache() -> None:
+    """
+    Forgets the versions kept in memory
+    """
+    with _results_lock:
+        _results.clear()
@@ -22,12 +22,14 @@ class ArgumentParser(argparse.ArgumentParser):
             if arg in ["-h", "--help"]:  # global help if no subparser
                 break
         else:
+            # only the first argument can name the subparser, anything after it
+            # may be an option value such as the message in `--bump -m list`
+            first = sys.argv[1] if len(sys.argv) > 1 else None
             for x in self._subparsers._actions:
                 if not isinstance(x, argparse._SubParsersAction):
                     continue
-                for sp_name in x._name_parser_map.keys():
-                    if sp_name in sys.argv[1:]:
-                        subparser_found = True
+                if first in x._name_parser_map:
+                    subparser_found = True
             if not subparser_found:
                 # insert default in first position, this implies no
                 # global options without a sub_parsers specified
@@ -47,3 +49,20 @@ class ArgumentParser(argparse.ArgumentParser):
             self.set_default_subparser(default_subparser, args=default_subparser_args)
 
         return super(ArgumentParser, self).parse_args(args, namespace)
+
+
+def positive_int(value):
+    """
+    Parses a count such as the number of jobs, which must be at least 1
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            "expected a positive number, got {}".format(value)
+        )
+
+    return number
@@ -0,0 +1,148 @@
+"""
+Versions of many commits at once, e.g. to label every commit of a deploy log
+
+All commits are described with one commit index, so history shared between them
+is walked once instead of once per `git describe`.  Revisions are read and the
+results printed one at a time, so any number of them can be piped through.
+"""
+import logging
+import sys
+import typing
+
+from .exceptions import CommitIndexError, ObjectError, RefError, VersionError
+from .formats import parse_formats
+from .git import print_error
+from .refs import RefReader
+from .runner import get_runner
+from .version import Version
+
+
+def iter_revisions(
+    revisions: typing.Sequence[str], stdin: typing.TextIO = None
+) -> typing.Iterator[str]:
+    """
+    Yields the given revisions, reading them one per line from stdin for `-` or none
+
+    Args:
+        revisions: the revisions given on the command line
+        stdin: the stream to read from, sys.stdin by default
+    """
+    for revision in revisions or ["-"]:
+        if revision != "-":
+            yield revision
+            continue
+
+        for line in stdin or sys.stdin:
+            line = line.strip()
+            if line:
+                yield line
+
+
+class VersionsAt(object):
+    """
+    Print the version of each given commit
+    """
+
+    def __init__(self, args):
+        self.args = args
+
+        self.index = None
+
+    @property
+    def logger(self):
+        return logging.getLogger("{}.{}".format(__name__, self.__class__.__name__))
+
+    @classmethod
+    def setup_subparser(cls, subcommand):
+        parser = subcommand.add_parser("at", help=cls.__doc__)
+
+        parser.set_defaults(cls=cls)
+        parser.add_argument(
+            "--format",
+            default="default",
+            help="the format or template to print each version in, e.g. docker or {major}.{minor}; several comma-separated formats are printed as columns",
+        )
+        parser.add_argument(
+            "--no-display-prefix",
+            action="store_false",
+            dest="display_prefix",
+            help="print the versions without their tag prefix",
+        )
+        parser.add_argument(
+            "revisions",
+            nargs="*",
+            metavar="revision",
+            help="commit ids or other revisions, read one per line from stdin when none or - is given",
+        )
+
+    def open_index(self) -> None:
+        """
+        Opens the commit index, leaving it closed when it can not be used here
+        """
+        # imported here so only this subcommand loads sqlite
+        from .commitindex import CommitIndex
+        from .describe import _check_repository
+
+        try:
+            refs = RefReader()
+            abbrev = _check_repository(refs)
+        except (ObjectError, RefError) as exc:
+            self.logger.debug("not using the commit index: %s", exc)
+            return
+
+        self.index = CommitIndex(refs, abbrev=abbrev)
+
+    def describe(self, oid: str) -> str:
+        """
+        Returns the `--tags --always` describe output of the commit
+        """
+        if self.index is not None:
+            try:
+                return self.index.describe(oid)[0]
+            except (CommitIndexError, ObjectError) as exc:
+                self.logger.warning("falling back to git describe: %s", exc)
+
+                self.index.close()
+                self.index = None
+
+        return get_runner().run("describe", "--tags", "--always", oid).strip()
+
+    def run(self):
+        try:
+            formats = parse_formats(self.args.format)
+        except VersionError as exc:
+            print_error(exc)
+
+            return 1
+
+        self.open_index()
+
+        runner = get_runner()
+        status = 0
+        try:
+            for revision in iter_revisions(self.args.revisions):
+                header = runner.check_object("{}^{{commit}}".format(revision))
+                if header is None:
+                    print_error("{} is not a commit".format(revision))
+                    status = 1
+
+                    continue
+
+                described = self.describe(header.oid)
+                try:
+                    version = Version.parse(described)
+                except VersionError:
+                    version = None
+
+                if version is not None:
+                    columns = [x.render(version, args=self.args) for x in formats]
+                else:
+                    # e.g. an untagged commit whose abbreviated id is all digits
+                    columns = [described] * len(formats)
+
+                print("\t".join([revision] + columns))
+        finally:
+            if self.index is not None:
+                self.index.close()
+
+        return status
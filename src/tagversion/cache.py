@@ -0,0 +1,145 @@
+"""
+Persistent cache of describe results stored in the git directory
+
+Entries are keyed on the HEAD commit and a fingerprint of the tag refs, so a
+cached result is only reused while neither HEAD nor any tag has changed.
+"""
+import json
+import logging
+import os
+import tempfile
+import typing
+
+from .exceptions import RefError
+from .refs import RefReader, TAGS_PREFIX
+
+CACHE_DIR = "tag-version"
+CACHE_FILENAME = "cache.json"
+CACHE_VERSION = 1
+
+DEFAULT_MAX_ENTRIES = 64
+
+
+class CacheEntry(typing.NamedTuple):
+    describe: typing.Optional[str]
+    exact_match: typing.Optional[str]
+
+
+def _stat_key(path: str) -> str:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return "-"
+
+    return "{}:{}".format(stat.st_mtime_ns, stat.st_size)
+
+
+def tags_fingerprint(refs: RefReader) -> str:
+    """
+    Returns a string that changes whenever a tag is added, moved or deleted
+
+    Loose tags are covered by the modification times of the directories under
+    refs/tags, which change whenever a ref file is created, replaced or removed.
+    """
+    parts = [_stat_key(os.path.join(refs.common_dir, "packed-refs"))]
+
+    tags_dir = os.path.join(refs.common_dir, TAGS_PREFIX)
+    for root, dirs, _files in os.walk(tags_dir):
+        dirs.sort()
+        parts.append(_stat_key(root))
+
+    # new packs change the default abbreviation length used in describe output
+    parts.append(_stat_key(os.path.join(refs.common_dir, "objects", "pack")))
+
+    return "|".join(parts)
+
+
+class VersionCache(object):
+    """
+    Bounded on-disk mapping of repository state to describe output
+    """
+
+    def __init__(self, refs: RefReader, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.refs = refs
+        self.max_entries = max_entries
+
+        self.path = os.path.join(refs.common_dir, CACHE_DIR, CACHE_FILENAME)
+
+    @property
+    def logger(self):
+        return logging.getLogger("{}.{}".format(__name__, self.__class__.__name__))
+
+    def key(self, **options) -> typing.Optional[str]:
+        """
+        Returns the cache key for the current repository state
+
+        Args:
+            options: any additional settings that change the describe output
+        """
+        try:
+            head = self.refs.head()
+        except RefError as exc:
+            self.logger.debug("not caching: %s", exc)
+            return None
+
+        parts = [
+            head or "unborn",
+            tags_fingerprint(self.refs),
+            self.refs.config.get("core.abbrev", ""),
+        ]
+        parts.extend("{}={}".format(k, options[k]) for k in sorted(options))
+
+        return "\n".join(parts)
+
+    def _load(self) -> typing.Dict[str, typing.List]:
+        try:
+            with open(self.path, "r") as fh:
+                data = json.load(fh)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as exc:
+            self.logger.debug("ignoring unreadable cache %s: %s", self.path, exc)
+            return {}
+
+        if data.get("version") != CACHE_VERSION:
+            return {}
+
+        return data.get("entries", {})
+
+    def get(self, key: str) -> typing.Optional[CacheEntry]:
+        entry = self._load().get(key)
+        if entry is None:
+            return None
+
+        return CacheEntry(*entry)
+
+    def put(self, key: str, entry: CacheEntry):
+        entries = self._load()
+        entries.pop(key, None)
+        entries[key] = list(entry)
+
+        # json keeps insertion order, so the oldest entries are evicted first
+        while len(entries) > self.max_entries:
+            del entries[next(iter(entries))]
+
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".cache-")
+        except OSError as exc:
+            self.logger.debug("unable to write cache %s: %s", self.path, exc)
+            return
+
+        # write to a temporary file first so concurrent readers never see a partial cache
+        try:
+            with os.fdopen(fd, "w") as fh:
+                json.dump({"version": CACHE_VERSION, "entries": entries}, fh)
+
+            os.replace(tmp_path, self.path)
+        except OSError as exc:
+            self.logger.debug("unable to write cache %s: %s", self.path, exc)
+
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
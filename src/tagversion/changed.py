@@ -0,0 +1,249 @@
+"""
+Detect which monorepo components changed since their latest tag
+"""
+import json
+import re
+import typing
+
+from .exceptions import ComponentError, GitError
+from .git import GitVersion, print_error
+from .runner import get_runner
+from .snapshot import add_describe_argument, describe_components
+
+# describe output of a commit on top of a tag, e.g. `api/1.2.3-4-gabcdef0`
+DESCRIBE_RE = re.compile(r"^(?P<tag>.+)-(?P<depth>\d+)-g(?P<abbrev>[0-9a-f]+)$")
+
+COMMIT_MARKER = "commit "
+
+
+def parse_mapping(mapping: str) -> typing.Tuple[str, str]:
+    """
+    Returns the component and path of a `component=path` argument
+
+    A bare component name maps to the directory of the same name.
+    """
+    component, separator, path = mapping.partition("=")
+    if not component:
+        raise ComponentError("invalid component mapping: {}".format(mapping))
+
+    if not separator:
+        path = component
+
+    return component, path.strip("/")
+
+
+def matches_path(filename: str, path: str) -> bool:
+    """
+    Returns whether the file is at or below the given path, an empty path matches everything
+    """
+    return not path or filename == path or filename.startswith(path + "/")
+
+
+def nearest_tag(describe_s: str, is_tagged: bool) -> typing.Optional[str]:
+    """
+    Returns the tag named in describe output, None when no tag is reachable
+    """
+    if is_tagged:
+        return describe_s
+
+    matches = DESCRIBE_RE.match(describe_s)
+
+    return matches.group("tag") if matches else None
+
+
+def resolve_commits(names: typing.Iterable[str]) -> typing.List[str]:
+    """
+    Returns the commit each of the given revisions points to
+
+    The revisions are peeled by the long-lived `git cat-file --batch-check` process.
+    """
+    runner = get_runner()
+
+    commits = []
+    for name in names:
+        header = runner.check_object("{}^{{commit}}".format(name))
+        if header is None:
+            raise GitError("{} does not point to a commit".format(name))
+
+        commits.append(header.oid)
+
+    return commits
+
+
+def get_boundaries(commits: typing.Iterable[str]) -> typing.List[str]:
+    """
+    Returns commits that are ancestors of all the given commits
+
+    Anything reachable from them is outside every component's range, so the log
+    can stop there.
+    """
+    try:
+        output = get_runner().run("merge-base", "--octopus", "--all", *commits)
+    except GitError as exc:
+        # unrelated histories have no common ancestor
+        if exc.returncode != 1:
+            raise
+
+        return []
+
+    return output.strip().splitlines()
+
+
+def iter_log(boundaries: typing.Iterable[str]) -> typing.Iterator[str]:
+    """
+    Streams `git log --name-only` from HEAD, parents always following all their children
+    """
+    return get_runner().iter_lines(
+        "-c",
+        "core.quotepath=off",
+        "log",
+        "--topo-order",
+        "--no-renames",
+        "--name-only",
+        "--format={}%H %P".format(COMMIT_MARKER),
+        "HEAD",
+        *("^{}".format(x) for x in boundaries),
+    )
+
+
+def find_changed(
+    paths: typing.Dict[str, typing.List[str]],
+    tag_commits: typing.Dict[str, str],
+    log_lines: typing.Iterable[str],
+) -> typing.Set[str]:
+    """
+    Returns the components with a file changed after their tag
+
+    Each component gets a bit that is set on its tag's commit and passed on to
+    the parents as the log is read.  A commit carrying the bit is part of the
+    tag's history and is not a change to that component.
+
+    Args:
+        paths: the paths of each tagged component
+        tag_commits: the commit of each component's latest tag
+        log_lines: `git log --topo-order --name-only` output with `commit <oid> <parents>` headers
+    """
+    bits = {component: 1 << i for i, component in enumerate(sorted(paths))}
+
+    flags = {}
+    for component, commit in tag_commits.items():
+        flags[commit] = flags.get(commit, 0) | bits[component]
+
+    changed = set()
+    pending = []
+    for line in log_lines:
+        if line.startswith(COMMIT_MARKER):
+            oids = line[len(COMMIT_MARKER) :].split()
+            commit_flags = flags.pop(oids[0], 0)
+            for parent in oids[1:]:
+                flags[parent] = flags.get(parent, 0) | commit_flags
+
+            pending = [
+                x for x in paths if x not in changed and not commit_flags & bits[x]
+            ]
+        elif line and pending:
+            for component in list(pending):
+                if any(matches_path(line, path) for path in paths[component]):
+                    changed.add(component)
+                    pending.remove(component)
+
+            if len(changed) == len(paths):
+                break
+
+    return changed
+
+
+class ChangedComponents(object):
+    """
+    List monorepo components changed since their latest tag
+    """
+
+    def __init__(self, args):
+        self.args = args
+
+    @classmethod
+    def setup_subparser(cls, subcommand):
+        parser = subcommand.add_parser("changed", help=cls.__doc__)
+
+        parser.set_defaults(cls=cls)
+        add_describe_argument(parser)
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="print every component with its latest tag and whether it changed",
+        )
+        parser.add_argument(
+            "mappings",
+            nargs="+",
+            metavar="component[=path]",
+            help="a component and the path it lives in, repeat a component for several paths",
+        )
+
+    def get_paths(self) -> typing.Dict[str, typing.List[str]]:
+        paths = {}
+        for mapping in self.args.mappings:
+            component, path = parse_mapping(mapping)
+            paths.setdefault(component, []).append(path)
+
+        return paths
+
+    def get_tags(self, components) -> typing.Dict[str, typing.Optional[str]]:
+        """
+        Returns the nearest tag of each component reachable from HEAD
+        """
+        refs = GitVersion(self.args).refs
+        described = describe_components(
+            refs=refs, engine=self.args.describe, components=components
+        )
+
+        return {
+            component: (
+                nearest_tag(*described[component]) if component in described else None
+            )
+            for component in components
+        }
+
+    def get_changed(self, paths, tags) -> typing.Set[str]:
+        # components that were never tagged always need a release
+        changed = {x for x, tag in tags.items() if tag is None}
+
+        tagged = {x: tag for x, tag in tags.items() if tag is not None}
+        if not tagged:
+            return changed
+
+        names = sorted(tagged)
+        tag_commits = dict(zip(names, resolve_commits(tagged[x] for x in names)))
+
+        log_lines = iter_log(get_boundaries(set(tag_commits.values())))
+        try:
+            changed |= find_changed(
+                {x: paths[x] for x in names}, tag_commits, log_lines
+            )
+        finally:
+            # stops git log when every component was found changed early
+            log_lines.close()
+
+        return changed
+
+    def run(self):
+        try:
+            paths = self.get_paths()
+        except ComponentError as exc:
+            print_error(exc)
+
+            return 1
+
+        tags = self.get_tags(paths)
+        changed = self.get_changed(paths, tags)
+
+        if self.args.json:
+            output = {
+                component: {"tag": tags[component], "changed": component in changed}
+                for component in sorted(paths)
+            }
+            print(json.dumps(output))
+        else:
+            for component in sorted(changed):
+                print(component)
+
+        return 0
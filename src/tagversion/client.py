@@ -0,0 +1,62 @@
+"""
+Client for the `tag-version serve` daemon
+
+Requests and responses are JSON objects, one per line, so any tool able to
+write to a Unix socket can query the daemon, e.g.
+
+    echo '{"format": "docker"}' | nc -U .git/tag-version/serve.sock
+"""
+import json
+import os
+import socket
+import typing
+
+from .cache import CACHE_DIR
+from .refs import find_git_dir
+
+SOCKET_ENV = "TAG_VERSION_SOCKET"
+SOCKET_FILENAME = "serve.sock"
+
+# seconds to wait for the daemon before computing the version locally
+DEFAULT_TIMEOUT = 5.0
+
+
+def get_socket_path(path: str = ".") -> str:
+    """
+    Returns the socket of the daemon serving the repository at path
+
+    TAG_VERSION_SOCKET takes precedence over the default socket in the git directory.
+
+    Raises:
+        RefError: when path is not within a git repository
+    """
+    socket_path = os.environ.get(SOCKET_ENV)
+    if socket_path:
+        return socket_path
+
+    git_dir, _ = find_git_dir(path)
+
+    return os.path.join(git_dir, CACHE_DIR, SOCKET_FILENAME)
+
+
+def query(
+    socket_path: str, request: dict, timeout: typing.Optional[float] = DEFAULT_TIMEOUT
+) -> dict:
+    """
+    Sends the request to the daemon and returns its response
+
+    Raises:
+        OSError: when the daemon is not running or does not answer in time
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode("utf8") + b"\n")
+
+        with sock.makefile("rb") as fh:
+            line = fh.readline()
+
+    if not line:
+        raise ConnectionError("no response from {}".format(socket_path))
+
+    return json.loads(line.decode("utf8"))
@@ -0,0 +1,196 @@
+"""
+Reads the commit-graph file maintained by `git commit-graph write` / `git gc`
+
+The commit-graph stores the parents, commit date and generation number of every
+commit it covers, so history can be walked without inflating commit objects.
+"""
+import binascii
+import mmap
+import os
+import struct
+import typing
+
+from .exceptions import ObjectError
+
+SIGNATURE = b"CGPH"
+OID_SIZE = 20
+
+CHUNK_OID_FANOUT = b"OIDF"
+CHUNK_OID_LOOKUP = b"OIDL"
+CHUNK_COMMIT_DATA = b"CDAT"
+CHUNK_EXTRA_EDGES = b"EDGE"
+
+# tree oid followed by two parent positions and the generation/date words
+COMMIT_DATA_SIZE = OID_SIZE + 16
+
+PARENT_NONE = 0x70000000
+PARENT_EXTRA_EDGES = 0x80000000
+LAST_EDGE = 0x80000000
+
+
+class GraphCommit(typing.NamedTuple):
+    date: int
+    parents: typing.Tuple[str, ...]
+    generation: int
+
+
+class CommitGraphFile(object):
+    """
+    A single commit-graph file, possibly one layer of a split graph
+    """
+
+    def __init__(self, path: str, base_count: int = 0):
+        self.path = path
+        self.base_count = base_count
+
+        with open(path, "rb") as fh:
+            self._data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        data = self._data
+        if data[:4] != SIGNATURE or data[4] != 1 or data[5] != 1:
+            raise ObjectError("unsupported commit-graph {}".format(path))
+
+        chunk_count = data[6]
+
+        self.chunks = {}
+        for i in range(chunk_count):
+            start = 8 + i * 12
+            chunk_id = data[start : start + 4]
+            offset = struct.unpack(">Q", data[start + 4 : start + 12])[0]
+            self.chunks[chunk_id] = offset
+
+        for chunk_id in (CHUNK_OID_FANOUT, CHUNK_OID_LOOKUP, CHUNK_COMMIT_DATA):
+            if chunk_id not in self.chunks:
+                raise ObjectError("commit-graph {} is missing {}".format(path, chunk_id))
+
+        fanout_offset = self.chunks[CHUNK_OID_FANOUT]
+        self.fanout = struct.unpack(">256I", data[fanout_offset : fanout_offset + 1024])
+        self.count = self.fanout[255]
+
+    def oid_at(self, index: int) -> bytes:
+        start = self.chunks[CHUNK_OID_LOOKUP] + index * OID_SIZE
+        return self._data[start : start + OID_SIZE]
+
+    def find(self, oid: bytes) -> typing.Optional[int]:
+        """
+        Returns the local position of the given binary oid
+        """
+        low = self.fanout[oid[0] - 1] if oid[0] else 0
+        high = self.fanout[oid[0]]
+        while low < high:
+            mid = (low + high) // 2
+            current = self.oid_at(mid)
+            if current < oid:
+                low = mid + 1
+            elif current > oid:
+                high = mid
+            else:
+                return mid
+
+        return None
+
+    def commit_data(self, index: int) -> typing.Tuple[int, int, int, int]:
+        """
+        Returns the raw parent positions, generation and date of a local position
+        """
+        start = self.chunks[CHUNK_COMMIT_DATA] + index * COMMIT_DATA_SIZE + OID_SIZE
+        parent1, parent2, word1, word2 = struct.unpack(
+            ">IIII", self._data[start : start + 16]
+        )
+
+        generation = word1 >> 2
+        date = ((word1 & 0x3) << 32) | word2
+
+        return parent1, parent2, generation, date
+
+    def extra_edges(self, index: int) -> typing.Iterator[int]:
+        start = self.chunks[CHUNK_EXTRA_EDGES] + index * 4
+        while True:
+            edge = struct.unpack(">I", self._data[start : start + 4])[0]
+            yield edge & ~LAST_EDGE
+            if edge & LAST_EDGE:
+                break
+            start += 4
+
+
+class CommitGraph(object):
+    """
+    All layers of the repository commit-graph, base layer first
+    """
+
+    def __init__(self, files: typing.List[CommitGraphFile]):
+        self.files = files
+
+    def _locate(self, oid: str) -> typing.Optional[typing.Tuple[CommitGraphFile, int]]:
+        binary = binascii.unhexlify(oid)
+        for graph_file in reversed(self.files):
+            index = graph_file.find(binary)
+            if index is not None:
+                return graph_file, index
+
+        return None
+
+    def _oid_at_position(self, position: int) -> str:
+        for graph_file in self.files:
+            if position < graph_file.base_count + graph_file.count:
+                oid = graph_file.oid_at(position - graph_file.base_count)
+                return binascii.hexlify(oid).decode("ascii")
+
+        raise ObjectError("invalid commit-graph position {}".format(position))
+
+    def contains(self, oid: str) -> bool:
+        return self._locate(oid) is not None
+
+    def read_commit(self, oid: str) -> typing.Optional[GraphCommit]:
+        """
+        Returns the commit data for the given oid, None when the graph does not cover it
+        """
+        located = self._locate(oid)
+        if located is None:
+            return None
+
+        graph_file, index = located
+        parent1, parent2, generation, date = graph_file.commit_data(index)
+
+        positions = []
+        if parent1 != PARENT_NONE:
+            positions.append(parent1)
+
+        if parent2 & PARENT_EXTRA_EDGES:
+            positions.extend(graph_file.extra_edges(parent2 & ~PARENT_EXTRA_EDGES))
+        elif parent2 != PARENT_NONE:
+            positions.append(parent2)
+
+        parents = tuple(self._oid_at_position(x) for x in positions)
+
+        return GraphCommit(date=date, parents=parents, generation=generation)
+
+
+def load_commit_graph(objects_dir: str) -> typing.Optional[CommitGraph]:
+    """
+    Loads the single-file or split commit-graph, None when there is none
+    """
+    info_dir = os.path.join(objects_dir, "info")
+
+    paths = []
+    chain_path = os.path.join(info_dir, "commit-graphs", "commit-graph-chain")
+    if os.path.exists(chain_path):
+        with open(chain_path, "r") as fh:
+            for line in fh.read().split():
+                paths.append(
+                    os.path.join(info_dir, "commit-graphs", "graph-{}.graph".format(line))
+                )
+    elif os.path.exists(os.path.join(info_dir, "commit-graph")):
+        paths.append(os.path.join(info_dir, "commit-graph"))
+
+    if not paths:
+        return None
+
+    files = []
+    base_count = 0
+    for path in paths:
+        graph_file = CommitGraphFile(path, base_count=base_count)
+        files.append(graph_file)
+        base_count += graph_file.count
+
+    return CommitGraph(files)
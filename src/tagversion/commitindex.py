@@ -0,0 +1,612 @@
+"""
+Persistent index of the nearest tag of the commits described so far
+
+Stored in `.git/tag-version/index.sqlite`.  git describe finds the same tag for
+an untagged commit with a single parent as for that parent, one commit further
+away, so a new commit on top of indexed history is resolved by walking back to
+the first indexed commit.  Merges and root commits are described by the regular
+history walk, once.
+
+Every indexed commit refers to an anchor: the tagged commit or the walked
+commit that its chain of single parents leads to.  Commits never change, so
+when tags are added, moved or deleted only the anchors at those commits, the
+chains running through them and the walked anchors, whose result depends on
+every tag, are dropped.
+
+The index also keeps the parents and topological level of the history of the
+commits asked about, a level being one more than the highest level of the
+commit's parents.  Sweeping the commits above a commit's level in order of level
+finds every commit whose history contains it without reading any objects.
+"""
+import hashlib
+import os
+import sqlite3
+import typing
+
+from .cache import CACHE_DIR, tags_fingerprint
+from .describe import (
+    CommitName,
+    Describer,
+    PRIO_ANNOTATED,
+    PRIO_LIGHTWEIGHT,
+    Search,
+    _check_repository,
+    group_by_component,
+)
+from .exceptions import CommitIndexError, ObjectError
+from .objects import ObjectStore
+from .refs import RefReader
+
+INDEX_FILENAME = "index.sqlite"
+SCHEMA_VERSION = 2
+
+# seconds to wait for another process writing to the index
+LOCK_TIMEOUT = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    scope TEXT NOT NULL,
+    name TEXT NOT NULL,
+    tag_oid TEXT NOT NULL,
+    commit_oid TEXT NOT NULL,
+    prio INTEGER NOT NULL,
+    date INTEGER NOT NULL,
+    PRIMARY KEY (scope, name)
+);
+CREATE INDEX IF NOT EXISTS tags_commit ON tags (scope, commit_oid);
+CREATE TABLE IF NOT EXISTS anchors (
+    scope TEXT NOT NULL,
+    oid TEXT NOT NULL,
+    name TEXT,
+    depth INTEGER NOT NULL,
+    walked INTEGER NOT NULL,
+    PRIMARY KEY (scope, oid)
+);
+CREATE TABLE IF NOT EXISTS commits (
+    scope TEXT NOT NULL,
+    oid TEXT NOT NULL,
+    anchor TEXT NOT NULL,
+    steps INTEGER NOT NULL,
+    PRIMARY KEY (scope, oid)
+);
+CREATE INDEX IF NOT EXISTS commits_anchor ON commits (scope, anchor, steps);
+CREATE TABLE IF NOT EXISTS generations (
+    oid TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL,
+    parents TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS generations_level ON generations (generation);
+"""
+
+
+class IndexedCommit(typing.NamedTuple):
+    # the nearest tag, None when no tag is reachable
+    name: typing.Optional[str]
+    depth: int
+    is_tagged: bool
+
+
+class IndexedNames(object):
+    """
+    Tag names keyed by commit, looked up in the index one commit at a time
+
+    Stands in for the dictionary of every tag name used by the history walk.
+    """
+
+    def __init__(self, db: sqlite3.Connection, scope: str):
+        self.db = db
+        self.scope = scope
+
+    def get(self, oid: str) -> typing.Optional[CommitName]:
+        # the same choice between tags on one commit as Describer.load_names
+        row = self.db.execute(
+            "SELECT name, prio, tag_oid FROM tags WHERE scope = ? AND commit_oid = ?"
+            " ORDER BY prio DESC, date DESC, name LIMIT 1",
+            (self.scope, oid),
+        ).fetchone()
+
+        return CommitName(*row) if row else None
+
+
+class CommitIndex(object):
+    """
+    Describes commits using the index of the repository, updating it as needed
+
+    Args:
+        refs: reader for the repository
+        abbrev: the configured abbreviation length, None for git's default
+    """
+
+    def __init__(self, refs: RefReader, abbrev: typing.Optional[int] = None):
+        self.refs = refs
+        self.abbrev = abbrev
+
+        self.path = os.path.join(refs.common_dir, CACHE_DIR, INDEX_FILENAME)
+
+        self._db = None
+        self._store = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            except OSError as exc:
+                raise CommitIndexError("unable to use {}: {}".format(self.path, exc))
+
+            # transactions are started explicitly, see _write()
+            self._db = sqlite3.connect(
+                self.path, timeout=LOCK_TIMEOUT, isolation_level=None
+            )
+            self._migrate()
+
+        return self._db
+
+    @property
+    def store(self) -> ObjectStore:
+        if self._store is None:
+            self._store = ObjectStore.from_git_dir(self.refs.common_dir)
+
+        return self._store
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _get_meta(self, key: str) -> typing.Optional[str]:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self.db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def _write(self):
+        # BEGIN IMMEDIATE takes the write lock up front so concurrent updates queue
+        self.db.execute("BEGIN IMMEDIATE")
+
+        return self.db
+
+    def _migrate(self) -> None:
+        db = self._db
+        db.executescript(SCHEMA)
+
+        if self._get_meta("schema") != str(SCHEMA_VERSION):
+            self._write()
+            try:
+                for table in ("tags", "anchors", "commits", "generations", "meta"):
+                    db.execute("DELETE FROM {}".format(table))
+
+                self._set_meta("schema", str(SCHEMA_VERSION))
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+            db.execute("COMMIT")
+
+    def _shallow_key(self) -> str:
+        digest = hashlib.sha1(" ".join(sorted(self.store.shallow)).encode("ascii"))
+
+        return digest.hexdigest()
+
+    def sync_tags(self, component: typing.Optional[str] = None) -> None:
+        """
+        Brings the indexed tags up to date, dropping the entries they invalidate
+
+        Only tags that were added, moved or deleted since the previous sync are peeled.
+        """
+        scope = component or ""
+        fingerprint = tags_fingerprint(self.refs)
+        shallow_key = self._shallow_key()
+
+        if (
+            self._get_meta("tags:" + scope) == fingerprint
+            and self._get_meta("shallow") == shallow_key
+        ):
+            return
+
+        describer = Describer(self.refs, store=self.store, component=component)
+        current = describer.tag_refs
+
+        db = self._write()
+        try:
+            # a deepened clone gives commits new parents
+            if self._get_meta("shallow") != shallow_key:
+                db.execute("DELETE FROM anchors")
+                db.execute("DELETE FROM commits")
+                db.execute("DELETE FROM generations")
+                self._set_meta("shallow", shallow_key)
+
+            stored = {
+                name: (tag_oid, commit_oid)
+                for name, tag_oid, commit_oid in db.execute(
+                    "SELECT name, tag_oid, commit_oid FROM tags WHERE scope = ?",
+                    (scope,),
+                )
+            }
+
+            changed = set()
+            for name, (tag_oid, commit_oid) in stored.items():
+                ref = current.get(name)
+                if ref is None or ref.oid != tag_oid:
+                    db.execute(
+                        "DELETE FROM tags WHERE scope = ? AND name = ?", (scope, name)
+                    )
+                    changed.add(commit_oid)
+
+            for name, ref in current.items():
+                if name in stored and stored[name][0] == ref.oid:
+                    continue
+
+                commit_oid, prio, date = self._peel(ref)
+                db.execute(
+                    "INSERT OR REPLACE INTO tags"
+                    " (scope, name, tag_oid, commit_oid, prio, date)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (scope, name, ref.oid, commit_oid, prio, date),
+                )
+                changed.add(commit_oid)
+
+            if changed:
+                self._invalidate(scope, changed)
+
+            self._set_meta("tags:" + scope, fingerprint)
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+        db.execute("COMMIT")
+
+    def _peel(self, ref) -> typing.Tuple[str, int, int]:
+        """
+        Returns the commit the tag points to, its priority and the date of an annotated tag
+        """
+        if ref.peeled:
+            peeled = ref.peeled
+        else:
+            peeled, _type, _tag = self.store.peel(ref.oid)
+
+        if peeled == ref.oid:
+            return peeled, PRIO_LIGHTWEIGHT, 0
+
+        return peeled, PRIO_ANNOTATED, self.store.read_tag(ref.oid).date
+
+    def _invalidate(self, scope: str, commits: typing.Set[str]) -> None:
+        db = self.db
+
+        # the result of a walk may depend on any tag
+        db.execute(
+            "DELETE FROM commits WHERE scope = ? AND anchor IN"
+            " (SELECT oid FROM anchors WHERE scope = ? AND walked)",
+            (scope, scope),
+        )
+        db.execute("DELETE FROM anchors WHERE scope = ? AND walked", (scope,))
+
+        for oid in commits:
+            row = db.execute(
+                "SELECT anchor, steps FROM commits WHERE scope = ? AND oid = ?",
+                (scope, oid),
+            ).fetchone()
+            if row is None:
+                continue
+
+            # the commit and every commit above it on the chain, including other
+            # branches forking from the chain above it
+            anchor, steps = row
+            db.execute(
+                "DELETE FROM commits WHERE scope = ? AND anchor = ? AND steps >= ?",
+                (scope, anchor, steps),
+            )
+            if not steps:
+                db.execute(
+                    "DELETE FROM anchors WHERE scope = ? AND oid = ?", (scope, anchor)
+                )
+
+    def lookup(
+        self, oid: str, component: typing.Optional[str] = None
+    ) -> typing.Optional[IndexedCommit]:
+        """
+        Returns the indexed nearest tag of the commit, None when it is not indexed
+        """
+        row = self.db.execute(
+            "SELECT a.name, a.depth + c.steps, a.walked, c.steps"
+            " FROM commits c JOIN anchors a ON a.scope = c.scope AND a.oid = c.anchor"
+            " WHERE c.scope = ? AND c.oid = ?",
+            (component or "", oid),
+        ).fetchone()
+        if row is None:
+            return None
+
+        name, depth, walked, steps = row
+
+        return IndexedCommit(name=name, depth=depth, is_tagged=not walked and not steps)
+
+    def add(self, oid: str, component: typing.Optional[str] = None) -> IndexedCommit:
+        """
+        Indexes the commit, walking back until an indexed, tagged or merge commit
+        """
+        scope = component or ""
+
+        db = self._write()
+        try:
+            names = IndexedNames(db, scope)
+
+            chain = []
+            commit = oid
+            while True:
+                row = db.execute(
+                    "SELECT anchor, steps FROM commits WHERE scope = ? AND oid = ?",
+                    (scope, commit),
+                ).fetchone()
+                if row is not None:
+                    anchor, steps = row
+                    break
+
+                name = names.get(commit)
+                parents = () if name else self.store.read_commit(commit).parents
+                if len(parents) == 1:
+                    chain.append(commit)
+                    commit = parents[0]
+                    continue
+
+                anchor, steps = commit, 0
+                if name is not None:
+                    self._add_anchor(scope, commit, name.name, 0, walked=False)
+                else:
+                    self._add_anchor(scope, commit, *self._walk(commit, names))
+
+                break
+
+            # the chain is listed from the newest commit down
+            db.executemany(
+                "INSERT OR REPLACE INTO commits (scope, oid, anchor, steps)"
+                " VALUES (?, ?, ?, ?)",
+                (
+                    (scope, x, anchor, steps + distance)
+                    for distance, x in enumerate(reversed(chain), 1)
+                ),
+            )
+
+            indexed = self.lookup(oid, component)
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+        db.execute("COMMIT")
+
+        return indexed
+
+    def _add_anchor(
+        self, scope: str, oid: str, name: typing.Optional[str], depth: int, walked: bool
+    ) -> None:
+        self.db.execute(
+            "INSERT OR REPLACE INTO anchors (scope, oid, name, depth, walked)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (scope, oid, name, depth, int(walked)),
+        )
+        self.db.execute(
+            "INSERT OR REPLACE INTO commits (scope, oid, anchor, steps)"
+            " VALUES (?, ?, ?, 0)",
+            (scope, oid, oid),
+        )
+
+    def _walk(
+        self, oid: str, names: IndexedNames
+    ) -> typing.Tuple[typing.Optional[str], int, bool]:
+        """
+        Describes a merge or root commit with the regular history walk
+        """
+        describer = Describer(self.refs, store=self.store)
+
+        search = Search(names)
+        describer._search(oid, [search])
+
+        if search.best is None:
+            return None, 0, True
+
+        return search.best.name, search.best.depth, True
+
+    def describe(
+        self, oid: str, component: typing.Optional[str] = None
+    ) -> typing.Tuple[str, typing.Optional[str]]:
+        """
+        Returns the `--tags --always` and `--exact-match` describe output of the commit
+
+        Raises:
+            CommitIndexError: when the index can not be read or written
+            ObjectError: when the history can not be read in-process
+        """
+        try:
+            return self._describe(oid, component)
+        except sqlite3.Error as exc:
+            raise CommitIndexError("unable to use {}: {}".format(self.path, exc))
+        except (KeyError, IndexError, ValueError) as exc:
+            raise ObjectError("unable to describe {}: {}".format(oid, exc))
+
+    def _describe(
+        self, oid: str, component: typing.Optional[str] = None
+    ) -> typing.Tuple[str, typing.Optional[str]]:
+        self.sync_tags(component)
+
+        indexed = self.lookup(oid, component)
+        if indexed is None:
+            indexed = self.add(oid, component)
+
+        if indexed.is_tagged:
+            return indexed.name, indexed.name
+
+        abbrev = self.store.abbreviate(oid, self.abbrev)
+        if indexed.name is None:
+            return abbrev, None
+
+        return "{}-{}-g{}".format(indexed.name, indexed.depth, abbrev), None
+
+    def generation(self, oid: str) -> int:
+        """
+        Returns the topological level of the commit, indexing its history as needed
+        """
+        levels = {}
+
+        def known(commit):
+            if commit not in levels:
+                row = self.db.execute(
+                    "SELECT generation FROM generations WHERE oid = ?", (commit,)
+                ).fetchone()
+                if row is not None:
+                    levels[commit] = row[0]
+
+            return levels.get(commit)
+
+        if known(oid) is not None:
+            return levels[oid]
+
+        computed = []
+        stack = [oid]
+        while stack:
+            commit = stack[-1]
+            if known(commit) is not None:
+                stack.pop()
+                continue
+
+            parents = self.store.read_commit(commit).parents
+            pending = [x for x in parents if known(x) is None]
+            if pending:
+                stack.extend(pending)
+                continue
+
+            levels[commit] = 1 + max((levels[x] for x in parents), default=0)
+            computed.append((commit, levels[commit], " ".join(parents)))
+            stack.pop()
+
+        db = self._write()
+        try:
+            db.executemany(
+                "INSERT OR REPLACE INTO generations (oid, generation, parents)"
+                " VALUES (?, ?, ?)",
+                computed,
+            )
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+        db.execute("COMMIT")
+
+        return levels[oid]
+
+    def contains(
+        self, oid: str, component: typing.Optional[str] = None
+    ) -> typing.List[str]:
+        """
+        Returns the names of the tags whose history contains the commit
+
+        Raises:
+            CommitIndexError: when the index can not be read or written
+            ObjectError: when the history can not be read in-process
+        """
+        try:
+            return self._contains(oid, component)
+        except sqlite3.Error as exc:
+            raise CommitIndexError("unable to use {}: {}".format(self.path, exc))
+        except (KeyError, IndexError, ValueError) as exc:
+            raise ObjectError("unable to walk the history of {}: {}".format(oid, exc))
+
+    def _contains(
+        self, oid: str, component: typing.Optional[str] = None
+    ) -> typing.List[str]:
+        self.sync_tags(component)
+
+        level = self.generation(oid)
+
+        # tags below the commit's level can not contain it
+        tags = []
+        for name, commit in self.db.execute(
+            "SELECT name, commit_oid FROM tags WHERE scope = ?", (component or "",)
+        ).fetchall():
+            commit_level = self.generation(commit)
+            if commit_level >= level:
+                tags.append((name, commit, commit_level))
+
+        if not tags:
+            return []
+
+        # parents come before their children in order of level, so a single pass
+        # up to the highest tag finds every commit whose history contains this one
+        descendants = {oid}
+        for commit, parents in self.db.execute(
+            "SELECT oid, parents FROM generations"
+            " WHERE generation > ? AND generation <= ? ORDER BY generation",
+            (level, max(x[2] for x in tags)),
+        ):
+            if any(x in descendants for x in parents.split()):
+                descendants.add(commit)
+
+        return [name for name, commit, _level in tags if commit in descendants]
+
+
+def _describe_with_index(refs: RefReader, describe):
+    abbrev = _check_repository(refs)
+
+    head = refs.head()
+    if head is None:
+        return None
+
+    index = CommitIndex(refs, abbrev=abbrev)
+    try:
+        return describe(index, head)
+    finally:
+        index.close()
+
+
+def describe_head_indexed(
+    refs: RefReader, component: typing.Optional[str] = None
+) -> typing.Tuple[typing.Optional[str], typing.Optional[str]]:
+    """
+    Describes HEAD with the commit index
+
+    Args:
+        refs: reader for the repository
+        component: only consider the tags of this monorepo component
+
+    Returns:
+        tuple of the `--tags --always` and `--exact-match` output, both None without commits
+    """
+    result = _describe_with_index(
+        refs, lambda index, head: index.describe(head, component)
+    )
+
+    return result or (None, None)
+
+
+def describe_head_components_indexed(
+    refs: RefReader, components: typing.Optional[typing.Collection[str]] = None
+) -> typing.Dict[str, typing.Tuple[str, bool]]:
+    """
+    Describes HEAD with the commit index against every component's tags
+
+    Args:
+        refs: reader for the repository
+        components: only describe these components
+
+    Returns:
+        mapping of component to its describe output and whether HEAD is tagged
+    """
+
+    def describe(index, head):
+        results = {}
+        for component in sorted(group_by_component(refs.tag_refs())):
+            if components is not None and component not in components:
+                continue
+
+            describe_s, exact_match = index.describe(head, component)
+            results[component] = (describe_s, exact_match is not None)
+
+        return results
+
+    return _describe_with_index(refs, describe) or {}
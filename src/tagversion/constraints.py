@@ -0,0 +1,162 @@
+"""
+Version constraints such as `>=1.4,<2` or `3.2.*`, evaluated over sort keys
+
+A constraint narrows the keys of `tagindex.precedence_key` to a single range, so
+the matching tags of a sorted index are found by bisecting; only `!=` clauses are
+checked tag by tag.  Partial versions cover every version they start, e.g. `<=1.4`
+includes `1.4.9`, and `==` includes the prereleases of the given version.
+"""
+import re
+import typing
+
+from .exceptions import VersionError
+from .tagindex import MAXIMUM, precedence_key
+
+CLAUSE_RE = re.compile(
+    r"^(?P<operator>==|!=|>=|<=|~=|>|<|\^)?\s*"
+    r"(?P<major>0|[1-9][0-9]*)"
+    r"(?:\.(?P<minor>0|[1-9][0-9]*)"
+    r"(?:\.(?P<patch>0|[1-9][0-9]*)(?P<prerelease>-?[0-9A-Za-z][0-9A-Za-z.-]*)?)?)?"
+    r"(?P<wildcard>\.\*)?$"
+)
+
+# no lower or upper bound
+LOWEST = ()
+HIGHEST = (MAXIMUM,)
+
+
+class Clause(typing.NamedTuple):
+    operator: str
+    # the major, minor and patch numbers given, e.g. (1, 4) for `1.4`
+    parts: typing.Tuple[int, ...]
+    prerelease: str
+
+    @property
+    def is_full(self) -> bool:
+        return len(self.parts) == 3
+
+    def key(self) -> typing.Tuple:
+        return precedence_key(*self.parts, self.prerelease)
+
+    def start(self) -> typing.Tuple:
+        """
+        Returns the lowest key at or above the version, leaving out its prereleases
+        """
+        if self.prerelease:
+            return self.key()
+
+        padded = self.parts + (0,) * (3 - len(self.parts))
+
+        return padded + (True,)
+
+    def covered(self) -> typing.Tuple[typing.Tuple, typing.Tuple]:
+        """
+        Returns the range of keys the version covers, including its prereleases
+        """
+        if self.prerelease:
+            return self.key(), self.key() + (MAXIMUM,)
+
+        return self.parts, self.parts + (MAXIMUM,)
+
+    def bounds(self) -> typing.Tuple[typing.Tuple, typing.Tuple]:
+        """
+        Returns the range of keys matching the clause, from low up to but excluding high
+        """
+        operator = self.operator
+        if operator == "==":
+            return self.covered()
+
+        if operator == ">=":
+            return self.start(), HIGHEST
+
+        if operator == ">":
+            return self.covered()[1], HIGHEST
+
+        if operator == "<":
+            # `<2.0.0` leaves out the prereleases of 2.0.0
+            return LOWEST, self.key() if self.prerelease else self.parts
+
+        if operator == "<=":
+            return LOWEST, self.covered()[1]
+
+        if operator == "~=":
+            # `~=1.4.2` is `>=1.4.2,<1.5`
+            upper = self.parts[:-1]
+            return self.start(), upper[:-1] + (upper[-1] + 1,)
+
+        # `^1.4.2` is `>=1.4.2,<2` and `^0.4.2` is `>=0.4.2,<0.5`
+        nonzero = [i for i, x in enumerate(self.parts) if x]
+        index = nonzero[0] if nonzero else len(self.parts) - 1
+
+        return self.start(), self.parts[:index] + (self.parts[index] + 1,)
+
+
+def parse_clause(value: str) -> Clause:
+    """
+    Parses a single clause such as `>=1.4` or `3.2.*`
+
+    Raises:
+        VersionError: when the clause is not a valid constraint
+    """
+    matches = CLAUSE_RE.match(value.strip())
+    if matches is None:
+        raise VersionError("invalid version constraint {!r}".format(value))
+
+    groups = matches.groupdict()
+    operator = groups["operator"] or "=="
+
+    parts = tuple(
+        int(groups[x]) for x in ("major", "minor", "patch") if groups[x] is not None
+    )
+    clause = Clause(
+        operator=operator,
+        parts=parts,
+        prerelease=(groups["prerelease"] or "").lstrip("-"),
+    )
+
+    if groups["wildcard"] and (clause.is_full or operator not in ("==", "!=")):
+        raise VersionError("invalid wildcard in version constraint {!r}".format(value))
+
+    if operator == "~=" and len(parts) < 2:
+        raise VersionError("~= needs at least a minor version, got {!r}".format(value))
+
+    return clause
+
+
+class VersionRange(object):
+    """
+    The keys matching every clause of a constraint, e.g. `>=1.4,<2,!=1.5.0`
+
+    Args:
+        constraint: comma separated clauses, an empty string matches every version
+
+    Raises:
+        VersionError: when a clause is not a valid constraint
+    """
+
+    def __init__(self, constraint: str = ""):
+        self.low = LOWEST
+        self.high = HIGHEST
+        self.excluded = []
+
+        for value in constraint.split(","):
+            if not value.strip():
+                continue
+
+            clause = parse_clause(value)
+            if clause.operator == "!=":
+                self.excluded.append(clause.covered())
+                continue
+
+            low, high = clause.bounds()
+            self.low = max(self.low, low)
+            self.high = min(self.high, high)
+
+    def matches(self, key: typing.Tuple) -> bool:
+        """
+        Returns whether the key is within the range and not excluded
+        """
+        if not self.low <= key < self.high:
+            return False
+
+        return not any(low <= key < high for low, high in self.excluded)
@@ -0,0 +1,118 @@
+"""
+Versions whose history contains a commit, e.g. the releases that shipped a fix
+
+`git tag --contains` walks history from every tag on each query.  Here the walks
+from all tags share their results and stop at the commit's topological level,
+tags below that level are dropped without a walk, and the tags are peeled once and
+kept in the commit index.
+"""
+import logging
+import typing
+
+from .describe import COMPONENT_SEPARATOR, component_name
+from .exceptions import CommitIndexError, ObjectError, RefError
+from .git import print_error
+from .refs import RefReader
+from .runner import get_runner
+from .tagindex import version_key
+from .version import Version
+
+
+def sort_versions(
+    names: typing.Iterable[str], releases: bool = False
+) -> typing.List[str]:
+    """
+    Returns the version tags among the names by prefix, lowest precedence first
+
+    Args:
+        names: tag names, those without a full version number are dropped
+        releases: also drop prereleases, e.g. `1.0.0rc1`
+    """
+    names = list(names)
+
+    entries = []
+    for name, version in zip(names, Version.parse_many(names, ignore_errors=True)):
+        if version is None or not version.is_semver:
+            continue
+
+        if releases and version.prerelease:
+            continue
+
+        entries.append((version.prefix, version_key(version), name))
+
+    return [name for _, _, name in sorted(entries)]
+
+
+class ContainingVersions(object):
+    """
+    List the versions whose history contains a commit
+    """
+
+    def __init__(self, args):
+        self.args = args
+
+    @property
+    def logger(self):
+        return logging.getLogger("{}.{}".format(__name__, self.__class__.__name__))
+
+    @classmethod
+    def setup_subparser(cls, subcommand):
+        parser = subcommand.add_parser("contains", help=cls.__doc__)
+
+        parser.set_defaults(cls=cls)
+        parser.add_argument(
+            "--component",
+            help="only list the versions of this monorepo component, e.g. api for api/1.2.3",
+        )
+        parser.add_argument(
+            "--releases",
+            action="store_true",
+            help="only list releases, leaving out release candidates and other prereleases",
+        )
+        parser.add_argument(
+            "commit", help="the commit id or other revision to look for"
+        )
+
+    def get_tags(self, oid: str) -> typing.List[str]:
+        """
+        Returns the tags containing the commit, from the index or from git
+        """
+        # imported here so only this subcommand loads sqlite
+        from .commitindex import CommitIndex
+        from .describe import _check_repository
+
+        try:
+            refs = RefReader()
+            _check_repository(refs)
+
+            index = CommitIndex(refs)
+            try:
+                return index.contains(oid, self.args.component)
+            finally:
+                index.close()
+        except (CommitIndexError, ObjectError, RefError) as exc:
+            self.logger.warning("falling back to git tag --contains: %s", exc)
+
+        command = ["tag", "--list", "--contains", oid]
+        if self.args.component:
+            command.append(self.args.component + COMPONENT_SEPARATOR + "*")
+
+        names = get_runner().run(*command).splitlines()
+        if self.args.component:
+            # the pattern also matches nested components, e.g. `api/internal/0.1.0`
+            names = [x for x in names if component_name(x) == self.args.component]
+
+        return names
+
+    def run(self):
+        header = get_runner().check_object("{}^{{commit}}".format(self.args.commit))
+        if header is None:
+            print_error("{} is not a commit".format(self.args.commit))
+
+            return 1
+
+        tags = self.get_tags(header.oid)
+        for name in sort_versions(tags, releases=self.args.releases is True):
+            print(name)
+
+        return 0
@@ -0,0 +1,463 @@
+"""
+In-process implementation of `git describe --tags`
+
+Mirrors the candidate search and depth computation in git's builtin/describe.c
+so the output is identical to the git binary, including the abbreviated oid.
+Several sets of tags, e.g. one per monorepo component, can be searched in a
+single walk of the history.
+"""
+import heapq
+import typing
+
+from .exceptions import ObjectError
+from .objects import ObjectStore
+from .refs import PackedRef, RefReader
+
+# same defaults as git describe
+MAX_CANDIDATES = 10
+
+SEEN = 1
+
+PRIO_LIGHTWEIGHT = 1
+PRIO_ANNOTATED = 2
+
+COMPONENT_SEPARATOR = "/"
+
+
+class CommitName(typing.NamedTuple):
+    name: str
+    prio: int
+    # the oid of the tag object for annotated tags, used to break ties
+    tag_oid: str
+
+
+class Candidate(object):
+    __slots__ = ("name", "depth", "flag_within", "found_order")
+
+    def __init__(self, name, depth, flag_within, found_order):
+        self.name = name
+        self.depth = depth
+        self.flag_within = flag_within
+        self.found_order = found_order
+
+
+class Search(object):
+    """
+    Candidate search state for one set of tag names
+    """
+
+    def __init__(self, names: typing.Dict[str, CommitName], flag_offset: int = 0):
+        self.names = names
+        self.flag_offset = flag_offset
+
+        self.matches = []
+        self.annotated_count = 0
+        self.best = None
+        self.done = False
+
+    def best_within(self) -> int:
+        """
+        Returns the flags of the candidate(s) with the lowest depth so far
+        """
+        best_depth = None
+        best_within = 0
+        for match in self.matches:
+            if best_depth is None or match.depth < best_depth:
+                best_depth = match.depth
+                best_within = match.flag_within
+            elif match.depth == best_depth:
+                best_within |= match.flag_within
+
+        return best_within
+
+    def pick_best(self) -> typing.Optional[Candidate]:
+        self.done = True
+
+        if self.matches:
+            self.matches.sort(key=lambda x: (x.depth, x.found_order))
+            self.best = self.matches[0]
+
+        return self.best
+
+
+def component_name(tag: str) -> typing.Optional[str]:
+    """
+    Returns the monorepo component of a tag, e.g. `api` for `api/1.2.3`
+    """
+    component, separator, _version = tag.rpartition(COMPONENT_SEPARATOR)
+
+    return component if separator else None
+
+
+def group_by_component(
+    tags: typing.Iterable[str],
+) -> typing.Dict[str, typing.List[str]]:
+    """
+    Indexes the given tag names by their component prefix, unprefixed tags are skipped
+    """
+    components = {}
+    for tag in tags:
+        component = component_name(tag)
+        if component is not None:
+            components.setdefault(component, []).append(tag)
+
+    return components
+
+
+class Describer(object):
+    """
+    Finds the nearest tag of a commit by walking the commit graph
+
+    Args:
+        component: only consider the tags of this monorepo component, e.g. `api`
+            for `api/1.2.3` but not `api/internal/0.1.0`
+    """
+
+    def __init__(
+        self,
+        refs: RefReader,
+        store: typing.Optional[ObjectStore] = None,
+        max_candidates: int = MAX_CANDIDATES,
+        abbrev: typing.Optional[int] = None,
+        component: typing.Optional[str] = None,
+    ):
+        self.refs = refs
+        self.store = store or ObjectStore.from_git_dir(refs.common_dir)
+        self.max_candidates = max_candidates
+        self.abbrev = abbrev
+        self.component = component
+
+        self._tag_refs = None
+        self._names = None
+        self._tag_dates = {}
+        self._sequence = 0
+
+    @property
+    def tag_refs(self) -> typing.Dict[str, PackedRef]:
+        if self._tag_refs is None:
+            if self.component is None:
+                self._tag_refs = self.refs.tag_refs()
+            else:
+                # only the component's directory of refs is read, nested components are dropped
+                tag_refs = self.refs.tag_refs(self.component + COMPONENT_SEPARATOR)
+                self._tag_refs = {
+                    name: ref
+                    for name, ref in tag_refs.items()
+                    if component_name(name) == self.component
+                }
+
+        return self._tag_refs
+
+    @property
+    def names(self) -> typing.Dict[str, CommitName]:
+        """
+        Returns all tag names keyed by the commit they point to
+        """
+        if self._names is None:
+            self._names = self.load_names(self.tag_refs)
+
+        return self._names
+
+    def _tag_date(self, oid: str) -> int:
+        if oid not in self._tag_dates:
+            self._tag_dates[oid] = self.store.read_tag(oid).date
+
+        return self._tag_dates[oid]
+
+    def load_names(self, tags: typing.Iterable[str]) -> typing.Dict[str, CommitName]:
+        """
+        Returns the given tags keyed by commit, choosing between tags on the same commit like git
+        """
+        names = {}
+
+        tag_refs = self.tag_refs
+        for name in sorted(tags):
+            ref = tag_refs[name]
+            if ref.peeled:
+                peeled = ref.peeled
+            else:
+                peeled, _type, _tag = self.store.peel(ref.oid)
+
+            prio = PRIO_ANNOTATED if peeled != ref.oid else PRIO_LIGHTWEIGHT
+
+            existing = names.get(peeled)
+            if existing is not None:
+                if existing.prio > prio:
+                    continue
+
+                if existing.prio == prio:
+                    # multiple annotated tags on one commit, git keeps the newest
+                    if prio != PRIO_ANNOTATED:
+                        continue
+
+                    if not self._tag_date(existing.tag_oid) < self._tag_date(ref.oid):
+                        continue
+
+            names[peeled] = CommitName(name=name, prio=prio, tag_oid=ref.oid)
+
+        return names
+
+    def _push(self, queue, oid):
+        self._sequence += 1
+        heapq.heappush(queue, (-self.store.read_commit(oid).date, self._sequence, oid))
+
+    def exact_match(self, oid: str) -> typing.Optional[str]:
+        """
+        Returns the tag pointing at the commit, like `git describe --tags --exact-match`
+        """
+        name = self.names.get(oid)
+
+        return name.name if name else None
+
+    def describe(self, oid: str) -> str:
+        """
+        Returns the same output as `git describe --tags --always`
+        """
+        return self.describe_many(oid, {None: self.names})[None]
+
+    def describe_many(
+        self,
+        oid: str,
+        groups: typing.Dict[typing.Any, typing.Dict[str, CommitName]],
+    ) -> typing.Dict[typing.Any, str]:
+        """
+        Describes a commit against several sets of tags in one walk
+
+        Each set gives the same result as `git describe --tags --always` would
+        with only those tags in the repository.
+
+        Args:
+            oid: the commit to describe
+            groups: tag names keyed by commit, for each group key
+        """
+        results = {}
+        searches = {}
+        abbrev = None
+
+        for key, names in groups.items():
+            name = names.get(oid)
+            if name is not None:
+                results[key] = name.name
+                continue
+
+            if names:
+                searches[key] = Search(
+                    names, flag_offset=len(searches) * self.max_candidates
+                )
+
+        if searches:
+            self._search(oid, list(searches.values()))
+
+        for key in groups:
+            if key in results:
+                continue
+
+            if abbrev is None:
+                abbrev = self.store.abbreviate(oid, self.abbrev)
+
+            search = searches.get(key)
+            if search is None or search.best is None:
+                results[key] = abbrev
+            else:
+                results[key] = "{}-{}-g{}".format(
+                    search.best.name, search.best.depth, abbrev
+                )
+
+        return results
+
+    def _search(self, oid: str, searches: typing.List[Search]):
+        store = self.store
+        max_candidates = self.max_candidates
+
+        flags = {oid: SEEN}
+        queue = []
+        self._push(queue, oid)
+
+        seen_commits = 0
+        active = list(searches)
+
+        while queue and active:
+            commit = heapq.heappop(queue)[2]
+            seen_commits += 1
+
+            gave_up = []
+            for search in active:
+                name = search.names.get(commit)
+                if name is None:
+                    continue
+
+                if len(search.matches) < max_candidates:
+                    flag_within = 1 << (search.flag_offset + len(search.matches) + 1)
+                    search.matches.append(
+                        Candidate(
+                            name=name.name,
+                            depth=seen_commits - 1,
+                            flag_within=flag_within,
+                            found_order=len(search.matches) + 1,
+                        )
+                    )
+                    flags[commit] |= flag_within
+                    if name.prio == PRIO_ANNOTATED:
+                        search.annotated_count += 1
+                else:
+                    gave_up.append(search)
+
+            for search in gave_up:
+                active.remove(search)
+
+                best = search.pick_best()
+                if active:
+                    # the walk carries on for the other searches, finish on copies
+                    finish_queue, finish_flags = list(queue), dict(flags)
+                else:
+                    finish_queue, finish_flags = queue, flags
+
+                self._push(finish_queue, commit)
+                self._finish_depth(finish_queue, best, finish_flags)
+
+            if not active:
+                break
+
+            commit_flags = flags[commit]
+            for search in active:
+                for match in search.matches:
+                    if not commit_flags & match.flag_within:
+                        match.depth += 1
+
+            # stop if the last remaining path is already covered by the best candidate(s)
+            if not queue:
+                for search in list(active):
+                    if not search.annotated_count:
+                        continue
+
+                    best_within = search.best_within()
+                    if commit_flags & best_within == best_within:
+                        active.remove(search)
+                        search.pick_best()
+
+            for parent in store.read_commit(commit).parents:
+                parent_flags = flags.get(parent, 0)
+                if not parent_flags & SEEN:
+                    self._push(queue, parent)
+
+                flags[parent] = parent_flags | commit_flags
+
+        for search in searches:
+            if not search.done:
+                search.pick_best()
+
+    def _finish_depth(self, queue, best: Candidate, flags: typing.Dict[str, int]):
+        """
+        Keeps walking until every remaining commit is reachable from the best candidate
+        """
+        store = self.store
+        flag_within = best.flag_within
+
+        while queue:
+            commit = heapq.heappop(queue)[2]
+            commit_flags = flags[commit]
+
+            if commit_flags & flag_within:
+                if all(flags[x[2]] & flag_within for x in queue):
+                    break
+            else:
+                best.depth += 1
+
+            for parent in store.read_commit(commit).parents:
+                parent_flags = flags.get(parent, 0)
+                if not parent_flags & SEEN:
+                    self._push(queue, parent)
+
+                flags[parent] = parent_flags | commit_flags
+
+    def describe_components(
+        self, oid: str, components: typing.Optional[typing.Collection[str]] = None
+    ) -> typing.Dict[str, typing.Tuple[str, bool]]:
+        """
+        Describes a commit against each component's tags in a single walk
+
+        Args:
+            oid: the commit to describe
+            components: only describe these components
+
+        Returns:
+            mapping of component to its describe output and whether the commit is tagged
+        """
+        groups = {
+            component: self.load_names(tags)
+            for component, tags in group_by_component(self.tag_refs).items()
+            if components is None or component in components
+        }
+
+        results = self.describe_many(oid, groups)
+
+        return {
+            component: (result, oid in groups[component])
+            for component, result in results.items()
+        }
+
+
+def _check_repository(refs: RefReader) -> typing.Optional[int]:
+    """
+    Ensures the repository can be read in-process and returns the configured abbrev
+    """
+    if refs.config.get("extensions.objectformat", "sha1").lower() != "sha1":
+        raise ObjectError("only sha1 repositories are supported")
+
+    configured = refs.config.get("core.abbrev", "auto")
+    if configured.isdigit():
+        return int(configured)
+
+    return None
+
+
+def describe_head(
+    refs: RefReader, component: typing.Optional[str] = None
+) -> typing.Tuple[typing.Optional[str], typing.Optional[str]]:
+    """
+    Describes HEAD in-process
+
+    Args:
+        refs: reader for the repository
+        component: only consider the tags of this monorepo component
+
+    Returns:
+        tuple of the `--tags --always` and `--exact-match` output, both None without commits
+    """
+    abbrev = _check_repository(refs)
+
+    head = refs.head()
+    if head is None:
+        return None, None
+
+    describer = Describer(refs, abbrev=abbrev, component=component)
+    try:
+        return describer.describe(head), describer.exact_match(head)
+    except (KeyError, IndexError, ValueError) as exc:
+        raise ObjectError("unable to describe {}: {}".format(head, exc))
+
+
+def describe_head_components(
+    refs: RefReader, components: typing.Optional[typing.Collection[str]] = None
+) -> typing.Dict[str, typing.Tuple[str, bool]]:
+    """
+    Describes HEAD in-process against every component's tags
+
+    Args:
+        refs: reader for the repository
+        components: only describe these components
+
+    Returns:
+        mapping of component to its describe output and whether HEAD is tagged
+    """
+    abbrev = _check_repository(refs)
+
+    head = refs.head()
+    if head is None:
+        return {}
+
+    describer = Describer(refs, abbrev=abbrev)
+    try:
+        return describer.describe_components(head, components=components)
+    except (KeyError, IndexError, ValueError) as exc:
+        raise ObjectError("unable to describe {}: {}".format(head, exc))
@@ -1,27 +1,90 @@
 """
 tagversion Entrypoints
 """
+
+import importlib
 import logging
 import os
 import sys
 
 from tagversion.argparse import ArgumentParser
-from tagversion.git import GitVersion
-from tagversion.write import WriteFile
 
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "warning")
 
+DEFAULT_SUBCOMMAND = "version"
+
+# subcommand name -> (module, class, help); only the module of the subcommand being
+# run is imported, so printing the version does not load everything else
+SUBCOMMANDS = {
+    "version": ("tagversion.git", "GitVersion", "Get and set git version tag"),
+    "write": ("tagversion.write", "WriteFile", "Write version into files"),
+    "changed": (
+        "tagversion.changed",
+        "ChangedComponents",
+        "List monorepo components changed since their latest tag",
+    ),
+    "serve": (
+        "tagversion.serve",
+        "ServeVersion",
+        "Answer version queries from a daemon",
+    ),
+    "scan": (
+        "tagversion.scan",
+        "ScanRepositories",
+        "Print the version of every repository under a directory",
+    ),
+    "at": ("tagversion.at", "VersionsAt", "Print the version of each given commit"),
+    "contains": (
+        "tagversion.contains",
+        "ContainingVersions",
+        "List the versions whose history contains a commit",
+    ),
+    "list": (
+        "tagversion.listing",
+        "ListVersions",
+        "List the version tags matching a constraint, ordered by version",
+    ),
+}
+
+
+def get_subcommand(argv) -> str:
+    """
+    Returns the subcommand named on the command line, `version` when there is none
+
+    Only the first argument can name it, e.g. `list` in `list --latest` but not the
+    message in `--bump -m list`; the global help is the only option before it.
+    """
+    for arg in argv:
+        if arg in ("-h", "--help"):
+            continue
+
+        return arg if arg in SUBCOMMANDS else DEFAULT_SUBCOMMAND
+
+    return DEFAULT_SUBCOMMAND
+
+
+def get_subcommand_class(name: str):
+    module_name, class_name, _ = SUBCOMMANDS[name]
+
+    return getattr(importlib.import_module(module_name), class_name)
+
 
 def main():
     logging.basicConfig(level=getattr(logging, LOG_LEVEL.upper()))
 
+    selected = get_subcommand(sys.argv[1:])
+
     parser = ArgumentParser()
     subcommand = parser.add_subparsers(dest="subcommand")
 
-    GitVersion.setup_subparser(subcommand)
-    WriteFile.setup_subparser(subcommand)
+    # the arguments of the other subcommands are only needed for their own help
+    for name, (_, _, help_s) in SUBCOMMANDS.items():
+        if name == selected:
+            get_subcommand_class(name).setup_subparser(subcommand)
+        else:
+            subcommand.add_parser(name, help=help_s)
 
-    args = parser.parse_args(default_subparser="version")
+    args = parser.parse_args(default_subparser=DEFAULT_SUBCOMMAND)
 
     command = args.cls(args)
     sys.exit(command.run())
@@ -2,9 +2,37 @@ class BranchError(Exception):
     pass
 
 
+class CommitIndexError(Exception):
+    pass
+
+
+class ComponentError(Exception):
+    pass
+
+
+class GitError(Exception):
+    """
+    Raised when git fails, `returncode` is its exit status when it ran
+    """
+
+    def __init__(self, message: str, returncode: int = None, stderr: str = ""):
+        super().__init__(message)
+
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+class ObjectError(Exception):
+    pass
+
+
 class PrereleaseError(Exception):
     pass
 
 
+class RefError(Exception):
+    pass
+
+
 class VersionError(Exception):
     pass
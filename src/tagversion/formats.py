@@ -0,0 +1,169 @@
+"""
+Output formats of the version subcommand
+
+`--format` takes a comma-separated list of built-in formats and templates, e.g.
+`default,docker,short={major}.{minor}`; every format is rendered from the same
+version and printed one per line or as environment variables.
+"""
+import re
+import shlex
+import string
+import typing
+
+from .exceptions import VersionError
+from .version import VERSION_FIELDS, Version
+
+BUILTIN_FORMATS = ("default", "docker", "json", "sugar")
+
+OUTPUT_TEXT = "text"
+OUTPUT_ENV = "env"
+OUTPUT_EXPORT = "export"
+OUTPUTS = (OUTPUT_TEXT, OUTPUT_ENV, OUTPUT_EXPORT)
+
+# environment variables are named after the format, e.g. TAG_VERSION_DOCKER
+ENV_PREFIX = "TAG_VERSION_"
+
+CONVERSIONS = {"a": ascii, "r": repr, "s": str}
+
+NAMED_FORMAT_RE = re.compile(r"^(?P<name>[A-Za-z_]\w*)=(?P<template>.*)$", re.DOTALL)
+
+
+class OutputFormat(object):
+    """
+    A built-in format or a template such as `{major}.{minor}` parsed once
+
+    Args:
+        name: the name of the format, used for the environment variable
+        template: the template to render, None for the built-in format of this name
+    """
+
+    def __init__(self, name: str, template: str = None):
+        self.name = name
+        self.template = template
+
+        self.parts = None
+        if template is not None:
+            self.parts = self._compile(template)
+        elif name not in BUILTIN_FORMATS:
+            raise VersionError(
+                "unknown format {}, use one of {} or a template such as {{major}}.{{minor}}".format(
+                    name, ", ".join(BUILTIN_FORMATS)
+                )
+            )
+
+    def __repr__(self):
+        return "<OutputFormat {} {!r}>".format(self.name, self.template)
+
+    @staticmethod
+    def _compile(template: str) -> typing.List[typing.Tuple]:
+        try:
+            parsed = list(string.Formatter().parse(template))
+        except ValueError as exc:
+            raise VersionError("invalid template {}: {}".format(template, exc))
+
+        parts = []
+        for literal, field, spec, conversion in parsed:
+            if field is not None and field not in VERSION_FIELDS:
+                raise VersionError(
+                    "unknown field {{{}}} in template {}, use one of {}".format(
+                        field, template, ", ".join(VERSION_FIELDS)
+                    )
+                )
+
+            parts.append((literal, field, spec, conversion))
+
+        return parts
+
+    @property
+    def env_name(self) -> str:
+        return ENV_PREFIX + re.sub(r"\W", "_", self.name).upper()
+
+    def render(self, version: Version, args: object = None) -> str:
+        if self.parts is None:
+            return version.stringify(format=self.name, args=args)
+
+        rendered = []
+        for literal, field, spec, conversion in self.parts:
+            rendered.append(literal)
+            if field is None:
+                continue
+
+            value = getattr(version, field)
+            if value is None:
+                value = ""
+            elif conversion:
+                value = CONVERSIONS[conversion](value)
+
+            rendered.append(format(value, spec))
+
+        return "".join(rendered)
+
+
+def split_formats(value: str) -> typing.List[str]:
+    """
+    Splits the comma-separated formats, ignoring commas within a template's braces
+    """
+    items = [""]
+    depth = 0
+    for char in value:
+        if char == "," and not depth:
+            items.append("")
+            continue
+
+        if char == "{":
+            depth += 1
+        elif char == "}" and depth:
+            depth -= 1
+
+        items[-1] += char
+
+    return [x for x in items if x]
+
+
+def parse_formats(value: str) -> typing.List[OutputFormat]:
+    """
+    Returns the formats given to `--format`
+
+    Templates are named with `name=template`, otherwise they are numbered in the
+    order given, e.g. `template1`.
+    """
+    formats = []
+    templates = 0
+    for item in split_formats(value):
+        matches = NAMED_FORMAT_RE.match(item)
+        if matches:
+            formats.append(
+                OutputFormat(matches.group("name"), matches.group("template"))
+            )
+        elif "{" in item:
+            templates += 1
+            formats.append(OutputFormat("template{}".format(templates), item))
+        else:
+            formats.append(OutputFormat(item))
+
+    if not formats:
+        raise VersionError("no format given")
+
+    return formats
+
+
+def format_output(
+    rendered: typing.List[typing.Tuple[OutputFormat, str]], output: str = OUTPUT_TEXT
+) -> str:
+    """
+    Returns the rendered formats one per line, as plain values or variables
+
+    `env` lines are suitable for an env file, e.g. `docker run --env-file`, and
+    `export` lines may be evaluated by a shell.
+    """
+    if output == OUTPUT_ENV:
+        lines = ["{}={}".format(x.env_name, value) for x, value in rendered]
+    elif output == OUTPUT_EXPORT:
+        lines = [
+            "export {}={}".format(x.env_name, shlex.quote(value))
+            for x, value in rendered
+        ]
+    else:
+        lines = [value for _, value in rendered]
+
+    return "\n".join(lines)
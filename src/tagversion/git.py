@@ -6,23 +6,34 @@ import logging
 import os
 import re
 import typing
-import sh
-import shlex
 
 import sys
 
-from .exceptions import BranchError, VersionError
+from .cache import VersionCache
+from .exceptions import BranchError, RefError, VersionError
+from .formats import OUTPUT_TEXT, OUTPUTS, OutputFormat, format_output, parse_formats
+from .refs import RefReader
+from .runner import get_runner
+from .snapshot import (
+    DESCRIBE_GIT,
+    STATUS_LIMIT,
+    RepoSnapshot,
+    add_describe_argument,
+    clean_branch,
+    describe_components,
+    get_branch,
+    list_tags,
+)
 from .version import Version
 
+if typing.TYPE_CHECKING:
+    from .tagindex import TagIndex
+
 # TODO: this implementation and its dependents should go away in favor of the version module.
 RC_RE = re.compile(r"(?P<full_version>(?P<stable>.*)rc(?P<rc_number>\d+)).*")
 
 INITIAL_VERSION = Version.parse("0.0.0")
 
-MAJOR = 0
-MINOR = 1
-PATCH = 2
-
 
 def print_error(buf):
     print(buf, file=sys.stderr)
@@ -53,54 +64,138 @@ class GitVersion(object):
     def __init__(self, args=None):
         self.args = args
 
+        self._formats = None
+        self._refs = None
+        self._snapshot = None
+        self._tag_index = None
+        self._version = None
+
     @property
     def logger(self):
         return logging.getLogger("{}.{}".format(__name__, self.__class__.__name__))
 
+    @property
+    def formats(self) -> typing.List[OutputFormat]:
+        """
+        Returns the formats to print the version in, parsed once
+        """
+        if self._formats is None:
+            self._formats = parse_formats(self.args.format)
+
+        return self._formats
+
+    @property
+    def refs(self) -> typing.Optional[RefReader]:
+        """
+        Returns the in-process ref reader, None when git has to be used instead
+        """
+        if self._refs is None:
+            try:
+                self._refs = RefReader()
+            except RefError as exc:
+                self.logger.debug("ref reader unavailable, using git: %s", exc)
+                self._refs = False
+
+        return self._refs or None
+
+    @property
+    def cache(self) -> typing.Optional[VersionCache]:
+        """
+        Returns the on-disk describe cache unless it was disabled with --no-cache
+        """
+        refs = self.refs
+        if refs is None or not getattr(self.args, "cache", True):
+            return None
+
+        return VersionCache(refs)
+
+    @property
+    def snapshot(self) -> RepoSnapshot:
+        """
+        Returns the repository state, gathering it on first access
+        """
+        if self._snapshot is None:
+            self._snapshot = RepoSnapshot.collect(
+                branch=getattr(self.args, "branch", True),
+                refs=self.refs,
+                engine=getattr(self.args, "describe", DESCRIBE_GIT),
+                cache=self.cache,
+                component=getattr(self.args, "component", None),
+                status=self.will_tag,
+                concurrent=getattr(self.args, "concurrent", True),
+            )
+
+        return self._snapshot
+
+    @property
+    def will_tag(self) -> bool:
+        """
+        Returns whether this invocation creates a tag and must check the working copy
+        """
+        if getattr(self.args, "force", False) is True:
+            return False
+
+        return getattr(self.args, "bump", False) is True or isinstance(
+            getattr(self.args, "set", None), str
+        )
+
+    @property
+    def tag_index(self) -> "TagIndex":
+        """
+        Returns the repository's tags ordered by version, built on first access
+        """
+        if self._tag_index is None:
+            from .tagindex import TagIndex
+
+            self._tag_index = TagIndex(list_tags(refs=self.refs))
+
+        return self._tag_index
+
     @property
     def branch(self):
-        branch = os.environ.get("GIT_BRANCH")
+        branch = self.snapshot.branch
         if branch is None:
-            command = sh.git(*shlex.split("rev-parse --abbrev-ref HEAD"))
-            lines = command.strip().splitlines()
-            branch = lines[0].strip()
-
-            # clean out control characters that may be present in `git` command output
-            color_marker_idx = branch.find("\x1b")
-            if color_marker_idx >= 0:
-                self.logger.warning(
-                    "found color marker in branch={}".format(branch.encode("utf8"))
-                )
-                branch = branch[:color_marker_idx]
+            branch = get_branch(refs=self.refs)
 
-        # clean string to remove unwanted characters
-        branch = branch.replace("/", "--")
-
-        return branch
+        return clean_branch(branch)
 
     def get_git_tag_version(self) -> typing.Optional[str]:
-        version_s = None
+        snapshot = self.snapshot
 
-        is_tagged = True  # when the commit is directly tagged
-        try:
-            command = sh.git(*shlex.split("describe --tags --exact-match"))
-        except sh.ErrorReturnCode_128:  # pylint: disable=E1101
-            is_tagged = False
+        version_s = snapshot.describe
 
-        try:
-            command = sh.git(*shlex.split("describe --tags --always"))
-        except sh.ErrorReturnCode_128:  # pylint: disable=E1101
-            pass
-        else:
-            version_s = command.strip()
+        # if the branch flag was given,
+        # check to see if we are on a tagged commit
+        if version_s and self.args.branch and not snapshot.is_tagged:
+            # this commit is not tagged directly, so append the branch
+            version_s = "{}-{}".format(version_s, self.branch)
 
-            # if the branch flag was given,
-            # check to see if we are on a tagged commit
+        return version_s
+
+    def get_component_versions(self) -> typing.Dict[str, "Version"]:
+        """
+        Returns the current version of every monorepo component
+        """
+        components = describe_components(
+            refs=self.refs,
+            engine=getattr(self.args, "describe", DESCRIBE_GIT),
+            concurrent=getattr(self.args, "concurrent", True),
+        )
+
+        versions = {}
+        for component, (version_s, is_tagged) in sorted(components.items()):
             if self.args.branch and not is_tagged:
-                # this commit is not tagged directly, so append the branch
                 version_s = "{}-{}".format(version_s, self.branch)
 
-        return version_s
+            version = Version.parse(version_s)
+
+            build = getattr(self.args, "build", None)
+            if build:
+                version.build = build
+
+            versions[component] = version
+
+        return versions
 
     @property
     def is_clean(self):
@@ -112,20 +207,16 @@ class GitVersion(object):
         Returns:
             Boolean whether the working copy is clean
         """
-        result = False
-
-        command_l = "git status --untracked --short".split()
-        command = getattr(sh, command_l[0])(command_l[1:])
+        self._snapshot = self.snapshot.with_status()
 
-        lines = command.splitlines()
-        for line in lines:
-            line = line.rstrip()
+        lines = self._snapshot.status
+        for line in lines[:STATUS_LIMIT]:
             print_error("{}".format(line))
 
-        if not lines:
-            result = True
+        if len(lines) > STATUS_LIMIT:
+            print_error("(only the first {} changes are shown)".format(STATUS_LIMIT))
 
-        return result
+        return not lines
 
     @property
     def is_calver(self):
@@ -143,15 +234,21 @@ class GitVersion(object):
 
     @property
     def version(self):
-        version = None
+        """
+        Returns the current version; parsed once and copied so callers may modify it
+        """
+        if self._version is None:
+            version_s = self.get_git_tag_version()
+            if not version_s:
+                return None
 
-        version_s = self.get_git_tag_version()
-        if version_s:
-            version = Version.parse(version_s)
+            self._version = Version.parse(version_s)
 
-            build = getattr(self.args, "build", None)
-            if build:
-                version.build = build
+        version = self._version.copy()
+
+        build = getattr(self.args, "build", None)
+        if build:
+            version.build = build
 
         return version
 
@@ -165,6 +262,15 @@ class GitVersion(object):
             action="store",
             help="pass along a build number to integrate to the output format",
         )
+        parser.add_argument(
+            "--all-components",
+            action="store_true",
+            help="print a JSON map of every monorepo component to its current version",
+        )
+        parser.add_argument(
+            "--component",
+            help="only consider tags of this monorepo component, e.g. `api` for `api/1.2.3`",
+        )
         parser.add_argument(
             "--bump",
             action="store_true",
@@ -177,6 +283,24 @@ class GitVersion(object):
             default=True,
             help="when printing out the version display the prefix",
         )
+        parser.add_argument(
+            "--no-cache",
+            action="store_false",
+            dest="cache",
+            help="always recompute the version instead of reusing a cached result",
+        )
+        parser.add_argument(
+            "--no-concurrency",
+            action="store_false",
+            dest="concurrent",
+            help="run git queries one at a time instead of at the same time",
+        )
+        parser.add_argument(
+            "--daemon",
+            action="store_true",
+            help="ask a running `tag-version serve` for the version, computing it here when none answers",
+        )
+        add_describe_argument(parser)
         parser.add_argument(
             "-f",
             "--force",
@@ -187,7 +311,17 @@ class GitVersion(object):
             "--format",
             action="store",
             default="default",
-            help="print version as a specific format (currently supports 'default', 'docker', 'json', and 'sugar')",
+            help=(
+                "print version as a specific format (currently supports 'default', 'docker', "
+                "'json', and 'sugar') or a template such as '{major}.{minor}'; separate "
+                "several formats with commas and name templates with 'name=template'"
+            ),
+        )
+        parser.add_argument(
+            "--output",
+            choices=OUTPUTS,
+            default=OUTPUT_TEXT,
+            help="print one version per line, or as TAG_VERSION_<FORMAT> lines of an env file or shell exports",
         )
         parser.add_argument(
             "--patch",
@@ -245,15 +379,7 @@ class GitVersion(object):
             help="do not append branch to the version when current commit is not tagged",
         )
 
-    def get_split_version(self, version):
-        """Split the provided version and int'ify major, minor, and patch"""
-        split_version = version.split("-", 1)[0].split(".", 3)
-        for i in range(3):
-            split_version[i] = int(split_version[i])
-
-        return split_version
-
-    def get_next_calver_version(self, version):
+    def get_next_calver_version(self, version) -> "Version":
         # split the current date
         now = datetime.now().strftime(self.args.calver_format)
         split_calver = now.split(".", 2)
@@ -275,23 +401,31 @@ class GitVersion(object):
                 If you want to override this use `--set --force` instead
                 """
             )
-        elif self.args.patch:
+        component = getattr(self.args, "component", None)
+
+        if self.args.patch:
             # if there are existing tags from today, bump the patch on the last one
             # otherwise move to the new date
-            todays_tags = sh.git(*shlex.split(f"tag --list {now}*"))
+            last_tag = self.tag_index.latest_calver(now, prefix=component)
 
-            if todays_tags:
-                last_tag = sorted(todays_tags.split("\n"))[-1]
-                last_tag_split = self.get_split_version(last_tag)
+            if last_tag:
+                patch = last_tag.patch
+                if not last_tag.is_rc:
+                    patch += 1
 
-                if not is_rc(last_tag):
-                    last_tag_split[PATCH] += 1
-
-                split_calver.append(last_tag_split[PATCH])
+                split_calver.append(patch)
             else:
                 split_calver.append(0)
 
-        return split_calver[:3]
+        major, minor, patch = (split_calver + [0])[:3]
+
+        return Version(
+            major=major,
+            minor=minor,
+            patch=patch,
+            prefix=component,
+            prefix_separator="/" if component else None,
+        )
 
     @staticmethod
     def get_next_rc_version(version):
@@ -326,6 +460,12 @@ class GitVersion(object):
             if current_version.is_unreleased:
                 self.logger.info("No tags found, bumping initial version")
                 next_version = INITIAL_VERSION.copy()
+
+                # the first version of a component carries its prefix
+                component = getattr(self.args, "component", None)
+                if component:
+                    next_version.prefix = component
+                    next_version.prefix_separator = "/"
             else:
                 next_version = current_version.copy()
 
@@ -363,21 +503,102 @@ class GitVersion(object):
 
         return Version.parse(self.args.set)
 
-    def get_tag_command(self, new_version):
-        tag_command = "git tag -a "
+    def get_tag_args(self, new_version: str) -> typing.List[str]:
+        """
+        Returns the git arguments creating an annotated tag for the new version
+        """
+        tag_args = ["tag", "-a"]
 
         if self.args.message:
-            tag_command += "-m {} ".format(json.dumps(self.args.message))
+            tag_args += ["-m", self.args.message]
+
+        return tag_args + [new_version]
+
+    def print_component_versions(self) -> int:
+        """
+        Prints the current version of every monorepo component as a JSON object
+        """
+        output = {}
+        for component, version in self.get_component_versions().items():
+            rendered = {}
+            for output_format, version_s in self.stringify_all(version):
+                if output_format.name == "json" and output_format.template is None:
+                    version_s = json.loads(version_s)
+
+                rendered[output_format.name] = version_s
+
+            # a single format maps each component to its version directly
+            output[component] = (
+                rendered if len(rendered) > 1 else next(iter(rendered.values()))
+            )
 
-        tag_command += new_version
-        return tag_command
+        print(json.dumps(output))
+
+        return 0
+
+    def print_daemon_version(self) -> bool:
+        """
+        Prints the version answered by a running daemon, returns False without one
+
+        Only plain queries are sent, tagging and checks on the version run here.
+        """
+        args = self.args
+        if args.bump or args.set or args.rc or args.semver or args.calver:
+            return False
+
+        # only imported when asked for, like the socket modules it needs
+        from .client import get_socket_path, query
+
+        request = {
+            "format": args.format,
+            "output": getattr(args, "output", OUTPUT_TEXT),
+            "component": args.component,
+            "branch": args.branch,
+            # the daemon's environment is not the client's
+            "branch_name": os.environ.get("GIT_BRANCH"),
+            "build": args.build,
+            "prefix": args.prefix,
+            "prefix_separator": args.prefix_separator,
+            "display_prefix": args.display_prefix,
+        }
+
+        try:
+            response = query(get_socket_path(), request)
+        except (OSError, ValueError, RefError) as exc:
+            self.logger.debug("no daemon: %s", exc)
+            return False
+
+        # errors are reported the same way as without a daemon
+        if "output" not in response:
+            return False
+
+        print(response["output"])
+
+        return True
+
+    def print_version(self, version: "Version") -> None:
+        """
+        Prints the version in every requested format
+        """
+        output = getattr(self.args, "output", OUTPUT_TEXT)
+
+        print(format_output(self.stringify_all(version), output=output))
 
     def run(self):
-        if not self.is_clean and not self.args.force:
-            print_error("Abort: working copy not clean.")
+        try:
+            self.formats
+        except VersionError as exc:
+            print_error(exc)
 
             return 1
 
+        if getattr(self.args, "all_components", False):
+            return self.print_component_versions()
+
+        daemon = getattr(self.args, "daemon", False) is True
+        if daemon and self.print_daemon_version():
+            return 0
+
         current_version = self.version
 
         # check to see if an explicit version is being set
@@ -397,7 +618,7 @@ class GitVersion(object):
             # when a previous tag exists in the repo, something will be returned,
             # but nothing if there are no previous tags
             if current_version:
-                print(self.stringify(current_version))
+                self.print_version(current_version)
             else:
                 # error out with next steps on how to set the version
                 next_version = self.bump(version=INITIAL_VERSION)
@@ -411,11 +632,24 @@ class GitVersion(object):
         elif new_version is None:
             return 1
         else:
+            # only checked when a tag is about to be created
+            if not self.args.force and not self.is_clean:
+                print_error("Abort: working copy not clean.")
+
+                return 1
+
             version_str = self.stringify(new_version)
-            tag_command = self.get_tag_command(version_str)
-            os.system(tag_command)
 
-            print(version_str)
+            # attached to the terminal so git can open an editor for the message
+            if get_runner().run_interactive(*self.get_tag_args(version_str)):
+                print_error("Abort: unable to tag {}".format(version_str))
+
+                return 1
+
+            # HEAD now carries the new tag, which the checks below look at
+            self._version = new_version.copy()
+
+            self.print_version(new_version)
 
         if self.args.rc:
             if not self.is_rc:
@@ -431,13 +665,31 @@ class GitVersion(object):
 
         return status
 
-    def stringify(self, new_version: "Version", format=None):
-        format = format or self.args.format
-
-        # customize the version object as specified by the arguments passed to the command
+    def customize(self, new_version: "Version") -> None:
+        """
+        Customizes the version object as specified by the arguments passed to the command
+        """
         for attr in ("prefix", "prefix_separator"):
             value = getattr(self.args, attr)
             if value:
                 setattr(new_version, attr, value)
 
-        return new_version.stringify(format=format, args=self.args)
+    def stringify(self, new_version: "Version", format=None):
+        """
+        Returns the version in the given format, by default the first one requested
+        """
+        output_format = OutputFormat(format) if format else self.formats[0]
+
+        self.customize(new_version)
+
+        return output_format.render(new_version, args=self.args)
+
+    def stringify_all(
+        self, new_version: "Version"
+    ) -> typing.List[typing.Tuple[OutputFormat, str]]:
+        """
+        Returns the version rendered in every requested format
+        """
+        self.customize(new_version)
+
+        return [(x, x.render(new_version, args=self.args)) for x in self.formats]
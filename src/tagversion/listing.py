@@ -0,0 +1,151 @@
+"""
+Version tags matching a constraint, e.g. the highest `api` release `>=1.4,<2`
+
+The tags are read with one scan of the refs and sorted by version once, and the
+tags matching the constraint are found by bisecting and printed as they are read
+from the index.
+"""
+import logging
+import typing
+
+from .constraints import VersionRange
+from .describe import COMPONENT_SEPARATOR
+from .exceptions import RefError, VersionError
+from .git import print_error
+from .refs import RefReader
+from .snapshot import list_tags
+from .tagindex import ListedTag, index_listed
+
+KIND_RELEASES = "releases"
+KIND_PRERELEASES = "prereleases"
+KIND_RC = "rc"
+
+KINDS = {
+    KIND_RELEASES: lambda x: not x.prerelease,
+    KIND_PRERELEASES: lambda x: bool(x.prerelease),
+    KIND_RC: lambda x: x.prerelease.startswith("rc"),
+}
+
+
+class ListVersions(object):
+    """
+    List the version tags matching a constraint, ordered by version
+    """
+
+    def __init__(self, args):
+        self.args = args
+
+    @property
+    def logger(self):
+        return logging.getLogger("{}.{}".format(__name__, self.__class__.__name__))
+
+    @classmethod
+    def setup_subparser(cls, subcommand):
+        parser = subcommand.add_parser("list", help=cls.__doc__)
+
+        parser.set_defaults(cls=cls)
+        parser.add_argument(
+            "--component",
+            help="list the versions of this monorepo component, e.g. api for api/1.2.3",
+        )
+        parser.add_argument(
+            "--all-components",
+            action="store_true",
+            help="list the versions of every component, after the unprefixed ones",
+        )
+
+        kinds = parser.add_mutually_exclusive_group()
+        kinds.add_argument(
+            "--releases",
+            action="store_const",
+            const=KIND_RELEASES,
+            dest="kind",
+            help="only list releases, leaving out prereleases",
+        )
+        kinds.add_argument(
+            "--prereleases",
+            action="store_const",
+            const=KIND_PRERELEASES,
+            dest="kind",
+            help="only list prereleases",
+        )
+        kinds.add_argument(
+            "--rc",
+            action="store_const",
+            const=KIND_RC,
+            dest="kind",
+            help="only list release candidates",
+        )
+
+        parser.add_argument(
+            "--latest",
+            action="store_true",
+            help="only print the highest matching version of each component",
+        )
+        parser.add_argument(
+            "constraint",
+            nargs="?",
+            default="",
+            help="comma separated clauses such as >=1.4,<2 or ==3.2.*; operators are ==, !=, >=, <=, >, <, ~= and ^",
+        )
+
+    def get_tag_names(self) -> typing.Iterable[str]:
+        """
+        Returns the tag names, only reading the component's refs when one is given
+        """
+        prefix = ""
+        if self.args.component:
+            prefix = self.args.component + COMPONENT_SEPARATOR
+
+        try:
+            return RefReader().tag_refs(prefix).keys()
+        except RefError as exc:
+            self.logger.debug("falling back to git: %s", exc)
+
+        return list_tags(prefix + "*" if prefix else None)
+
+    def iter_tags(self, version_range: VersionRange) -> typing.Iterator[ListedTag]:
+        """
+        Yields the matching tags of each component in order
+        """
+        keep = KINDS.get(self.args.kind)
+        index = index_listed(self.get_tag_names(), keep=keep)
+
+        if self.args.component:
+            prefixes = [self.args.component]
+        elif getattr(self.args, "all_components", False) is True:
+            prefixes = sorted(index)
+        else:
+            prefixes = [""]
+
+        latest = getattr(self.args, "latest", False) is True
+        for prefix in prefixes:
+            tags = index.get(prefix)
+            if tags is None:
+                continue
+
+            # the highest tag first, so the latest is the first that matches
+            matching = (
+                x
+                for x in tags.between(
+                    version_range.low, version_range.high, reverse=latest
+                )
+                if version_range.matches(x.key)
+            )
+            if latest:
+                matching = [x for x in [next(matching, None)] if x is not None]
+
+            yield from matching
+
+    def run(self):
+        try:
+            version_range = VersionRange(self.args.constraint or "")
+        except VersionError as exc:
+            print_error(exc)
+
+            return 1
+
+        for tag in self.iter_tags(version_range):
+            print(tag.name)
+
+        return 0
@@ -0,0 +1,561 @@
+"""
+Reads git objects directly from the object database
+
+Supports loose objects, version 2 pack indexes with OFS/REF deltas, alternates,
+shallow clones and the commit-graph file.  Only what is needed to walk history
+is implemented; anything else raises ObjectError so callers can fall back to git.
+"""
+import binascii
+import collections
+import glob
+import mmap
+import os
+import struct
+import typing
+import zlib
+
+from .commitgraph import load_commit_graph
+from .exceptions import ObjectError
+
+OBJ_COMMIT = 1
+OBJ_TREE = 2
+OBJ_BLOB = 3
+OBJ_TAG = 4
+OBJ_OFS_DELTA = 6
+OBJ_REF_DELTA = 7
+
+TYPE_NAMES = {
+    OBJ_COMMIT: b"commit",
+    OBJ_TREE: b"tree",
+    OBJ_BLOB: b"blob",
+    OBJ_TAG: b"tag",
+}
+TYPE_IDS = {v: k for k, v in TYPE_NAMES.items()}
+
+IDX_MAGIC = b"\377tOc"
+OID_SIZE = 20
+HEX_SIZE = OID_SIZE * 2
+
+# git never abbreviates object names below this length
+MIN_ABBREV = 4
+FALLBACK_DEFAULT_ABBREV = 7
+
+# number of resolved delta bases kept in memory
+DELTA_BASE_CACHE_SIZE = 256
+
+# commits kept parsed, bounds memory when describing many commits in one process
+COMMIT_CACHE_SIZE = 1 << 18
+
+
+class CommitInfo(typing.NamedTuple):
+    date: int
+    parents: typing.Tuple[str, ...]
+    # topological level from the commit-graph, None when the graph does not cover it
+    generation: typing.Optional[int] = None
+
+
+class TagInfo(typing.NamedTuple):
+    target: str
+    target_type: int
+    date: int
+
+
+def parse_commit(data: bytes) -> CommitInfo:
+    """
+    Extracts the parents and committer date from a raw commit
+    """
+    parents = []
+    date = 0
+
+    for line in data.split(b"\n"):
+        if not line:
+            break
+
+        if line.startswith(b"parent "):
+            parents.append(line[7:].decode("ascii"))
+        elif line.startswith(b"committer "):
+            date = _parse_signature_date(line)
+
+    return CommitInfo(date=date, parents=tuple(parents))
+
+
+def parse_tag(data: bytes) -> TagInfo:
+    """
+    Extracts the target and tagger date from a raw annotated tag
+    """
+    target = None
+    target_type = None
+    date = 0
+
+    for line in data.split(b"\n"):
+        if not line:
+            break
+
+        if line.startswith(b"object "):
+            target = line[7:].decode("ascii")
+        elif line.startswith(b"type "):
+            target_type = TYPE_IDS.get(line[5:])
+        elif line.startswith(b"tagger "):
+            date = _parse_signature_date(line)
+
+    if target is None or target_type is None:
+        raise ObjectError("malformed tag object")
+
+    return TagInfo(target=target, target_type=target_type, date=date)
+
+
+def _parse_signature_date(line: bytes) -> int:
+    # `<name> <<email>> <timestamp> <tz>`, names may contain spaces
+    try:
+        return int(line[line.rindex(b">") + 1 :].split()[0])
+    except (ValueError, IndexError):
+        return 0
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    """
+    Applies a git delta to the base object data
+    """
+    pos = 0
+
+    def read_size(pos):
+        size = shift = 0
+        while True:
+            byte = delta[pos]
+            pos += 1
+            size |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                return size, pos
+
+    base_size, pos = read_size(pos)
+    if base_size != len(base):
+        raise ObjectError("delta base size mismatch")
+
+    target_size, pos = read_size(pos)
+
+    out = bytearray()
+    delta_len = len(delta)
+    while pos < delta_len:
+        cmd = delta[pos]
+        pos += 1
+        if cmd & 0x80:
+            offset = size = 0
+            for i in range(4):
+                if cmd & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if cmd & (1 << (4 + i)):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            if size == 0:
+                size = 0x10000
+            out += base[offset : offset + size]
+        elif cmd:
+            out += delta[pos : pos + cmd]
+            pos += cmd
+        else:
+            raise ObjectError("invalid delta opcode")
+
+    if len(out) != target_size:
+        raise ObjectError("delta target size mismatch")
+
+    return bytes(out)
+
+
+class PackIndex(object):
+    """
+    Memory mapped version 2 pack index
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(path, "rb") as fh:
+            self._data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._data[:4] != IDX_MAGIC or struct.unpack(">I", self._data[4:8])[0] != 2:
+            raise ObjectError("unsupported pack index {}".format(path))
+
+        self.fanout = struct.unpack(">256I", self._data[8 : 8 + 256 * 4])
+        self.count = self.fanout[255]
+
+        self._oids_offset = 8 + 256 * 4
+        self._offsets_offset = self._oids_offset + self.count * (OID_SIZE + 4)
+        self._large_offsets_offset = self._offsets_offset + self.count * 4
+
+    def oid_at(self, index: int) -> bytes:
+        start = self._oids_offset + index * OID_SIZE
+        return self._data[start : start + OID_SIZE]
+
+    def _range(self, first_byte: int) -> typing.Tuple[int, int]:
+        low = self.fanout[first_byte - 1] if first_byte else 0
+        return low, self.fanout[first_byte]
+
+    def find(self, oid: bytes) -> typing.Optional[int]:
+        """
+        Returns the position of the given binary oid in the index
+        """
+        low, high = self._range(oid[0])
+        while low < high:
+            mid = (low + high) // 2
+            current = self.oid_at(mid)
+            if current < oid:
+                low = mid + 1
+            elif current > oid:
+                high = mid
+            else:
+                return mid
+
+        return None
+
+    def lower_bound(self, oid: bytes) -> int:
+        """
+        Returns the position at which the given binary oid would be inserted
+        """
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self.oid_at(mid) < oid:
+                low = mid + 1
+            else:
+                high = mid
+
+        return low
+
+    def offset_at(self, index: int) -> int:
+        start = self._offsets_offset + index * 4
+        offset = struct.unpack(">I", self._data[start : start + 4])[0]
+        if offset & 0x80000000:
+            start = self._large_offsets_offset + (offset & 0x7FFFFFFF) * 8
+            offset = struct.unpack(">Q", self._data[start : start + 8])[0]
+
+        return offset
+
+
+class Pack(object):
+    """
+    A packfile along with its index
+    """
+
+    def __init__(self, idx_path: str):
+        self.index = PackIndex(idx_path)
+        self.path = idx_path[: -len(".idx")] + ".pack"
+
+        with open(self.path, "rb") as fh:
+            self._data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _read_header(self, offset: int) -> typing.Tuple[int, int, int]:
+        data = self._data
+        byte = data[offset]
+        offset += 1
+
+        obj_type = (byte >> 4) & 0x7
+        size = byte & 0x0F
+        shift = 4
+        while byte & 0x80:
+            byte = data[offset]
+            offset += 1
+            size |= (byte & 0x7F) << shift
+            shift += 7
+
+        return obj_type, size, offset
+
+    def _inflate(self, offset: int, size: int) -> bytes:
+        decompressor = zlib.decompressobj()
+        chunk = max(size * 2, 4096)
+
+        out = b""
+        while len(out) < size and not decompressor.eof:
+            out += decompressor.decompress(self._data[offset : offset + chunk])
+            offset += chunk
+            if offset >= len(self._data) and not decompressor.eof:
+                raise ObjectError("truncated object in {}".format(self.path))
+
+        return out
+
+    def type_at(self, offset: int, store: "ObjectStore") -> int:
+        """
+        Returns the type of the object at the given offset, resolving deltas
+        """
+        obj_type, _size, pos = self._read_header(offset)
+        while obj_type in (OBJ_OFS_DELTA, OBJ_REF_DELTA):
+            if obj_type == OBJ_OFS_DELTA:
+                offset = self._ofs_delta_base(offset, pos)
+                obj_type, _size, pos = self._read_header(offset)
+            else:
+                base_oid = binascii.hexlify(self._data[pos : pos + OID_SIZE])
+                return store.read_type(base_oid.decode("ascii"))
+
+        return obj_type
+
+    def _ofs_delta_base(self, offset: int, pos: int) -> int:
+        data = self._data
+        byte = data[pos]
+        pos += 1
+        base = byte & 0x7F
+        while byte & 0x80:
+            byte = data[pos]
+            pos += 1
+            base = ((base + 1) << 7) | (byte & 0x7F)
+
+        return offset - base
+
+    def read_at(self, offset: int, store: "ObjectStore") -> typing.Tuple[int, bytes]:
+        """
+        Returns the type and content of the object at the given offset
+        """
+        cached = store._delta_cache.get((self.path, offset))
+        if cached is not None:
+            return cached
+
+        obj_type, size, pos = self._read_header(offset)
+        if obj_type == OBJ_OFS_DELTA:
+            base_type, base = self.read_at(self._ofs_delta_base(offset, pos), store)
+            while self._data[pos] & 0x80:
+                pos += 1
+            result = base_type, apply_delta(base, self._inflate(pos + 1, size))
+        elif obj_type == OBJ_REF_DELTA:
+            base_oid = binascii.hexlify(self._data[pos : pos + OID_SIZE])
+            base_type, base = store.read(base_oid.decode("ascii"))
+            result = base_type, apply_delta(base, self._inflate(pos + OID_SIZE, size))
+        elif obj_type in TYPE_NAMES:
+            result = obj_type, self._inflate(pos, size)
+        else:
+            raise ObjectError("invalid object type {} in {}".format(obj_type, self.path))
+
+        store._delta_cache[(self.path, offset)] = result
+        if len(store._delta_cache) > DELTA_BASE_CACHE_SIZE:
+            store._delta_cache.popitem(last=False)
+
+        return result
+
+
+class ObjectStore(object):
+    """
+    Read-only access to the objects of a repository
+    """
+
+    def __init__(self, objects_dir: str, shallow: typing.Iterable[str] = ()):
+        self.objects_dirs = [objects_dir] + list(read_alternates(objects_dir))
+        self.shallow = frozenset(shallow)
+
+        self.packs = []
+        for directory in self.objects_dirs:
+            for idx_path in sorted(glob.glob(os.path.join(directory, "pack", "*.idx"))):
+                if os.path.exists(idx_path[: -len(".idx")] + ".pack"):
+                    self.packs.append(Pack(idx_path))
+
+        # git ignores the commit-graph in shallow clones since parents are rewritten
+        self.commit_graph = None
+        if not self.shallow:
+            self.commit_graph = load_commit_graph(objects_dir)
+
+        self._commits = collections.OrderedDict()
+        self._delta_cache = collections.OrderedDict()
+
+    @classmethod
+    def from_git_dir(cls, common_dir: str) -> "ObjectStore":
+        """
+        Returns the object store of the repository at the given common git directory
+        """
+        if os.path.isdir(os.path.join(common_dir, "refs", "replace")) and os.listdir(
+            os.path.join(common_dir, "refs", "replace")
+        ):
+            raise ObjectError("replace refs are not supported")
+
+        if os.path.exists(os.path.join(common_dir, "info", "grafts")):
+            raise ObjectError("grafts are not supported")
+
+        shallow = ()
+        shallow_path = os.path.join(common_dir, "shallow")
+        if os.path.exists(shallow_path):
+            with open(shallow_path, "r") as fh:
+                shallow = fh.read().split()
+
+        return cls(os.path.join(common_dir, "objects"), shallow=shallow)
+
+    def _find_packed(self, oid: str) -> typing.Optional[typing.Tuple[Pack, int]]:
+        binary = binascii.unhexlify(oid)
+        for pack in self.packs:
+            index = pack.index.find(binary)
+            if index is not None:
+                return pack, pack.index.offset_at(index)
+
+        return None
+
+    def _loose_path(self, oid: str) -> typing.Optional[str]:
+        for directory in self.objects_dirs:
+            path = os.path.join(directory, oid[:2], oid[2:])
+            if os.path.exists(path):
+                return path
+
+        return None
+
+    def _read_loose(self, path: str) -> typing.Tuple[int, bytes]:
+        with open(path, "rb") as fh:
+            raw = zlib.decompress(fh.read())
+
+        header, _, data = raw.partition(b"\0")
+        type_name, _, _size = header.partition(b" ")
+        if type_name not in TYPE_IDS:
+            raise ObjectError("invalid loose object {}".format(path))
+
+        return TYPE_IDS[type_name], data
+
+    def read(self, oid: str) -> typing.Tuple[int, bytes]:
+        """
+        Returns the type and content of the given object
+        """
+        packed = self._find_packed(oid)
+        if packed is not None:
+            pack, offset = packed
+            return pack.read_at(offset, self)
+
+        path = self._loose_path(oid)
+        if path is not None:
+            return self._read_loose(path)
+
+        raise ObjectError("object {} not found".format(oid))
+
+    def read_type(self, oid: str) -> int:
+        """
+        Returns the type of the given object without inflating packed content
+        """
+        if self.commit_graph is not None and self.commit_graph.contains(oid):
+            return OBJ_COMMIT
+
+        packed = self._find_packed(oid)
+        if packed is not None:
+            pack, offset = packed
+            return pack.type_at(offset, self)
+
+        return self.read(oid)[0]
+
+    def read_commit(self, oid: str) -> CommitInfo:
+        """
+        Returns the parents and date of the given commit
+        """
+        commit = self._commits.get(oid)
+        if commit is not None:
+            return commit
+
+        graph_commit = None
+        if self.commit_graph is not None:
+            graph_commit = self.commit_graph.read_commit(oid)
+
+        if graph_commit is not None:
+            commit = CommitInfo(
+                date=graph_commit.date,
+                parents=graph_commit.parents,
+                generation=graph_commit.generation,
+            )
+        else:
+            obj_type, data = self.read(oid)
+            if obj_type != OBJ_COMMIT:
+                raise ObjectError("object {} is not a commit".format(oid))
+
+            commit = parse_commit(data)
+
+        if oid in self.shallow:
+            commit = commit._replace(parents=())
+
+        self._commits[oid] = commit
+        if len(self._commits) > COMMIT_CACHE_SIZE:
+            self._commits.popitem(last=False)
+
+        return commit
+
+    def read_tag(self, oid: str) -> TagInfo:
+        obj_type, data = self.read(oid)
+        if obj_type != OBJ_TAG:
+            raise ObjectError("object {} is not a tag".format(oid))
+
+        return parse_tag(data)
+
+    def peel(self, oid: str) -> typing.Tuple[str, int, typing.Optional[TagInfo]]:
+        """
+        Follows annotated tags down to the object they point to
+
+        Returns:
+            tuple of the peeled oid, its type and the outermost tag or None
+        """
+        obj_type = self.read_type(oid)
+
+        tag = None
+        while obj_type == OBJ_TAG:
+            info = self.read_tag(oid)
+            tag = tag or info
+            oid, obj_type = info.target, info.target_type
+
+        return oid, obj_type, tag
+
+    @property
+    def approximate_object_count(self) -> int:
+        return sum(x.index.count for x in self.packs)
+
+    def default_abbrev(self, abbrev: typing.Optional[int] = None) -> int:
+        """
+        Returns the abbreviation length git uses, scaled by the number of objects
+        """
+        if abbrev is not None:
+            return max(abbrev, MIN_ABBREV)
+
+        count = self.approximate_object_count
+        length = count.bit_length() if count else 1
+        length = (length + 1) // 2
+
+        return max(length, FALLBACK_DEFAULT_ABBREV)
+
+    def abbreviate(self, oid: str, abbrev: typing.Optional[int] = None) -> str:
+        """
+        Returns the shortest unambiguous prefix of the given oid like `git rev-parse --short`
+        """
+        length = self.default_abbrev(abbrev)
+        binary = binascii.unhexlify(oid)
+
+        for pack in self.packs:
+            position = pack.index.lower_bound(binary)
+            for neighbor in (position - 1, position, position + 1):
+                if 0 <= neighbor < pack.index.count:
+                    other = binascii.hexlify(pack.index.oid_at(neighbor)).decode("ascii")
+                    if other != oid:
+                        length = max(length, _common_prefix(oid, other) + 1)
+
+        for directory in self.objects_dirs:
+            try:
+                names = os.listdir(os.path.join(directory, oid[:2]))
+            except FileNotFoundError:
+                continue
+
+            for name in names:
+                other = oid[:2] + name
+                if len(other) == HEX_SIZE and other != oid:
+                    length = max(length, _common_prefix(oid, other) + 1)
+
+        return oid[: min(length, HEX_SIZE)]
+
+
+def _common_prefix(left: str, right: str) -> int:
+    length = 0
+    for a, b in zip(left, right):
+        if a != b:
+            break
+        length += 1
+
+    return length
+
+
+def read_alternates(objects_dir: str) -> typing.Iterator[str]:
+    path = os.path.join(objects_dir, "info", "alternates")
+    try:
+        with open(path, "r") as fh:
+            lines = fh.read().splitlines()
+    except FileNotFoundError:
+        return
+
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield os.path.normpath(os.path.join(objects_dir, line))
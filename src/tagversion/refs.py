@@ -0,0 +1,303 @@
+"""
+Reads git refs directly from the repository files
+
+Looking up HEAD, the branch and the tag list only requires reading a handful of
+small files, which is much cheaper than forking the git binary.  Anything this
+reader does not understand raises RefError so callers can fall back to git.
+"""
+import fnmatch
+import os
+import typing
+
+from .exceptions import RefError
+
+HEAD_REF = "HEAD"
+SYMREF_PREFIX = "ref: "
+GITDIR_PREFIX = "gitdir: "
+HEADS_PREFIX = "refs/heads/"
+TAGS_PREFIX = "refs/tags/"
+
+# prefixes stripped by `git rev-parse --abbrev-ref`, most specific first
+ABBREV_PREFIXES = (HEADS_PREFIX, TAGS_PREFIX, "refs/remotes/", "refs/")
+
+# guard against symbolic refs pointing at each other
+MAX_SYMREF_DEPTH = 5
+
+
+class PackedRef(typing.NamedTuple):
+    oid: str
+    peeled: typing.Optional[str] = None
+
+
+def find_git_dir(path: str = ".") -> typing.Tuple[str, str]:
+    """
+    Locates the git directory for the given working copy path
+
+    Honors GIT_DIR and GIT_COMMON_DIR, `.git` files used by worktrees and
+    submodules, and the `commondir` file of linked worktrees.
+
+    Returns:
+        tuple of the git directory and the common directory holding shared refs
+    """
+    git_dir = os.environ.get("GIT_DIR")
+    if git_dir is None:
+        current = os.path.abspath(path)
+        while True:
+            candidate = os.path.join(current, ".git")
+            if os.path.isdir(candidate):
+                git_dir = candidate
+                break
+
+            if os.path.isfile(candidate):
+                git_dir = _read_gitdir_file(candidate)
+                break
+
+            parent = os.path.dirname(current)
+            if parent == current:
+                raise RefError("not a git repository: {}".format(path))
+
+            current = parent
+
+    common_dir = os.environ.get("GIT_COMMON_DIR")
+    if common_dir is None:
+        common_dir = git_dir
+
+        commondir_path = os.path.join(git_dir, "commondir")
+        if os.path.isfile(commondir_path):
+            with open(commondir_path, "r") as fh:
+                common_dir = os.path.join(git_dir, fh.read().strip())
+
+    return os.path.normpath(git_dir), os.path.normpath(common_dir)
+
+
+def _read_gitdir_file(path: str) -> str:
+    with open(path, "r") as fh:
+        content = fh.read().strip()
+
+    if not content.startswith(GITDIR_PREFIX):
+        raise RefError("invalid gitdir file: {}".format(path))
+
+    git_dir = content[len(GITDIR_PREFIX) :]
+
+    return os.path.join(os.path.dirname(path), git_dir)
+
+
+class RefReader(object):
+    """
+    Pure-Python access to HEAD, branches and tags
+    """
+
+    def __init__(self, path: str = "."):
+        self.git_dir, self.common_dir = find_git_dir(path)
+
+        self.config = read_config(os.path.join(self.common_dir, "config"))
+        if "extensions.refstorage" in self.config:
+            raise RefError("unsupported ref storage in {}".format(self.common_dir))
+
+        self._packed_refs = None
+
+    @property
+    def packed_refs(self) -> typing.Dict[str, PackedRef]:
+        """
+        Returns the contents of `packed-refs` keyed by ref name
+        """
+        if self._packed_refs is None:
+            self._packed_refs = read_packed_refs(
+                os.path.join(self.common_dir, "packed-refs")
+            )
+
+        return self._packed_refs
+
+    def _ref_dir(self, name: str) -> str:
+        # HEAD and pseudo refs are per worktree, everything under refs/ is shared
+        if name.startswith("refs/"):
+            return self.common_dir
+
+        return self.git_dir
+
+    def read_ref(self, name: str) -> typing.Optional[str]:
+        """
+        Returns the raw content of the given ref, either an oid or `ref: <name>`
+        """
+        path = os.path.join(self._ref_dir(name), name)
+        try:
+            with open(path, "r") as fh:
+                return fh.read().strip()
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            pass
+        except OSError as exc:
+            raise RefError("unable to read ref {}: {}".format(name, exc))
+
+        packed = self.packed_refs.get(name)
+        if packed:
+            return packed.oid
+
+        return None
+
+    def resolve(self, name: str) -> typing.Optional[str]:
+        """
+        Returns the oid the given ref points to, following symbolic refs
+        """
+        for _ in range(MAX_SYMREF_DEPTH):
+            content = self.read_ref(name)
+            if content is None:
+                return None
+
+            if not content.startswith(SYMREF_PREFIX):
+                return content
+
+            name = content[len(SYMREF_PREFIX) :]
+
+        raise RefError("too many levels of symbolic refs at {}".format(name))
+
+    def head(self) -> typing.Optional[str]:
+        """
+        Returns the oid HEAD points to, None in a repository without commits
+        """
+        return self.resolve(HEAD_REF)
+
+    def head_ref(self) -> typing.Optional[str]:
+        """
+        Returns the full ref name HEAD points to, None when HEAD is detached
+        """
+        content = self.read_ref(HEAD_REF)
+        if content is None:
+            raise RefError("HEAD not found in {}".format(self.git_dir))
+
+        if content.startswith(SYMREF_PREFIX):
+            return content[len(SYMREF_PREFIX) :]
+
+        return None
+
+    def branch(self) -> str:
+        """
+        Returns the same value as `git rev-parse --abbrev-ref HEAD`
+        """
+        ref = self.head_ref()
+        if ref is None:
+            return HEAD_REF
+
+        if self.resolve(ref) is None:
+            # git refuses to abbreviate an unborn branch
+            raise RefError("ambiguous argument 'HEAD': unborn branch {}".format(ref))
+
+        for prefix in ABBREV_PREFIXES:
+            if ref.startswith(prefix):
+                return ref[len(prefix) :]
+
+        return ref
+
+    def tag_refs(self, prefix: str = "") -> typing.Dict[str, PackedRef]:
+        """
+        Returns all tags keyed by tag name, loose refs overriding packed ones
+
+        Args:
+            prefix: only return tags under this path, e.g. `api/`, without
+                visiting the loose refs of any other directory
+        """
+        packed_prefix = TAGS_PREFIX + prefix
+
+        tags = {}
+        for name, ref in self.packed_refs.items():
+            if name.startswith(packed_prefix):
+                tags[name[len(TAGS_PREFIX) :]] = ref
+
+        tags_dir = os.path.join(self.common_dir, TAGS_PREFIX)
+        for root, _dirs, files in os.walk(os.path.join(tags_dir, prefix)):
+            for filename in files:
+                if filename.endswith(".lock"):
+                    continue
+
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, tags_dir).replace(os.sep, "/")
+                if not name.startswith(prefix):
+                    continue
+
+                oid = self.resolve(TAGS_PREFIX + name)
+                if oid is not None:
+                    tags[name] = PackedRef(oid)
+
+        return tags
+
+    def tags(self, pattern: str = None) -> typing.List[str]:
+        """
+        Returns the sorted tag names, optionally filtered like `git tag --list <pattern>`
+        """
+        names = self.tag_refs().keys()
+        if pattern:
+            names = (x for x in names if fnmatch.fnmatchcase(x, pattern))
+
+        return sorted(names)
+
+
+def read_packed_refs(path: str) -> typing.Dict[str, PackedRef]:
+    """
+    Parses a `packed-refs` file, including the peeled `^<oid>` lines
+    """
+    refs = {}
+
+    try:
+        fh = open(path, "r")
+    except FileNotFoundError:
+        return refs
+    except OSError as exc:
+        raise RefError("unable to read {}: {}".format(path, exc))
+
+    with fh:
+        name = None
+        for line in fh:
+            line = line.rstrip("\n")
+            if not line or line.startswith("#"):
+                continue
+
+            if line.startswith("^"):
+                if name is None:
+                    raise RefError("peeled line without a ref in {}".format(path))
+
+                refs[name] = refs[name]._replace(peeled=line[1:])
+                continue
+
+            try:
+                oid, name = line.split(" ", 1)
+            except ValueError:
+                raise RefError("invalid packed-refs line: {}".format(line))
+
+            refs[name] = PackedRef(oid)
+
+    return refs
+
+
+def read_config(path: str) -> typing.Dict[str, str]:
+    """
+    Parses the simple `[section]` / `key = value` subset of a git config file
+
+    Keys are lower-cased `section.key` names; subsections and includes are ignored.
+    """
+    config = {}
+
+    try:
+        with open(path, "r") as fh:
+            lines = fh.read().splitlines()
+    except OSError as exc:
+        raise RefError("unable to read {}: {}".format(path, exc))
+
+    section = None
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] in "#;":
+            continue
+
+        if line.startswith("["):
+            header = line[1 : line.find("]")].strip()
+            section = None if " " in header or "\"" in header else header.lower()
+            continue
+
+        if section is None:
+            continue
+
+        key, separator, value = line.partition("=")
+        config["{}.{}".format(section, key.strip().lower())] = (
+            value.strip() if separator else "true"
+        )
+
+    return config
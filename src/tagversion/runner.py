@@ -0,0 +1,386 @@
+"""
+Runs git with subprocess
+
+One-off commands start a git process per call, while object lookups go through a
+`git cat-file --batch-check` process that is started on first use and kept alive
+for the rest of the invocation.  Every call is timed; the timings are logged at
+debug level and kept in `GitRunner.calls`.
+"""
+import atexit
+import collections
+import contextlib
+import contextvars
+import logging
+import os
+import subprocess
+import threading
+import time
+import typing
+
+from .exceptions import GitError
+
+BATCH_CHECK = "--batch-check"
+
+# the number of call timings kept by a runner
+MAX_CALLS = 1000
+
+# the number of threads running the calls given to gather(), the caller's included
+MAX_GATHER_THREADS = 4
+
+
+def _timed_out(args: typing.Tuple[str, ...]) -> GitError:
+    return GitError("git {} timed out".format(" ".join(args)))
+
+
+def _error(args: typing.Tuple[str, ...], returncode: int, stderr: str) -> GitError:
+    message = "git {} exited with status {}".format(" ".join(args), returncode)
+    if stderr.strip():
+        message = "{}: {}".format(message, stderr.strip())
+
+    return GitError(message, returncode=returncode, stderr=stderr)
+
+
+class GitCall(typing.NamedTuple):
+    args: typing.Tuple[str, ...]
+    seconds: float
+
+
+class ObjectHeader(typing.NamedTuple):
+    oid: str
+    type: str
+    size: int
+
+
+class BatchProcess(object):
+    """
+    A `git cat-file` process answering one object lookup per line of input
+    """
+
+    def __init__(self, args: typing.List[str], cwd: typing.Optional[str]):
+        self.process = subprocess.Popen(
+            args,
+            cwd=cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.lock = threading.Lock()
+
+    def lookup(self, name: str) -> typing.Optional[ObjectHeader]:
+        """
+        Writes the object name and returns the header of the reply, None when missing
+
+        The caller must hold the lock.
+        """
+        if "\n" in name:
+            raise GitError("invalid object name {!r}".format(name))
+
+        self.process.stdin.write(name.encode("utf8") + b"\n")
+        self.process.stdin.flush()
+
+        header = self.process.stdout.readline()
+        if not header:
+            raise GitError("git cat-file exited unexpectedly")
+
+        parts = header.decode("utf8").split()
+        if len(parts) != 3:
+            # `<name> missing` or `<name> ambiguous`
+            return None
+
+        oid, type_name, size = parts
+
+        return ObjectHeader(oid=oid, type=type_name, size=int(size))
+
+    def close(self) -> None:
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait()
+
+        self.process.stdout.close()
+
+
+class GitRunner(object):
+    """
+    Runs git commands in the given directory, the current directory by default
+
+    Args:
+        cwd: the directory to run git in
+        executable: the git executable
+        deadline: `time.monotonic()` value after which running commands are stopped
+    """
+
+    def __init__(
+        self,
+        cwd: typing.Optional[str] = None,
+        executable: str = "git",
+        deadline: typing.Optional[float] = None,
+    ):
+        self.cwd = cwd
+        self.executable = executable
+        self.deadline = deadline
+
+        self.calls = collections.deque(maxlen=MAX_CALLS)
+
+        self._batches = {}
+        self._batches_lock = threading.Lock()
+
+    @property
+    def logger(self):
+        return logging.getLogger("{}.{}".format(__name__, self.__class__.__name__))
+
+    def _record(self, args: typing.Tuple[str, ...], start: float) -> None:
+        seconds = time.perf_counter() - start
+        self.calls.append(GitCall(args=args, seconds=seconds))
+
+        self.logger.debug("git %s took %.1f ms", " ".join(args), seconds * 1000)
+
+    def _timeout(self, args: typing.Tuple[str, ...]) -> typing.Optional[float]:
+        """
+        Returns the seconds left before the deadline, None without a deadline
+        """
+        if self.deadline is None:
+            return None
+
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise _timed_out(args)
+
+        return remaining
+
+    def run(self, *args: str) -> str:
+        """
+        Returns the output of the git command
+
+        Raises:
+            GitError: when git exits with a non-zero status or runs past the deadline
+        """
+        start = time.perf_counter()
+        try:
+            process = subprocess.run(
+                [self.executable] + list(args),
+                cwd=self.cwd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                encoding="utf8",
+                timeout=self._timeout(args),
+            )
+        except subprocess.TimeoutExpired:
+            raise _timed_out(args)
+        finally:
+            self._record(args, start)
+
+        if process.returncode:
+            raise _error(args, process.returncode, process.stderr)
+
+        return process.stdout
+
+    def run_interactive(self, *args: str) -> int:
+        """
+        Runs the git command attached to the terminal, e.g. to edit a tag message
+
+        Returns:
+            the exit status of git
+        """
+        start = time.perf_counter()
+        try:
+            return subprocess.call([self.executable] + list(args), cwd=self.cwd)
+        finally:
+            self._record(args, start)
+
+    def iter_lines(self, *args: str) -> typing.Iterator[str]:
+        """
+        Streams the output of the git command line by line
+
+        git is stopped when the iterator is closed before the output is exhausted.
+
+        Raises:
+            GitError: when git exits with a non-zero status or runs past the deadline
+        """
+        start = time.perf_counter()
+        timeout = self._timeout(args)
+        process = subprocess.Popen(
+            [self.executable] + list(args),
+            cwd=self.cwd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            encoding="utf8",
+        )
+
+        # killing git ends the output, so a stalled read returns at the deadline
+        timer = None
+        if timeout is not None:
+            timer = threading.Timer(timeout, process.kill)
+            timer.daemon = True
+            timer.start()
+
+        try:
+            for line in process.stdout:
+                yield line.rstrip("\n")
+
+            stderr = process.stderr.read()
+            if process.wait():
+                if self.deadline is not None and time.monotonic() >= self.deadline:
+                    raise _timed_out(args)
+
+                raise _error(args, process.returncode, stderr)
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+            process.stdout.close()
+            process.stderr.close()
+
+            self._record(args, start)
+
+    def _batch(self, option: str) -> BatchProcess:
+        # keyed on where git would look for the repository, so a shared runner
+        # follows the caller across directories
+        key = (
+            option,
+            os.path.abspath(self.cwd or os.getcwd()),
+            os.environ.get("GIT_DIR"),
+        )
+
+        with self._batches_lock:
+            batch = self._batches.get(key)
+            if batch is None or batch.process.poll() is not None:
+                batch = BatchProcess(
+                    [self.executable, "cat-file", option], cwd=self.cwd
+                )
+                self._batches[key] = batch
+
+        return batch
+
+    def check_object(self, name: str) -> typing.Optional[ObjectHeader]:
+        """
+        Returns the id, type and size of the named object, None when it does not exist
+
+        Args:
+            name: an object id or any revision, e.g. `v1.0.0^{commit}`
+        """
+        start = time.perf_counter()
+
+        batch = self._batch(BATCH_CHECK)
+        try:
+            with batch.lock:
+                return batch.lookup(name)
+        finally:
+            self._record(("cat-file", BATCH_CHECK, name), start)
+
+    def close(self) -> None:
+        """
+        Stops the batch processes
+        """
+        with self._batches_lock:
+            batches = list(self._batches.values())
+            self._batches.clear()
+
+        for batch in batches:
+            batch.close()
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+# set by use_runner() to run git somewhere other than the current directory
+_current_runner = contextvars.ContextVar("current_runner", default=None)
+
+
+def get_runner() -> GitRunner:
+    """
+    Returns the runner selected with use_runner(), otherwise the one shared by
+    every git call of this process
+    """
+    global _runner
+
+    current = _current_runner.get()
+    if current is not None:
+        return current
+
+    with _runner_lock:
+        if _runner is None:
+            _runner = GitRunner()
+            atexit.register(_runner.close)
+
+    return _runner
+
+
+@contextlib.contextmanager
+def use_runner(runner: GitRunner) -> typing.Iterator[GitRunner]:
+    """
+    Makes get_runner() return the given runner within the block
+
+    The selection applies to the current thread and to the calls made by gather().
+    """
+    token = _current_runner.set(runner)
+    try:
+        yield runner
+    finally:
+        _current_runner.reset(token)
+
+
+def gather(
+    *calls: typing.Callable[[], typing.Any], concurrent: bool = True
+) -> typing.List[typing.Any]:
+    """
+    Returns the results of the calls, run in threads so their git processes overlap
+
+    The first call runs in the calling thread, which then shares the others with
+    the threads started here, MAX_GATHER_THREADS in all.  An exception raised by
+    any call is raised once all of them have finished.
+
+    Args:
+        calls: functions taking no arguments
+        concurrent: run the calls one after the other when False
+    """
+    if not concurrent or len(calls) < 2:
+        return [call() for call in calls]
+
+    results = [None] * len(calls)
+    errors = [None] * len(calls)
+
+    def target(index, call):
+        try:
+            results[index] = call()
+        except BaseException as exc:  # pylint: disable=W0703
+            errors[index] = exc
+
+    # the calls after the first are taken by whichever thread is free
+    pending = collections.deque(enumerate(calls[1:], 1))
+
+    def work():
+        while True:
+            try:
+                index, call = pending.popleft()
+            except IndexError:
+                return
+
+            target(index, call)
+
+    # each thread runs in a copy of the caller's context so use_runner() applies
+    threads = [
+        threading.Thread(
+            target=contextvars.copy_context().run, args=(work,), daemon=True
+        )
+        for _ in range(min(len(calls), MAX_GATHER_THREADS) - 1)
+    ]
+    for thread in threads:
+        thread.start()
+
+    target(0, calls[0])
+    work()
+
+    for thread in threads:
+        thread.join()
+
+    for error in errors:
+        if error is not None:
+            raise error
+
+    return results
@@ -0,0 +1,144 @@
+"""
+Versions of every repository checked out under a directory
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import json
+import logging
+import os
+import typing
+
+from .api import VersionOptions, get_version
+from .exceptions import GitError, RefError, VersionError
+from .formats import parse_formats
+from .git import print_error
+from .snapshot import add_describe_argument
+
+
+def find_repositories(directory: str, submodules: bool = False) -> typing.Iterator[str]:
+    """
+    Yields the working copies under the directory, including the directory itself
+
+    Args:
+        directory: the directory to search
+        submodules: also look inside working copies, e.g. for submodules
+    """
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+
+        # `.git` is a file in submodules and linked worktrees
+        if ".git" in dirs or ".git" in files:
+            yield root
+
+            if not submodules:
+                dirs[:] = []
+
+        if ".git" in dirs:
+            dirs.remove(".git")
+
+
+def scan_repository(path: str, fmt: str, options: VersionOptions) -> dict:
+    """
+    Returns the path of the repository with its version or the reason there is none
+    """
+    try:
+        return {"path": path, "version": get_version(path, fmt=fmt, options=options)}
+    except (GitError, OSError, RefError, VersionError) as exc:
+        # e.g. an unreadable repository or git missing, reported without ending the scan
+        return {"path": path, "version": None, "error": str(exc)}
+
+
+class ScanRepositories(object):
+    """
+    Print the version of every repository under a directory
+    """
+
+    def __init__(self, args):
+        self.args = args
+
+    @property
+    def logger(self):
+        return logging.getLogger("{}.{}".format(__name__, self.__class__.__name__))
+
+    @classmethod
+    def setup_subparser(cls, subcommand):
+        parser = subcommand.add_parser("scan", help=cls.__doc__)
+
+        parser.set_defaults(cls=cls)
+        parser.add_argument(
+            "--format",
+            default="default",
+            help="the format or template to print each version in, e.g. docker or {major}.{minor}",
+        )
+        parser.add_argument(
+            "--no-branch",
+            action="store_false",
+            dest="branch",
+            help="do not append branch to the version when current commit is not tagged",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_false",
+            dest="cache",
+            help="always recompute the version instead of reusing a cached result",
+        )
+        add_describe_argument(parser)
+        parser.add_argument(
+            "--submodules",
+            action="store_true",
+            help="also scan repositories nested in other ones, such as submodules",
+        )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=None,
+            help="number of repositories to scan at once, default is the CPU count",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=None,
+            help="seconds after which a repository's git commands are stopped; the native and index describe engines run in-process and are not bounded by it",
+        )
+        parser.add_argument(
+            "directory",
+            nargs="?",
+            default=".",
+            help="the directory to search for repositories, default is the current one",
+        )
+
+    def run(self):
+        if not os.path.isdir(self.args.directory):
+            print_error("{} is not a directory".format(self.args.directory))
+
+            return 1
+
+        try:
+            parse_formats(self.args.format)
+        except VersionError as exc:
+            print_error(exc)
+
+            return 1
+
+        options = VersionOptions(
+            branch=self.args.branch,
+            describe=self.args.describe,
+            cache=self.args.cache,
+            timeout=self.args.timeout,
+        )
+
+        paths = find_repositories(self.args.directory, submodules=self.args.submodules)
+
+        # one JSON object per line, printed as soon as each repository is done
+        with ProcessPoolExecutor(max_workers=self.args.jobs) as executor:
+            futures = [
+                executor.submit(scan_repository, path, self.args.format, options)
+                for path in paths
+            ]
+            self.logger.debug("scanning %d repositories", len(futures))
+
+            for future in as_completed(futures):
+                print(json.dumps(future.result()), flush=True)
+
+        return 0
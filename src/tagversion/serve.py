@@ -0,0 +1,226 @@
+"""
+Daemon answering version queries over a Unix socket
+
+Responses are kept in memory until the watcher sees HEAD, a branch or a tag
+change, so a query costs a socket round trip rather than a Python start-up and
+several git processes.
+"""
+import json
+import logging
+import os
+import signal
+import socketserver
+import sys
+import threading
+
+from .api import VersionOptions, get_version_info
+from .client import get_socket_path, query
+from .exceptions import GitError, RefError, VersionError
+from .formats import OUTPUT_TEXT, format_output, parse_formats
+from .git import print_error
+from .snapshot import add_describe_argument
+from .watch import get_watcher
+
+# request fields passed on to VersionOptions
+REQUEST_OPTIONS = (
+    "branch",
+    "branch_name",
+    "build",
+    "prefix",
+    "prefix_separator",
+    "display_prefix",
+)
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """
+    Answers each line of JSON sent by a client with a line of JSON
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line.decode("utf8"))
+            except ValueError:
+                request = None
+
+            if isinstance(request, dict):
+                response = self.server.answer(request)
+            else:
+                response = {"error": "a request is a JSON object on a single line"}
+
+            self.wfile.write(json.dumps(response).encode("utf8") + b"\n")
+            self.wfile.flush()
+
+
+class VersionServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Serves the version of the repository at path
+
+    Args:
+        socket_path: the Unix socket to listen on
+        path: a directory within the working copy
+        options: defaults for the options a request does not set
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, socket_path: str, path: str = ".", options: VersionOptions = None
+    ):
+        self.path = path
+        self.options = options or VersionOptions()
+        self.watcher = get_watcher(path)
+
+        self._responses = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        super().__init__(socket_path, RequestHandler)
+
+    @property
+    def logger(self):
+        return logging.getLogger("{}.{}".format(__name__, self.__class__.__name__))
+
+    def refresh(self) -> int:
+        """
+        Forgets every response when the refs changed, returns the current generation
+        """
+        with self._lock:
+            if self.watcher.changed():
+                self.logger.debug(
+                    "refs changed, forgetting %d responses", len(self._responses)
+                )
+
+                self._responses.clear()
+                self._generation += 1
+
+            return self._generation
+
+    def answer(self, request: dict) -> dict:
+        key = json.dumps(request, sort_keys=True)
+        generation = self.refresh()
+
+        with self._lock:
+            response = self._responses.get(key)
+
+        if response is None:
+            response = self.compute(request)
+
+            # a response computed while the refs changed is not kept
+            with self._lock:
+                if generation == self._generation:
+                    self._responses[key] = response
+
+        return response
+
+    def compute(self, request: dict) -> dict:
+        try:
+            formats = parse_formats(request.get("format") or "default")
+
+            options = self.options._replace(
+                **{x: request[x] for x in REQUEST_OPTIONS if request.get(x) is not None}
+            )
+
+            version = get_version_info(
+                self.path, component=request.get("component"), options=options
+            )
+            if version is None:
+                raise VersionError("no version found")
+
+            rendered = [(x, x.render(version, args=options)) for x in formats]
+            output = format_output(rendered, output=request.get("output", OUTPUT_TEXT))
+        except (GitError, RefError, VersionError) as exc:
+            return {"error": str(exc)}
+
+        return {"output": output}
+
+    def server_close(self):
+        super().server_close()
+
+        self.watcher.close()
+
+
+def _terminate(signum, frame):
+    sys.exit(0)
+
+
+def is_listening(socket_path: str) -> bool:
+    """
+    Returns whether a daemon answers on the socket
+    """
+    try:
+        query(socket_path, {}, timeout=1)
+    except (OSError, ValueError):
+        return False
+
+    return True
+
+
+class ServeVersion(object):
+    """
+    Answer version queries from a daemon
+    """
+
+    def __init__(self, args):
+        self.args = args
+
+    @property
+    def logger(self):
+        return logging.getLogger("{}.{}".format(__name__, self.__class__.__name__))
+
+    @classmethod
+    def setup_subparser(cls, subcommand):
+        parser = subcommand.add_parser("serve", help=cls.__doc__)
+
+        parser.set_defaults(cls=cls)
+        parser.add_argument(
+            "--socket",
+            help="the Unix socket to listen on, default is $TAG_VERSION_SOCKET or .git/tag-version/serve.sock",
+        )
+        add_describe_argument(parser)
+
+    def run(self):
+        try:
+            socket_path = self.args.socket or get_socket_path()
+        except RefError as exc:
+            print_error(exc)
+
+            return 1
+
+        if os.path.exists(socket_path):
+            if is_listening(socket_path):
+                print_error("a daemon is already listening on {}".format(socket_path))
+
+                return 1
+
+            # left behind by a daemon that did not exit cleanly
+            os.unlink(socket_path)
+
+        options = VersionOptions(describe=self.args.describe)
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+            server = VersionServer(socket_path, options=options)
+        except OSError as exc:
+            print_error("unable to listen on {}: {}".format(socket_path, exc))
+
+            return 1
+
+        signal.signal(signal.SIGTERM, _terminate)
+
+        self.logger.info("listening on %s", socket_path)
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+            try:
+                os.unlink(socket_path)
+            except FileNotFoundError:
+                pass
+
+        return 0
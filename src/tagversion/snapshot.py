@@ -0,0 +1,381 @@
+"""
+Point-in-time view of the repository state used to compute a version
+"""
+import functools
+import logging
+import os
+import typing
+
+from .cache import CacheEntry, VersionCache
+from .exceptions import CommitIndexError, GitError, ObjectError, RefError
+from .refs import RefReader
+from .runner import gather, get_runner
+
+# the native describe engine is imported where it is used so the common
+# `tag-version` invocation does not pay for it at startup
+
+DESCRIBE_GIT = "git"
+DESCRIBE_NATIVE = "native"
+DESCRIBE_INDEX = "index"
+DESCRIBE_ENGINES = (DESCRIBE_GIT, DESCRIBE_NATIVE, DESCRIBE_INDEX)
+
+# the number of working copy changes kept to explain why it is not clean
+STATUS_LIMIT = 10
+
+
+def add_describe_argument(parser) -> None:
+    """
+    Adds the `--describe` option choosing one of DESCRIBE_ENGINES
+    """
+    parser.add_argument(
+        "--describe",
+        choices=DESCRIBE_ENGINES,
+        default=DESCRIBE_GIT,
+        help="how to find the nearest tag: run `git describe`, walk history in-process or use the commit index",
+    )
+
+
+class RepoSnapshot(typing.NamedTuple):
+    """
+    Immutable repository state gathered once per invocation
+
+    Attributes:
+        describe: output of `git describe --tags --always`, None when there are no commits
+        is_tagged: whether HEAD is directly tagged
+        branch: the raw branch name, None when it was not needed
+        status: the first lines of `git status --porcelain`, empty when the working
+            copy is clean and None until it is inspected
+    """
+
+    describe: typing.Optional[str]
+    is_tagged: bool
+    branch: typing.Optional[str] = None
+    status: typing.Optional[typing.Tuple[str, ...]] = None
+
+    @classmethod
+    def collect(
+        cls,
+        branch: bool = True,
+        refs: typing.Optional[RefReader] = None,
+        engine: str = DESCRIBE_GIT,
+        cache: typing.Optional[VersionCache] = None,
+        component: typing.Optional[str] = None,
+        status: bool = False,
+        concurrent: bool = True,
+        branch_name: typing.Optional[str] = None,
+    ) -> "RepoSnapshot":
+        """
+        Runs the git queries needed to describe HEAD
+
+        Args:
+            branch: look up the branch name when HEAD is not directly tagged
+            refs: reader used for ref lookups instead of the git binary
+            engine: `git` to run git describe, `native` to walk history in-process,
+                `index` to look HEAD up in the commit index
+            cache: previously computed results to reuse while HEAD and the tags are unchanged
+            component: only consider the tags of this monorepo component
+            status: also inspect the working copy, e.g. before creating a tag
+            concurrent: run the independent git queries at the same time
+            branch_name: the branch name to use instead of GIT_BRANCH
+        """
+        cache_key = None
+        if cache is not None:
+            options = {"component": component} if component else {}
+            cache_key = cache.key(**options)
+
+        def describe():
+            entry = cache.get(cache_key) if cache_key is not None else None
+            if entry is None:
+                entry = get_describe(
+                    refs=refs, engine=engine, component=component, concurrent=concurrent
+                )
+
+                if cache_key is not None:
+                    cache.put(cache_key, entry)
+
+            return entry
+
+        calls = [describe]
+        if status:
+            calls.append(get_status)
+
+        results = gather(*calls, concurrent=concurrent)
+
+        describe_s, exact_match = results[0]
+        status_lines = results[1] if status else None
+
+        is_tagged = exact_match is not None
+
+        found_branch = None
+        if branch and describe_s is not None and not is_tagged:
+            found_branch = get_branch(refs=refs, name=branch_name)
+
+        return cls(
+            describe=describe_s,
+            is_tagged=is_tagged,
+            branch=found_branch,
+            status=status_lines,
+        )
+
+    def with_status(self) -> "RepoSnapshot":
+        """
+        Returns a snapshot that includes the working copy status
+        """
+        if self.status is not None:
+            return self
+
+        return self._replace(status=get_status())
+
+
+def get_describe(
+    refs: typing.Optional[RefReader] = None,
+    engine: str = DESCRIBE_GIT,
+    component: typing.Optional[str] = None,
+    concurrent: bool = True,
+) -> CacheEntry:
+    """
+    Returns the `--tags --always` and `--exact-match` describe output for HEAD
+
+    Args:
+        refs: reader for the repository, required by the native engine
+        engine: `git` to run git describe, `native` to walk history in-process,
+            `index` to look HEAD up in the commit index
+        component: only consider the tags of this monorepo component
+        concurrent: run both git describe commands at the same time
+    """
+    if engine == DESCRIBE_NATIVE and refs is not None:
+        from .describe import describe_head
+
+        try:
+            return CacheEntry(*describe_head(refs, component=component))
+        except (ObjectError, RefError) as exc:
+            logging.getLogger(__name__).debug("falling back to git: %s", exc)
+
+    if engine == DESCRIBE_INDEX and refs is not None:
+        from .commitindex import describe_head_indexed
+
+        try:
+            return CacheEntry(*describe_head_indexed(refs, component=component))
+        except (CommitIndexError, ObjectError, RefError) as exc:
+            logging.getLogger(__name__).debug("falling back to git: %s", exc)
+
+    options = component_match_options(component) if component else ()
+
+    describe_s, exact_match = gather(
+        functools.partial(describe_tags, *options),
+        functools.partial(describe_exact_match, *options),
+        concurrent=concurrent,
+    )
+
+    return CacheEntry(describe=describe_s, exact_match=exact_match)
+
+
+def component_match_options(component: str) -> typing.Tuple[str, ...]:
+    """
+    Returns the git describe options that only match the given component's tags
+    """
+    return (
+        "--match",
+        "{}/*".format(component),
+        "--exclude",
+        "{}/*/*".format(component),
+    )
+
+
+def describe_components(
+    refs: typing.Optional[RefReader] = None,
+    engine: str = DESCRIBE_GIT,
+    components: typing.Optional[typing.Collection[str]] = None,
+    concurrent: bool = True,
+) -> typing.Dict[str, typing.Tuple[str, bool]]:
+    """
+    Describes HEAD against each monorepo component's tags
+
+    Tags are listed once and grouped by their prefix, e.g. `api/1.2.3` belongs to
+    the `api` component.  The native engine resolves every component in a single
+    walk of the history, git is run once per component otherwise.
+
+    Args:
+        refs: reader for the repository, required by the native engine
+        engine: `git` to run git describe, `native` to walk history in-process,
+            `index` to look HEAD up in the commit index
+        components: only describe these components, components without tags are left out
+        concurrent: run git for every component at the same time
+
+    Returns:
+        mapping of component to its describe output and whether HEAD is tagged
+    """
+    from .describe import describe_head_components, group_by_component
+
+    if engine == DESCRIBE_NATIVE and refs is not None:
+        try:
+            return describe_head_components(refs, components=components)
+        except (ObjectError, RefError) as exc:
+            logging.getLogger(__name__).debug("falling back to git: %s", exc)
+
+    if engine == DESCRIBE_INDEX and refs is not None:
+        from .commitindex import describe_head_components_indexed
+
+        try:
+            return describe_head_components_indexed(refs, components=components)
+        except (CommitIndexError, ObjectError, RefError) as exc:
+            logging.getLogger(__name__).debug("falling back to git: %s", exc)
+
+    grouped = sorted(group_by_component(list_tags(refs=refs)).items())
+    if components is not None:
+        grouped = [(x, tags) for x, tags in grouped if x in components]
+
+    described = gather(
+        *(
+            functools.partial(describe_tags, *component_match_options(x))
+            for x, _ in grouped
+        ),
+        concurrent=concurrent,
+    )
+
+    results = {}
+    for (component, tags), describe_s in zip(grouped, described):
+        if describe_s is None:
+            return {}
+
+        results[component] = (describe_s, describe_s in tags)
+
+    return results
+
+
+def describe_exact_match(*options: str) -> typing.Optional[str]:
+    """
+    Returns the tag pointing at HEAD or None
+
+    Args:
+        options: additional arguments for git describe, e.g. `--match`
+    """
+    try:
+        output = get_runner().run("describe", "--tags", "--exact-match", *options)
+    except GitError as exc:
+        if exc.returncode != 128:
+            raise
+
+        return None
+
+    return output.strip()
+
+
+def describe_tags(*options: str) -> typing.Optional[str]:
+    """
+    Returns `git describe --tags --always` output or None when there are no commits
+
+    Args:
+        options: additional arguments for git describe, e.g. `--match`
+    """
+    try:
+        output = get_runner().run("describe", "--tags", "--always", *options)
+    except GitError as exc:
+        if exc.returncode != 128:
+            raise
+
+        return None
+
+    return output.strip()
+
+
+def get_branch(
+    refs: typing.Optional[RefReader] = None, name: typing.Optional[str] = None
+) -> str:
+    """
+    Returns the branch name, preferring the GIT_BRANCH environment variable
+
+    Args:
+        refs: reader used to look at HEAD directly, git is used when it can't
+        name: used instead of GIT_BRANCH, e.g. the one a daemon's client was given
+    """
+    branch = name or os.environ.get("GIT_BRANCH")
+    if branch is None and refs is not None:
+        try:
+            branch = refs.branch()
+        except RefError as exc:
+            logging.getLogger(__name__).debug("falling back to git: %s", exc)
+
+    if branch is None:
+        output = get_runner().run("rev-parse", "--abbrev-ref", "HEAD")
+        lines = output.strip().splitlines()
+        branch = lines[0].strip()
+
+    return branch
+
+
+def clean_branch(branch: str) -> str:
+    """
+    Returns the branch name made suitable for a version, e.g. `feature--thing`
+
+    Args:
+        branch: the raw branch name, e.g. `feature/thing`
+    """
+    # clean out control characters that may be present in `git` command output
+    color_marker_idx = branch.find("\x1b")
+    if color_marker_idx >= 0:
+        logging.getLogger(__name__).warning(
+            "found color marker in branch={}".format(branch.encode("utf8"))
+        )
+        branch = branch[:color_marker_idx]
+
+    # clean string to remove unwanted characters
+    return branch.replace("/", "--")
+
+
+def read_lines(lines: typing.Iterator[str], limit: int) -> typing.Tuple[str, ...]:
+    """
+    Returns up to `limit` lines, closing the iterator to stop git early
+    """
+    try:
+        return tuple(line.rstrip() for line, _ in zip(lines, range(limit)))
+    finally:
+        lines.close()
+
+
+def get_status(limit: int = STATUS_LIMIT + 1) -> typing.Tuple[str, ...]:
+    """
+    Returns up to `limit` lines of `git status --porcelain`, none when the copy is clean
+
+    Tracked files are checked first with `git diff --quiet`, which stops at the
+    first change; untracked files are only looked for when those are clean.  git
+    status honors `status.showUntrackedFiles`, the untracked cache and fsmonitor
+    when they are configured, and is stopped once enough lines are read.
+
+    Args:
+        limit: the number of lines to read, by default one more than is shown
+    """
+    runner = get_runner()
+
+    options = ()
+    try:
+        runner.run("diff", "--quiet", "HEAD", "--")
+    except GitError as exc:
+        if exc.returncode == 1:
+            options = ("--untracked-files=no",)
+        elif exc.returncode != 128:
+            # 128 before the first commit, git status lists everything then
+            raise
+
+    return read_lines(runner.iter_lines("status", "--porcelain", *options), limit)
+
+
+def list_tags(
+    pattern: str = None, refs: typing.Optional[RefReader] = None
+) -> typing.List[str]:
+    """
+    Returns the sorted tag names matching the given pattern
+
+    Args:
+        pattern: glob pattern as given to `git tag --list`
+        refs: reader used to list tags directly, git is used when it can't
+    """
+    if refs is not None:
+        try:
+            return refs.tags(pattern)
+        except RefError as exc:
+            logging.getLogger(__name__).debug("falling back to git: %s", exc)
+
+    output = get_runner().run("tag", "--list", *([pattern] if pattern else []))
+
+    return [x for x in output.strip().splitlines() if x]
@@ -0,0 +1,290 @@
+"""
+Tags indexed by version precedence
+
+Every tag is parsed once and kept sorted per prefix so the latest release, the
+latest release candidate of a minor version or the latest calver tag of a day
+are found by bisecting rather than by sorting tag names as strings.
+"""
+import bisect
+import re
+import typing
+
+from .version import Version, parse_semver, precedence_key, prerelease_key
+
+# the common forms of version tags, e.g. `1.2.3`, `1.2.3rc1` or `1.2.3-beta.2`, parsed
+# without the general version parser; anything else is left to it
+SIMPLE_VERSION_RE = re.compile(
+    r"(0|[1-9][0-9]*)\.(0|[1-9][0-9]*)\.(0|[1-9][0-9]*)"
+    r"(?:-?([A-Za-z]+[0-9]*(?:\.(?:0|[1-9][0-9]*|[A-Za-z]+[0-9]*))*))?\Z"
+)
+
+# calendar versions as created by `--calver`, e.g. `201809.05.1` or `api/201809.05.2rc1`;
+# zero-padded days are not valid semantic versions, so these are parsed separately
+CALVER_RE = re.compile(
+    r"^(?:(?P<prefix>.*)/)?(?P<date>\d+\.\d+)\.(?P<patch>\d+)(?:-?(?P<prerelease>.+))?$"
+)
+
+
+class _Maximum(object):
+    """
+    Sorts after any other value, used to find the end of a range of keys
+    """
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+MAXIMUM = _Maximum()
+
+
+def version_key(version: Version) -> typing.Tuple:
+    """
+    Returns a sort key ordering versions by precedence
+
+    Releases sort after all of their prereleases, e.g. `1.0.0rc2` < `1.0.0rc10` < `1.0.0`.
+    """
+    return precedence_key(
+        version.major, version.minor, version.patch, version.prerelease
+    )
+
+
+class IndexedTag(typing.NamedTuple):
+    key: typing.Tuple
+    name: str
+    version: Version
+
+
+class ListedTag(typing.NamedTuple):
+    key: typing.Tuple
+    name: str
+    prerelease: str
+
+
+class CalverTag(typing.NamedTuple):
+    key: typing.Tuple
+    name: str
+    date: str
+    patch: int
+    prerelease: str
+
+    @property
+    def is_rc(self) -> bool:
+        return self.prerelease.startswith("rc")
+
+
+def calver_date(date: str) -> str:
+    """
+    Returns the date of a calendar version without leading zeros, e.g. `201809.5`
+
+    Tags written from a Version lose them, so `201809.05` and `201809.5` are the
+    same day.
+    """
+    return ".".join(str(int(x)) for x in date.split("."))
+
+
+def parse_calver(name: str) -> typing.Optional[CalverTag]:
+    """
+    Returns the parts of a calendar version tag, None when the tag is not one
+    """
+    matches = CALVER_RE.match(name)
+    if not matches:
+        return None
+
+    patch = int(matches.group("patch"))
+    prerelease = matches.group("prerelease") or ""
+    is_release = not prerelease
+
+    return CalverTag(
+        key=(
+            calver_date(matches.group("date")),
+            patch,
+            is_release,
+            () if is_release else prerelease_key(prerelease),
+        ),
+        name=name,
+        date=matches.group("date"),
+        patch=patch,
+        prerelease=prerelease,
+    )
+
+
+class SortedTags(object):
+    """
+    Tags sorted by version with a parallel list of keys to bisect
+    """
+
+    def __init__(self, tags: typing.Iterable[IndexedTag]):
+        self.tags = sorted(tags)
+        self.keys = [x.key for x in self.tags]
+
+    def __len__(self):
+        return len(self.tags)
+
+    def last(self) -> typing.Optional[IndexedTag]:
+        return self.tags[-1] if self.tags else None
+
+    def last_below(self, key: typing.Tuple) -> typing.Optional[IndexedTag]:
+        """
+        Returns the highest tag sorting before the given key
+        """
+        idx = bisect.bisect_left(self.keys, key)
+
+        return self.tags[idx - 1] if idx else None
+
+    def between(
+        self, low: typing.Tuple, high: typing.Tuple, reverse: bool = False
+    ) -> typing.Iterator[IndexedTag]:
+        """
+        Yields the tags with keys from low up to, but excluding, high
+
+        Args:
+            low: the lowest key, () for no lower bound
+            high: the key to stop at, `(MAXIMUM,)` for no upper bound
+            reverse: yield the highest tag first
+        """
+        start = bisect.bisect_left(self.keys, low)
+        end = max(start, bisect.bisect_left(self.keys, high))
+
+        indexes = range(end - 1, start - 1, -1) if reverse else range(start, end)
+        for idx in indexes:
+            yield self.tags[idx]
+
+    def last_starting(self, head: typing.Tuple) -> typing.Optional[IndexedTag]:
+        """
+        Returns the highest tag whose key starts with the given values
+        """
+        tag = self.last_below(head + (MAXIMUM,))
+        if tag is None or tag.key[: len(head)] != head:
+            return None
+
+        return tag
+
+
+class TagIndex(object):
+    """
+    Version-ordered index of the tags of each prefix, e.g. `api` for `api/1.2.3`
+    """
+
+    def __init__(self, tags: typing.Iterable[str]):
+        names = list(tags)
+
+        grouped = {}
+        calver = {}
+        for name, version in zip(names, Version.parse_many(names, ignore_errors=True)):
+            calver_tag = parse_calver(name)
+            if calver_tag is not None:
+                prefix = CALVER_RE.match(name).group("prefix") or ""
+                calver.setdefault(prefix, []).append(calver_tag)
+
+            # tags without a full version number, e.g. `latest`, have no place in the order
+            if version is None or not version.is_semver:
+                continue
+
+            entry = IndexedTag(key=version_key(version), name=name, version=version)
+            grouped.setdefault(version.prefix, []).append(entry)
+
+        self._all = {}
+        self._releases = {}
+        self._rcs = {}
+        for prefix, entries in grouped.items():
+            self._all[prefix] = SortedTags(entries)
+            self._releases[prefix] = SortedTags(
+                x for x in entries if not x.version.prerelease
+            )
+            self._rcs[prefix] = SortedTags(x for x in entries if x.version.is_rc)
+
+        self._calver = {prefix: SortedTags(x) for prefix, x in calver.items()}
+
+    def _get(self, group, prefix):
+        return group.get(prefix or "") or SortedTags(())
+
+    def latest(self, prefix: str = None) -> typing.Optional[IndexedTag]:
+        """
+        Returns the highest version tag
+        """
+        return self._get(self._all, prefix).last()
+
+    def latest_release(self, prefix: str = None) -> typing.Optional[IndexedTag]:
+        """
+        Returns the highest tag that is not a prerelease
+        """
+        return self._get(self._releases, prefix).last()
+
+    def latest_rc(
+        self, major: int, minor: int, prefix: str = None
+    ) -> typing.Optional[IndexedTag]:
+        """
+        Returns the highest release candidate of the given major.minor version
+        """
+        return self._get(self._rcs, prefix).last_starting((major, minor))
+
+    def latest_within(
+        self, major: int, minor: int, prefix: str = None
+    ) -> typing.Optional[IndexedTag]:
+        """
+        Returns the highest tag of the given major.minor version
+        """
+        return self._get(self._all, prefix).last_starting((major, minor))
+
+    def latest_calver(
+        self, date: str, prefix: str = None
+    ) -> typing.Optional[CalverTag]:
+        """
+        Returns the highest calendar version tag of the given date, e.g. `201809.25`
+        """
+        return self._get(self._calver, prefix).last_starting((calver_date(date),))
+
+
+def parse_listed(name: str) -> typing.Optional[typing.Tuple[str, ListedTag]]:
+    """
+    Returns the prefix and sort key of a version tag, None for other tags
+
+    Lighter than parsing a Version, for indexing a great many tags at once.
+    """
+    prefix, _separator, value = name.rpartition("/")
+
+    matches = SIMPLE_VERSION_RE.match(value)
+    if matches is not None:
+        major, minor, patch, prerelease = matches.groups()
+        prerelease = prerelease or ""
+        key = precedence_key(int(major), int(minor), int(patch), prerelease)
+
+        return prefix, ListedTag(key=key, name=name, prerelease=prerelease)
+
+    groups = parse_semver(name)
+    if groups is None or None in (groups["major"], groups["minor"], groups["patch"]):
+        return None
+
+    prerelease = groups["prerelease"] or ""
+    key = precedence_key(
+        int(groups["major"]), int(groups["minor"]), int(groups["patch"]), prerelease
+    )
+
+    return groups["prefix"] or "", ListedTag(key=key, name=name, prerelease=prerelease)
+
+
+def index_listed(
+    names: typing.Iterable[str],
+    keep: typing.Optional[typing.Callable[[ListedTag], bool]] = None,
+) -> typing.Dict[str, SortedTags]:
+    """
+    Returns the version tags among the names sorted by version, keyed by prefix
+
+    Args:
+        names: the tag names, those without a full version number are skipped
+        keep: only index the tags this returns True for
+    """
+    grouped = {}
+    for name in names:
+        parsed = parse_listed(name)
+        if parsed is None:
+            continue
+
+        prefix, tag = parsed
+        if keep is None or keep(tag):
+            grouped.setdefault(prefix, []).append(tag)
+
+    return {prefix: SortedTags(tags) for prefix, tags in grouped.items()}
@@ -1,5 +1,8 @@
+import functools
 import json
+import operator
 import re
+import typing
 
 from .exceptions import PrereleaseError, VersionError
 
@@ -36,13 +39,316 @@ RC_RE = re.compile(
     r"(?P<full_version>(?P<stable>.*)(?P<prerelease>rc(?P<rc_number>\d+))).*"
 )
 
+# the groups of SEMVER_RE in the order of Version's arguments
+SEMVER_GROUPS = (
+    "major",
+    "minor",
+    "patch",
+    "prefix",
+    "prefix_separator",
+    "prerelease",
+    "prerelease_separator",
+    "tags",
+    "build",
+    "version_triple",
+)
+
+PARSE_CACHE_SIZE = 4096
+
+# character classes as strings so membership checks can use the C-level str.strip
+DIGITS = "0123456789"
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-"
+IDENTIFIER_CHARS = DIGITS + LETTERS
+FIRST_IDENTIFIER_CHARS = IDENTIFIER_CHARS + "_"
+
+NO_TAGS = (None, None, None)
+
+
+def _is_identifier(segment: str, chars: str) -> bool:
+    """
+    Returns whether a dot-separated prerelease identifier matches SEMVER_RE
+    """
+    if not segment or segment.strip(chars):
+        return False
+
+    # alphanumeric identifiers need a letter or hyphen after any leading digits
+    rest = segment.lstrip(DIGITS)
+    if rest:
+        return rest[0] in LETTERS
+
+    return segment == "0" or segment[0] != "0"
+
+
+def _is_prerelease(prerelease: str) -> bool:
+    if "." not in prerelease:
+        return _is_identifier(prerelease, FIRST_IDENTIFIER_CHARS)
+
+    first, _dot, others = prerelease.partition(".")
+    if not _is_identifier(first, FIRST_IDENTIFIER_CHARS):
+        return False
+
+    return all(_is_identifier(x, IDENTIFIER_CHARS) for x in others.split("."))
+
+
+def _is_build(build: str) -> bool:
+    return all(x and not x.strip(IDENTIFIER_CHARS) for x in build.split("."))
+
+
+def _match_tags(tags: str) -> typing.Optional[typing.Tuple]:
+    """
+    Returns the prerelease separator, prerelease and build making up the tags
+    """
+    prerelease, plus, build = tags.partition("+")
+    if not plus:
+        build = None
+    elif not _is_build(build):
+        return None
+
+    if not prerelease:
+        return None, None, build
+
+    if prerelease[0] == "-" and _is_prerelease(prerelease[1:]):
+        return "-", prerelease[1:], build
+
+    if _is_prerelease(prerelease):
+        return "", prerelease, build
+
+    return None
+
+
+def _number_ends(value: str, start: int) -> typing.List[int]:
+    """
+    Returns where a number without leading zeros starting at `start` may end, longest first
+    """
+    rest = value[start:]
+    if not rest:
+        return []
+
+    if rest[0] == "0":
+        return [start + 1]
+
+    end = start + len(rest) - len(rest.lstrip(DIGITS))
+
+    return list(range(end, start, -1))
+
+
+def _match_version(value: str) -> typing.Optional[typing.Tuple]:
+    """
+    Returns the triple and tags groups of the part of a version after the prefix
+
+    The alternatives are tried in the order the regular expression backtracks
+    through them, so ambiguous strings such as `1.05.1` split the same way.
+    """
+    # the major number has to be followed by a dot, so only its longest form can match
+    major, dot, rest = value.partition(".")
+    if dot and major and not major.strip(DIGITS) and (major == "0" or major[0] != "0"):
+        # the first alternative tried, longest minor and patch, is almost always the match
+        if rest[:1] == "0":
+            minor, tail = "0", rest[1:]
+        else:
+            tail = rest.lstrip(DIGITS)
+            minor = rest[: len(rest) - len(tail)]
+
+        if minor and tail[:1] == ".":
+            patch_s = tail[1:]
+            if patch_s[:1] == "0":
+                patch, tags_s = "0", patch_s[1:]
+            else:
+                tags_s = patch_s.lstrip(DIGITS)
+                patch = patch_s[: len(patch_s) - len(tags_s)] or None
+
+            tags = _match_tags(tags_s) if tags_s else NO_TAGS
+            if tags is not None:
+                triple = value[: len(value) - len(tags_s)]
+                return (triple, major, minor, patch, tags_s) + tags
+
+        matches = _match_triple(value, len(major))
+        if matches is not None:
+            return matches
+
+    # without a version triple the whole value has to be tags
+    tags = _match_tags(value)
+    if tags is None:
+        return None
+
+    return (None, None, None, None, value) + tags
+
+
+def _match_triple(value: str, major_end: int) -> typing.Optional[typing.Tuple]:
+    """
+    Tries every way of splitting the minor and patch numbers after the major number
+    """
+    # the tags only depend on where the triple ends, which many alternatives share
+    tags_at = {}
+
+    for minor_end in _number_ends(value, major_end + 1):
+        dot_ends = [minor_end]
+        if value[minor_end : minor_end + 1] == ".":
+            dot_ends.insert(0, minor_end + 1)
+
+        for dot_end in dot_ends:
+            for patch_end in _number_ends(value, dot_end) + [None]:
+                end = dot_end if patch_end is None else patch_end
+
+                if end not in tags_at:
+                    tags_at[end] = _match_tags(value[end:])
+
+                tags = tags_at[end]
+                if tags is None:
+                    continue
+
+                return (
+                    value[:end],
+                    value[:major_end],
+                    value[major_end + 1 : minor_end],
+                    None if patch_end is None else value[dot_end:patch_end],
+                    value[end:],
+                ) + tags
+
+    return None
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_semver(version_s: str) -> typing.Optional[typing.Tuple]:
+    if "\n" in version_s:
+        # `$` also matches before a trailing newline, anywhere else it can't match
+        if version_s.index("\n") != len(version_s) - 1:
+            return None
+
+        version_s = version_s[:-1]
+
+    prefix, separator, value = version_s.rpartition("/")
+    matches = _match_version(value)
+    if matches is None:
+        return None
+
+    if not separator:
+        prefix = separator = None
+
+    triple, major, minor, patch, tags, prerelease_separator, prerelease, build = matches
+
+    return (
+        major,
+        minor,
+        patch,
+        prefix,
+        separator,
+        prerelease,
+        prerelease_separator,
+        tags,
+        build,
+        triple,
+    )
+
+
+def parse_semver(
+    version_s: str,
+) -> typing.Optional[typing.Dict[str, typing.Optional[str]]]:
+    """
+    Returns the same groups as `SEMVER_RE.match(version_s).groupdict()`
+
+    A hand-written single pass over the string; the results are memoized since
+    the same tags are parsed over and over.
+
+    Returns:
+        dict of group name to value, None when the string is not a version
+    """
+    groups = _parse_semver(version_s)
+    if groups is None:
+        return None
+
+    return dict(zip(SEMVER_GROUPS, groups))
+
+
+# the attributes of a Version, in the order they are output as JSON
+VERSION_FIELDS = (
+    "version_triple",
+    "major",
+    "minor",
+    "patch",
+    "prefix",
+    "prefix_separator",
+    "tags",
+    "prerelease",
+    "prerelease_separator",
+    "build",
+)
+
+
+# splits prerelease identifiers into text and numbers so `rc10` sorts after `rc9`
+NATURAL_RE = re.compile(r"(\d+)")
+
+
+# few distinct prereleases, e.g. `rc1`, are shared by many tags
+@functools.lru_cache(maxsize=1024)
+def prerelease_key(prerelease: str) -> typing.Tuple:
+    key = []
+    for identifier in prerelease.split("."):
+        for i, part in enumerate(NATURAL_RE.split(identifier)):
+            if i % 2:
+                key.append((0, int(part), ""))
+            elif part:
+                key.append((1, 0, part))
+
+    return tuple(key)
+
+
+def precedence_key(
+    major: int, minor: int, patch: typing.Optional[int], prerelease: str
+) -> typing.Tuple:
+    """
+    Returns a sort key ordering version numbers by precedence
+
+    Releases sort after all of their prereleases, and numbers within prerelease
+    identifiers compare numerically, e.g. `1.0.0rc2` < `1.0.0rc10` < `1.0.0`.
+    """
+    is_release = not prerelease
+
+    return (
+        major,
+        minor,
+        patch or 0,
+        is_release,
+        () if is_release else prerelease_key(prerelease),
+    )
+
+
+def _field(name: str, number: bool = False) -> property:
+    """
+    Returns a property stored in the `_<name>` slot that resets the cached forms when set
+    """
+    private = "_" + name
+
+    def set_field(self, value):
+        if number and value is not None:
+            value = int(value)
+
+        setattr(self, private, value)
+
+        self._str = self._hash = self._key = None
+
+    return property(operator.attrgetter(private), set_field)
+
+
+class Version(object):
+    __slots__ = tuple("_" + x for x in VERSION_FIELDS) + ("_str", "_hash", "_key")
+
+    version_triple = _field("version_triple")
+    major = _field("major", number=True)
+    minor = _field("minor", number=True)
+    patch = _field("patch", number=True)
+    prefix = _field("prefix")
+    prefix_separator = _field("prefix_separator")
+    tags = _field("tags")
+    prerelease = _field("prerelease")
+    prerelease_separator = _field("prerelease_separator")
+    build = _field("build")
 
-class Version:
     def __init__(
         self,
-        major="0",
-        minor="0",
-        patch="0",
+        major=0,
+        minor=0,
+        patch=0,
         prefix=None,
         prefix_separator=None,
         prerelease=None,
@@ -54,33 +360,90 @@ class Version:
         """
         Args:
             version_triple: the dotted version number, e.g. '1.2.3'
-            major: the first number in the triple, e.g. '1'
-            minor: the second number in the triple, e.g. '2'
-            patch: the third number in the triple, e.g. '3'
+            major: the first number in the triple, e.g. 1
+            minor: the second number in the triple, e.g. 2
+            patch: the third number in the triple, e.g. 3
             prefix: the prefix prior to the version triple
             tags:
             prerelease: None
             build: None
         """
-        self.version_triple = version_triple
-        self.major = major
-        self.minor = minor
-        self.patch = patch
-        self.prefix = prefix or ""
-        self.prefix_separator = prefix_separator or ""
-        self.tags = tags
-        self.prerelease = prerelease or ""
-        self.prerelease_separator = prerelease_separator or ""
-        self.build = build or ""
+        self._version_triple = version_triple
+        self._major = None if major is None else int(major)
+        self._minor = None if minor is None else int(minor)
+        self._patch = None if patch is None else int(patch)
+        self._prefix = prefix or ""
+        self._prefix_separator = prefix_separator or ""
+        self._tags = tags
+        self._prerelease = prerelease or ""
+        self._prerelease_separator = prerelease_separator or ""
+        self._build = build or ""
+
+        # string form, hash and precedence key, computed when first needed
+        self._str = self._hash = self._key = None
 
     def __eq__(self, other):
         return str(self) == str(other)
 
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(str(self))
+
+        return self._hash
+
+    def __lt__(self, other):
+        if not isinstance(other, Version):
+            return NotImplemented
+
+        return self.precedence_key < other.precedence_key
+
+    def __le__(self, other):
+        if not isinstance(other, Version):
+            return NotImplemented
+
+        return self.precedence_key <= other.precedence_key
+
+    def __gt__(self, other):
+        if not isinstance(other, Version):
+            return NotImplemented
+
+        return self.precedence_key > other.precedence_key
+
+    def __ge__(self, other):
+        if not isinstance(other, Version):
+            return NotImplemented
+
+        return self.precedence_key >= other.precedence_key
+
     def __repr__(self):
         return f"<Version: {self}>"
 
     def __str__(self):
-        return self.stringify()
+        if self._str is None:
+            self._str = self.stringify()
+
+        return self._str
+
+    @property
+    def precedence_key(self) -> typing.Tuple:
+        """
+        Returns a key ordering versions by semantic version precedence
+
+        Versions are grouped by prefix, then ordered by `precedence_key`, the
+        same order as the tag index.  Build metadata is ignored.
+        """
+        if self._key is None:
+            self._key = (
+                self.prefix,
+                self.is_semver,
+            ) + precedence_key(
+                self.major or 0, self.minor or 0, self.patch, self.prerelease
+            )
+
+        return self._key
 
     def bump(
         self,
@@ -90,13 +453,13 @@ class Version:
         bump_prerelease: bool = False,
     ):
         if bump_major:
-            self.major = f"{int(self.major)+1}"
+            self.major += 1
 
         if bump_minor:
-            self.minor = f"{int(self.minor)+1}"
+            self.minor += 1
 
         if bump_patch:
-            self.patch = f"{int(self.patch)+1}"
+            self.patch += 1
 
         if bump_prerelease:
             if self.prerelease and self.prerelease.startswith("rc"):
@@ -115,20 +478,30 @@ class Version:
             self.prerelease = None
 
     def copy(self) -> "Version":
-        new_version = Version()
-        new_version.__dict__ = self.__dict__.copy()
+        new_version = self.__class__.__new__(self.__class__)
+        for name in self.__slots__:
+            setattr(new_version, name, getattr(self, name))
 
         return new_version
 
+    def to_dict(self) -> typing.Dict[str, typing.Optional[str]]:
+        """
+        Returns the attributes with the numbers as strings, as they appear in the tag
+        """
+        values = {name: getattr(self, name) for name in VERSION_FIELDS}
+        for name in ("major", "minor", "patch"):
+            if values[name] is not None:
+                values[name] = str(values[name])
+
+        return values
+
     def _get_semver(self) -> str:
         """
         Returns the major.minor.patch component
         """
         version = ""
         if None not in (self.major, self.minor, self.patch):
-            version = f"{self.major}.{self.minor}"
-            if self.patch:
-                version = f"{version}.{self.patch}"
+            version = f"{self.major}.{self.minor}.{self.patch}"
 
         return version
 
@@ -166,11 +539,32 @@ class Version:
 
     @classmethod
     def parse(cls, version_s: str) -> "Version":
-        matches = SEMVER_RE.match(version_s)
-        if not matches:
+        groups = _parse_semver(version_s)
+        if groups is None:
             raise VersionError(f"unable to parse version_s={version_s}")
 
-        return Version(**matches.groupdict())
+        return cls(*groups)
+
+    @classmethod
+    def parse_many(
+        cls, versions: typing.Iterable[str], ignore_errors: bool = False
+    ) -> typing.Iterator[typing.Optional["Version"]]:
+        """
+        Parses each of the given strings as they are consumed
+
+        Args:
+            versions: the strings to parse
+            ignore_errors: yield None for strings that are not versions instead of raising
+        """
+        for version_s in versions:
+            groups = _parse_semver(version_s)
+            if groups is None:
+                if not ignore_errors:
+                    raise VersionError(f"unable to parse version_s={version_s}")
+
+                yield None
+            else:
+                yield cls(*groups)
 
     def stringify(self, format: str = "default", args: object = None) -> str:
         stringify_method = getattr(self, f"stringify_{format}")
@@ -205,7 +599,7 @@ class Version:
 
     def stringify_json(self, args: object = None) -> str:
         """Returns the parsed version as a JSON string"""
-        return json.dumps(self.__dict__)
+        return json.dumps(self.to_dict())
 
     def stringify_sugar(self, args: object = None):
         version = self._get_semver()
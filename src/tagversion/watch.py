@@ -0,0 +1,208 @@
+"""
+Detects changes to HEAD, branches and tags
+
+On Linux the ref files are watched with inotify, so checking for a change is a
+single non-blocking read.  Elsewhere the state is compared by stat calls each
+time a change is checked for.
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+import sys
+import typing
+
+from .cache import VersionCache
+from .exceptions import RefError
+from .refs import RefReader
+
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+
+EVENT_HEADER = struct.Struct("iIII")
+
+# the files outside refs/ that change the version
+TOP_LEVEL_REFS = ("HEAD", "packed-refs")
+
+
+class StatWatcher(object):
+    """
+    Compares HEAD, the branch and a fingerprint of the tags on every check
+
+    Args:
+        path: a directory within the working copy
+    """
+
+    def __init__(self, path: str = "."):
+        self.path = path
+
+        self._state = self.get_state()
+
+    def get_state(self) -> typing.Optional[tuple]:
+        try:
+            refs = RefReader(self.path)
+
+            return (refs.read_ref("HEAD"), VersionCache(refs).key())
+        except RefError:
+            return None
+
+    def changed(self) -> bool:
+        """
+        Returns whether anything changed since the previous check
+        """
+        state = self.get_state()
+        if state is not None and state == self._state:
+            return False
+
+        self._state = state
+
+        return True
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher(object):
+    """
+    Watches the ref files of the repository with inotify
+
+    Args:
+        refs: the repository to watch
+
+    Raises:
+        OSError: when inotify is unavailable
+    """
+
+    def __init__(self, refs: RefReader):
+        self.refs = refs
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        # watch descriptor -> (directory, whether only the top-level refs count)
+        self._watches = {}
+
+        try:
+            for directory in {refs.git_dir, refs.common_dir}:
+                self.watch(directory, top_level=True)
+
+            self.watch_tree(os.path.join(refs.common_dir, "refs"))
+        except OSError:
+            self.close()
+            raise
+
+    @property
+    def logger(self):
+        return logging.getLogger("{}.{}".format(__name__, self.__class__.__name__))
+
+    def watch(self, directory: str, top_level: bool = False) -> None:
+        wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), directory)
+
+        self._watches[wd] = (directory, top_level)
+
+    def watch_tree(self, directory: str) -> None:
+        for root, _dirs, _files in os.walk(directory):
+            self.watch(root)
+
+    def changed(self) -> bool:
+        """
+        Returns whether a ref changed since the previous check
+        """
+        changed = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = (
+                    data[offset : offset + length]
+                    .rstrip(b"\0")
+                    .decode(sys.getfilesystemencoding(), "surrogateescape")
+                )
+                offset += length
+
+                changed |= self._handle(wd, mask, name)
+
+    def _handle(self, wd: int, mask: int, name: str) -> bool:
+        if mask & IN_Q_OVERFLOW:
+            self.logger.debug("inotify queue overflowed")
+            return True
+
+        if mask & IN_IGNORED:
+            self._watches.pop(wd, None)
+            return False
+
+        directory, top_level = self._watches.get(wd, (None, False))
+        if directory is None:
+            return False
+
+        if top_level:
+            return name in TOP_LEVEL_REFS
+
+        if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+            # new directories of refs, e.g. `refs/tags/api`
+            self.watch_tree(os.path.join(directory, name))
+
+        # git writes `<ref>.lock` and renames it over the ref
+        return not name.endswith(".lock")
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def get_watcher(path: str = "."):
+    """
+    Returns an inotify watcher where available, otherwise a stat based one
+
+    Args:
+        path: a directory within the working copy
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(RefReader(path))
+        except (OSError, AttributeError, RefError) as exc:
+            logging.getLogger(__name__).debug("inotify unavailable: %s", exc)
+
+    return StatWatcher(path)
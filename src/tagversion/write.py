@@ -1,29 +1,247 @@
 from __future__ import absolute_import
 
+import filecmp
+import glob
+import logging
+import os
 import re
+import shutil
+import tempfile
+import typing
+from concurrent.futures import ThreadPoolExecutor
 
 try:
     from StringIO import StringIO
 except ImportError:
     from io import StringIO
 
-from .git import GitVersion
+from .argparse import positive_int
+from .git import GitVersion, print_error
+from .snapshot import add_describe_argument
+from .version import Version
 
-DEFAULT_VERSION_PATTERN = r"(?P<start>.*?){{\s*version\s*}}(?P<content>.*)"
+DEFAULT_VERSION_PATTERN = (
+    r"(?P<start>.*?){{\s*version(?:_(?P<format>[a-z]+))?\s*}}(?P<content>.*)"
+)
+
+# the formats a placeholder may ask for, e.g. `{{ version_docker }}`
+FORMATS = ("default", "docker", "json", "sugar")
+
+# patterns written as `(?P<start>.*?)<placeholder>(?P<content>.*)` are unwrapped so
+# only the placeholder itself is searched for
+WRAPPED_PATTERN_RE = re.compile(
+    r"^\(\?P<start>\.\*\?\)(?P<placeholder>.+)\(\?P<content>\.\*\)$", re.DOTALL
+)
+
+# number of characters read from the file at a time
+CHUNK_SIZE = 1024 * 1024
+
+# the longest placeholder that is found when it straddles two chunks
+MAX_PLACEHOLDER_SIZE = 64 * 1024
 
 
 def get_version_re(pattern):
     return re.compile(pattern, re.DOTALL)
 
 
+def get_placeholder_re(pattern: str) -> typing.Optional[typing.Pattern]:
+    """
+    Returns a regex matching a single placeholder of the given pattern
+
+    Returns None when the pattern uses the `start` and `content` groups in a way
+    that requires matching against the whole file.
+    """
+    matches = WRAPPED_PATTERN_RE.match(pattern)
+    if matches:
+        return get_version_re(matches.group("placeholder"))
+
+    version_re = get_version_re(pattern)
+    if {"start", "content"} & set(version_re.groupindex):
+        return None
+
+    return version_re
+
+
+def get_replacements(version: Version) -> typing.Dict[typing.Optional[str], str]:
+    """
+    Renders the version in every format once, keyed by format name
+
+    The `None` key is used by placeholders that do not name a format.
+    """
+    replacements = {x: version.stringify(format=x) for x in FORMATS}
+    replacements[None] = replacements["default"]
+
+    return replacements
+
+
+def get_replacement(
+    matches: typing.Match, replacements: typing.Dict[typing.Optional[str], str]
+) -> str:
+    """
+    Returns the text for a placeholder, unknown formats are left as they are
+    """
+    placeholder_format = None
+    if "format" in matches.re.groupindex:
+        placeholder_format = matches.group("format")
+
+    replacement = replacements.get(placeholder_format)
+    if replacement is not None:
+        return replacement
+
+    # the placeholder alone, without the text around it matched by a whole-file pattern
+    start, end = matches.span()
+    if "start" in matches.re.groupindex and matches.group("start") is not None:
+        start = matches.end("start")
+    if "content" in matches.re.groupindex and matches.group("content") is not None:
+        end = matches.start("content")
+
+    return matches.string[start:end]
+
+
+def substitute(
+    placeholder_re: typing.Pattern,
+    replacements: typing.Dict[typing.Optional[str], str],
+    infile: typing.TextIO,
+    outfile: typing.TextIO,
+    chunk_size: int = CHUNK_SIZE,
+    overlap: int = MAX_PLACEHOLDER_SIZE,
+) -> int:
+    """
+    Copies infile to outfile, replacing every placeholder, and returns the count
+
+    All placeholders, whatever their format, are found by the same scan.
+
+    The file is read one chunk at a time; the last `overlap` characters of each
+    chunk are held back until the next one is read so placeholders spanning the
+    boundary are found in a single forward scan.
+    """
+    count = 0
+    buf = ""
+
+    while True:
+        chunk = infile.read(chunk_size)
+        buf += chunk
+
+        # matches starting past the limit may continue into the next chunk
+        limit = len(buf) - overlap if chunk else len(buf)
+
+        pos = 0
+        for matches in placeholder_re.finditer(buf):
+            if chunk and matches.start() >= limit:
+                break
+
+            outfile.write(buf[pos : matches.start()])
+            outfile.write(get_replacement(matches, replacements))
+
+            pos = matches.end()
+            count += 1
+
+        if not chunk:
+            outfile.write(buf[pos:])
+
+            return count
+
+        keep = max(pos, limit)
+        outfile.write(buf[pos:keep])
+
+        buf = buf[keep:]
+
+
+def substitute_whole(
+    version_re: typing.Pattern,
+    replacements: typing.Dict[typing.Optional[str], str],
+    content: str,
+) -> str:
+    """
+    Replaces placeholders using a pattern with `start` and `content` groups
+    """
+    buf = StringIO()
+    while content:
+        matches = version_re.match(content)
+        if matches:
+            buf.write(matches.group("start"))
+            buf.write(get_replacement(matches, replacements))
+
+            content = matches.group("content")
+        else:
+            buf.write(content)
+            break
+
+    return buf.getvalue()
+
+
+def expand_paths(paths: typing.Iterable[str]) -> typing.List[str]:
+    """
+    Expands glob patterns, keeping the order given and dropping duplicates
+
+    Patterns only match files, e.g. `dist/**` leaves out the directories under
+    dist.  A pattern without any match is kept as is so the missing file is
+    reported.
+    """
+    expanded = []
+    for path in paths:
+        matched = []
+        if glob.has_magic(path):
+            matched = sorted(
+                x for x in glob.glob(path, recursive=True) if os.path.isfile(x)
+            )
+
+        expanded.extend(matched or [path])
+
+    return list(dict.fromkeys(os.path.realpath(x) for x in expanded))
+
+
+def write_file(
+    path: str, pattern: str, replacements: typing.Dict[typing.Optional[str], str]
+) -> bool:
+    """
+    Rewrites the file at path with the version, returns whether it changed
+
+    The output is written next to the file and moved into place so the file is
+    never left half-written; when it is byte-identical to the original the file
+    is left untouched to keep its timestamp.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path), prefix=".{}.".format(os.path.basename(path))
+    )
+
+    try:
+        with os.fdopen(fd, "w") as outfile, open(path, "r") as infile:
+            placeholder_re = get_placeholder_re(pattern)
+            if placeholder_re is not None:
+                substitute(placeholder_re, replacements, infile, outfile)
+            else:
+                version_re = get_version_re(pattern)
+                outfile.write(substitute_whole(version_re, replacements, infile.read()))
+
+        if filecmp.cmp(path, tmp_path, shallow=False):
+            os.unlink(tmp_path)
+
+            return False
+
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+        raise
+
+    return True
+
+
 class WriteFile(object):
     """
-    Write version into a file
+    Write version into files
     """
 
     def __init__(self, args):
         self.args = args
 
+    @property
+    def logger(self):
+        return logging.getLogger("{}.{}".format(__name__, self.__class__.__name__))
+
     @classmethod
     def setup_subparser(cls, subcommand):
         parser = subcommand.add_parser("write", help=cls.__doc__)
@@ -32,35 +250,70 @@ class WriteFile(object):
         parser.add_argument(
             "--pattern",
             default=DEFAULT_VERSION_PATTERN,
-            help='a regex pattern to search and replace with the version, default "{}"'.format(
-                DEFAULT_VERSION_PATTERN
-            ),
+            help=(
+                "a regex pattern to search and replace with the version, an optional "
+                '`format` group selects the format, default "{}"'
+            ).format(DEFAULT_VERSION_PATTERN),
         )
+        parser.add_argument(
+            "--no-cache",
+            action="store_false",
+            dest="cache",
+            help="always recompute the version instead of reusing a cached result",
+        )
+        add_describe_argument(parser)
         parser.add_argument(
             "--no-branch",
             action="store_false",
             dest="branch",
             help="do not append branch to the version when current commit is not tagged",
         )
-        parser.add_argument("path", help="path to the file to write version in")
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=positive_int,
+            default=None,
+            help="number of files to rewrite at once, default is based on the CPU count",
+        )
+        parser.add_argument(
+            "paths",
+            nargs="+",
+            metavar="path",
+            help="paths or glob patterns, e.g. `dist/**/*.js`, of files to write version in",
+        )
 
     def run(self):
+        # the version is computed once no matter how many files are written
         version = GitVersion(self.args).version
-        version_re = get_version_re(self.args.pattern)
-
-        buf = StringIO()
-        with open(self.args.path, "r") as fh:
-            content = fh.read()
-            while content:
-                matches = version_re.match(content)
-                if matches:
-                    buf.write(matches.group("start"))
-                    buf.write(version.stringify())
-
-                    content = matches.group("content")
-                else:
-                    buf.write(content)
-                    break
-
-        with open(self.args.path, "w") as fh:
-            fh.write(buf.getvalue())
+        if version is None:
+            print_error("No version found - please commit something first")
+
+            return 1
+
+        replacements = get_replacements(version)
+
+        paths = expand_paths(self.args.paths)
+
+        status = 0
+        with ThreadPoolExecutor(max_workers=self.args.jobs) as executor:
+            futures = [
+                (
+                    path,
+                    executor.submit(write_file, path, self.args.pattern, replacements),
+                )
+                for path in paths
+            ]
+
+            for path, future in futures:
+                try:
+                    changed = future.result()
+                except (OSError, UnicodeError) as exc:
+                    # e.g. a binary file matched by a glob
+                    print_error("unable to write {}: {}".format(path, exc))
+                    status = 1
+                    continue
+
+                if not changed:
+                    self.logger.info("%s is unchanged", path)
+
+        return status
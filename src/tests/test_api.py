@@ -0,0 +1,100 @@
+import contextlib
+import io
+import os
+from unittest import mock
+
+from tagversion import api
+from tagversion.api import VersionOptions, get_version, get_version_info
+from tagversion.exceptions import VersionError
+
+from .utils import RepoTestCase, git
+
+
+class ApiTestCase(RepoTestCase):
+    def setUp(self):
+        super().setUp()
+
+        api.clear_cache()
+        self.addCleanup(api.clear_cache)
+
+        self.commit("first")
+        git(self.path, "tag", "-a", "-m", "release", "1.2.3")
+
+    def test_get_version(self):
+        """Ensure the version is found without printing anything"""
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            self.assertEqual("1.2.3", get_version(self.path))
+            self.assertEqual("1.2", get_version(self.path, fmt="{major}.{minor}"))
+
+        self.assertEqual(("", ""), (stdout.getvalue(), stderr.getvalue()))
+
+    def test_options(self):
+        """Ensure the options customize a copy of the cached version"""
+        options = VersionOptions(build="b7", prefix="app")
+
+        self.assertEqual(
+            "1.2.3-b7", get_version(self.path, fmt="sugar", options=options)
+        )
+        self.assertEqual(
+            "app-1.2.3", get_version(self.path, fmt="docker", options=options)
+        )
+        self.assertEqual("1.2.3", get_version(self.path))
+
+    def test_branch(self):
+        """Ensure the branch is appended to untagged commits, following checkouts"""
+        self.commit("second")
+
+        version = get_version_info(self.path)
+        self.assertEqual("main", version.prerelease.rsplit("-", 1)[-1])
+
+        git(self.path, "checkout", "-q", "-b", "feature/thing")
+
+        self.assertTrue(get_version(self.path).endswith("-feature--thing"))
+        self.assertEqual(
+            "1.2.3", get_version(self.path, options=VersionOptions(branch=False))[:5]
+        )
+
+    def test_cached(self):
+        """Ensure git only runs again once HEAD or the tags change"""
+        with mock.patch.object(api, "_compute", wraps=api._compute) as compute_mock:
+            for _ in range(3):
+                self.assertEqual("1.2.3", get_version(self.path))
+
+            self.assertEqual(1, compute_mock.call_count)
+
+            self.commit("second")
+
+            self.assertTrue(get_version(self.path).startswith("1.2.3-1-g"))
+            self.assertEqual(2, compute_mock.call_count)
+
+            git(self.path, "tag", "-a", "-m", "release", "1.3.0")
+
+            self.assertEqual("1.3.0", get_version(self.path))
+            self.assertEqual(3, compute_mock.call_count)
+
+    def test_component(self):
+        """Ensure only the component's tags are considered"""
+        git(self.path, "tag", "-a", "-m", "release", "api/0.4.0")
+
+        self.assertEqual("api/0.4.0", get_version(self.path, component="api"))
+        self.assertEqual(
+            "0.4.0",
+            get_version(
+                self.path, component="api", options=VersionOptions(display_prefix=False)
+            ),
+        )
+
+    def test_errors(self):
+        """Ensure problems are raised rather than printed"""
+        with self.assertRaises(VersionError):
+            get_version(self.path, fmt="unknown")
+
+        with self.assertRaises(VersionError):
+            get_version(self.path, fmt="default,docker")
+
+        untagged = os.path.join(self._tmp.name, "untagged")
+        git(self._tmp.name, "init", "-q", untagged)
+
+        with self.assertRaises(VersionError):
+            get_version(untagged)
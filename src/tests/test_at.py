@@ -0,0 +1,86 @@
+import io
+from unittest import mock
+
+from tagversion.at import VersionsAt, iter_revisions
+
+from .utils import RepoTestCase, git
+
+
+class VersionsAtTestCase(RepoTestCase):
+    command = VersionsAt
+    command_args = dict(display_prefix=True, format="default", revisions=[])
+
+    def setUp(self):
+        super().setUp()
+
+        self.commits = [self.commit("first")]
+        git(self.path, "tag", "-a", "-m", "release", "1.0.0")
+        self.commits.append(self.commit("second"))
+
+        git(self.path, "checkout", "-q", "-b", "feature")
+        self.commits.append(self.commit("feature"))
+        git(self.path, "checkout", "-q", "main")
+        self.commits.append(self.commit("third"))
+        git(self.path, "tag", "api/1.1.0")
+        git(self.path, "merge", "-q", "--no-ff", "-m", "merge", "feature")
+        self.commits.append(git(self.path, "rev-parse", "HEAD"))
+
+        self.chdir()
+
+    def _run(self, stdin="", **kwargs):
+        status, lines = self.run_command(stdin=stdin, **kwargs)
+
+        return status, [x.split("\t") for x in lines]
+
+    def test_iter_revisions(self):
+        """Ensure stdin is read for `-` or when no revisions are given"""
+        stdin = io.StringIO("a\n\n  b \n")
+
+        self.assertEqual(["a", "b"], list(iter_revisions([], stdin=stdin)))
+        self.assertEqual(["x", "y"], list(iter_revisions(["x", "y"], stdin=stdin)))
+
+    def test_matches_git(self):
+        """Ensure every commit read from stdin gets its git describe version"""
+        status, lines = self._run(stdin="\n".join(self.commits))
+
+        self.assertEqual(0, status)
+        self.assertEqual(
+            [
+                [x, git(self.path, "describe", "--tags", "--always", x)]
+                for x in self.commits
+            ],
+            lines,
+        )
+
+    def test_formats(self):
+        """Ensure revisions are resolved and each format is printed as a column"""
+        status, lines = self._run(
+            display_prefix=False,
+            format="default,{major}.{minor}",
+            revisions=["1.0.0", "main~1"],
+        )
+
+        self.assertEqual(0, status)
+        self.assertEqual([["1.0.0", "1.0.0", "1.0"], ["main~1", "1.1.0", "1.1"]], lines)
+
+    def test_untagged(self):
+        """Ensure commits without a tag in their history print their abbreviated id"""
+        git(self.path, "checkout", "-q", "--orphan", "other")
+        untagged = self.commit("untagged")
+        abbrev = git(self.path, "describe", "--tags", "--always", untagged)
+
+        args = dict(format="default,docker", revisions=[untagged])
+        self.assertEqual((0, [[untagged, abbrev, abbrev]]), self._run(**args))
+
+        # an id of only digits does not parse as a version
+        with mock.patch.object(VersionsAt, "describe", return_value="0123456"):
+            self.assertEqual((0, [[untagged, "0123456", "0123456"]]), self._run(**args))
+
+    def test_unknown_revision(self):
+        """Ensure unknown revisions are reported without stopping the others"""
+        with mock.patch("tagversion.at.print_error") as print_error_mock:
+            status, lines = self._run(revisions=["nope", "api/1.1.0"])
+
+        self.assertEqual(1, status)
+        self.assertEqual([["api/1.1.0", "api/1.1.0"]], lines)
+        print_error_mock.assert_called_once()
@@ -0,0 +1,67 @@
+import os
+from unittest import mock
+
+from tagversion.cache import CacheEntry, VersionCache
+from tagversion.refs import RefReader
+from tagversion.snapshot import RepoSnapshot
+
+from .utils import RepoTestCase, git
+
+
+class VersionCacheTestCase(RepoTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.commit("first")
+        git(self.path, "tag", "0.0.1")
+
+        self.refs = RefReader(self.path)
+
+    def test_key_changes_with_head(self):
+        """Ensure a new commit invalidates the cached result"""
+        cache = VersionCache(self.refs)
+        key = cache.key()
+
+        self.commit("second")
+
+        self.assertNotEqual(key, cache.key())
+
+    def test_key_changes_with_tags(self):
+        """Ensure adding nested loose tags and packing refs change the key"""
+        cache = VersionCache(self.refs)
+
+        keys = {cache.key()}
+
+        git(self.path, "tag", "api/0.0.1")
+        keys.add(cache.key())
+
+        os.utime(os.path.join(self.refs.common_dir, "refs", "tags", "api"), ns=(0, 0))
+        git(self.path, "tag", "api/0.0.2")
+        keys.add(cache.key())
+
+        git(self.path, "pack-refs", "--all")
+        keys.add(cache.key())
+
+        self.assertEqual(4, len(keys))
+
+    def test_bounded(self):
+        """Ensure the oldest entries are evicted once the cache is full"""
+        cache = VersionCache(self.refs, max_entries=2)
+
+        for i in range(3):
+            cache.put(str(i), CacheEntry("0.0.{}".format(i), None))
+
+        self.assertIsNone(cache.get("0"))
+        self.assertEqual(CacheEntry("0.0.2", None), cache.get("2"))
+
+    @mock.patch("tagversion.snapshot.get_describe")
+    def test_snapshot_uses_cache(self, describe_mock):
+        """Ensure a warm cache answers without describing again, including untagged repos"""
+        describe_mock.return_value = CacheEntry("a1b2c3d", None)
+
+        cache = VersionCache(self.refs)
+        for _ in range(2):
+            snapshot = RepoSnapshot.collect(branch=False, refs=self.refs, cache=cache)
+
+        self.assertEqual(RepoSnapshot(describe="a1b2c3d", is_tagged=False), snapshot)
+        self.assertEqual(1, describe_mock.call_count)
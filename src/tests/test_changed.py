@@ -0,0 +1,109 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+
+from tagversion.changed import ChangedComponents, find_changed, parse_mapping
+
+from .utils import RepoTestCase, git
+
+
+class ChangedTestCase(RepoTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.chdir()
+
+        self.change("api/main.py", "api/1.0.0")
+        self.change("web/index.html", "web/1.0.0")
+        self.change("docs/index.md")
+
+    def change(self, filename, tag=None):
+        path = os.path.join(self.path, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a") as fh:
+            fh.write("change\n")
+
+        git(self.path, "add", filename)
+        commit = self.commit("change {}".format(filename))
+
+        if tag:
+            git(self.path, "tag", tag)
+
+        return commit
+
+    def run_changed(self, *mappings):
+        args = argparse.Namespace(describe="git", json=True, mappings=list(mappings))
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(0, ChangedComponents(args).run())
+
+        return json.loads(output.getvalue())
+
+    def test_parse_mapping(self):
+        """Ensure a bare component name maps to the directory of the same name"""
+        self.assertEqual(("api", "api"), parse_mapping("api"))
+        self.assertEqual(("web", "frontend/web"), parse_mapping("web=frontend/web/"))
+
+    def test_unchanged(self):
+        """Ensure components without changes since their tag are not reported"""
+        self.assertEqual(
+            {
+                "api": {"tag": "api/1.0.0", "changed": False},
+                "web": {"tag": "web/1.0.0", "changed": False},
+            },
+            self.run_changed("api", "web"),
+        )
+
+    def test_changed(self):
+        """Ensure a change after the tag marks only its component as changed"""
+        self.change("api/other.py")
+
+        result = self.run_changed("api", "web=web", "web=docs")
+
+        self.assertTrue(result["api"]["changed"])
+        self.assertTrue(result["web"]["changed"])
+
+        self.assertFalse(self.run_changed("web")["web"]["changed"])
+
+    def test_untagged(self):
+        """Ensure a component that was never tagged is reported as changed"""
+        self.assertEqual(
+            {"tag": None, "changed": True}, self.run_changed("docs")["docs"]
+        )
+
+    def test_merged_branch(self):
+        """Ensure changes merged in from a branch are attributed to the right ranges"""
+        git(self.path, "checkout", "-q", "-b", "feature", "api/1.0.0")
+        self.change("web/feature.html")
+        git(self.path, "checkout", "-q", "main")
+        git(self.path, "merge", "-q", "--no-ff", "-m", "merge", "feature")
+
+        result = self.run_changed("api", "web")
+
+        # the branch started before the web tag, but its commit is not part of it
+        self.assertFalse(result["api"]["changed"])
+        self.assertTrue(result["web"]["changed"])
+
+    def test_find_changed(self):
+        """Ensure commits reachable from a component's tag are skipped for that component"""
+        log_lines = [
+            "commit c3 c2",
+            "",
+            "api/a.py",
+            "commit c2 c1",
+            "",
+            "web/b.html",
+            "commit c1",
+            "",
+            "api/a.py",
+        ]
+
+        self.assertEqual(
+            {"web"},
+            find_changed(
+                {"api": ["api"], "web": ["web"]}, {"api": "c3", "web": "c1"}, log_lines
+            ),
+        )
@@ -0,0 +1,137 @@
+import os
+from unittest import mock
+
+from tagversion.commitindex import CommitIndex, INDEX_FILENAME
+from tagversion.describe import Describer
+from tagversion.exceptions import CommitIndexError
+from tagversion.refs import RefReader
+from tagversion.snapshot import DESCRIBE_INDEX, describe_components, get_describe
+
+from .utils import RepoTestCase, git
+
+BASE_DATE = 1600000000
+
+
+class CommitIndexTestCase(RepoTestCase):
+    def setUp(self):
+        super().setUp()
+
+        # a history with a merge, clock skew and both annotated and lightweight tags
+        self.commits = [self.commit("root", date=BASE_DATE + 1000)]
+        git(self.path, "tag", "-a", "-m", "root", "0.0.1")
+        self.commits.append(self.commit("second", date=BASE_DATE + 1000))
+
+        git(self.path, "checkout", "-q", "-b", "feature")
+        self.commits.append(self.commit("feature 1", date=BASE_DATE + 1060))
+        git(self.path, "tag", "0.1.0rc1")
+        self.commits.append(self.commit("feature 2", date=BASE_DATE + 900))
+
+        git(self.path, "checkout", "-q", "main")
+        self.commits.append(self.commit("main 1", date=BASE_DATE + 1060))
+        git(self.path, "tag", "-a", "-m", "api", "api/1.0.0")
+        self.commits.append(self.commit("main 2", date=BASE_DATE + 1200))
+        git(
+            self.path,
+            "merge",
+            "-q",
+            "--no-ff",
+            "-m",
+            "merge",
+            "feature",
+            env={"GIT_COMMITTER_DATE": "{} +0000".format(BASE_DATE + 1300)},
+        )
+        self.commits.append(git(self.path, "rev-parse", "HEAD"))
+        self.commits.append(self.commit("main 3", date=BASE_DATE + 1300))
+
+    def get_index(self):
+        index = CommitIndex(RefReader(self.path))
+        self.addCleanup(index.close)
+
+        return index
+
+    def assertMatchesGit(self, index):
+        for commit in self.commits:
+            for component, options in ((None, ()), ("api", ("--match", "api/*"))):
+                self.assertEqual(
+                    git(self.path, "describe", "--tags", "--always", *options, commit),
+                    index.describe(commit, component)[0],
+                )
+
+    def test_matches_git(self):
+        """Ensure indexed commits are described like git describe, before and after packing"""
+        self.assertMatchesGit(self.get_index())
+
+        git(self.path, "gc", "-q")
+
+        self.assertMatchesGit(self.get_index())
+        self.assertTrue(
+            os.path.exists(
+                os.path.join(self.path, ".git", "tag-version", INDEX_FILENAME)
+            )
+        )
+
+    def test_new_commit_not_walked(self):
+        """Ensure a new commit on top of indexed history is resolved without a walk"""
+        self.get_index().describe(self.commits[-1])
+
+        head = self.commit("main 4", date=BASE_DATE + 1400)
+
+        with mock.patch.object(Describer, "_search") as search_mock:
+            index = self.get_index()
+            self.assertEqual(
+                git(self.path, "describe", "--tags", "--always"),
+                index.describe(head)[0],
+            )
+
+        search_mock.assert_not_called()
+        self.assertEqual(
+            2, index.lookup(head).depth - index.lookup(self.commits[-2]).depth
+        )
+
+    def test_tags_changed(self):
+        """Ensure added, moved and deleted tags are reflected"""
+        index = self.get_index()
+        self.assertMatchesGit(index)
+
+        git(self.path, "tag", "-a", "-m", "release", "1.0.0", self.commits[5])
+        self.assertMatchesGit(self.get_index())
+
+        git(self.path, "tag", "-f", "0.1.0rc1", self.commits[3])
+        self.assertMatchesGit(self.get_index())
+
+        git(self.path, "tag", "-d", "api/1.0.0")
+        self.assertMatchesGit(self.get_index())
+
+    def test_exact_match(self):
+        """Ensure a tagged HEAD is reported as an exact match"""
+        index = self.get_index()
+
+        self.assertEqual(("api/1.0.0", "api/1.0.0"), index.describe(self.commits[4]))
+        self.assertIsNone(index.describe(self.commits[5])[1])
+
+    def test_engine(self):
+        """Ensure the index engine gives the same results as git"""
+        refs = RefReader(self.path)
+
+        self.chdir()
+
+        self.assertEqual(get_describe(), get_describe(refs=refs, engine=DESCRIBE_INDEX))
+        self.assertEqual(
+            describe_components(),
+            describe_components(refs=refs, engine=DESCRIBE_INDEX),
+        )
+
+    def test_unusable_directory(self):
+        """Ensure git answers when the index can not be created"""
+        refs = RefReader(self.path)
+        index = self.get_index()
+
+        # a file where the index directory should be, e.g. in a read-only checkout
+        open(os.path.dirname(index.path), "w").close()
+
+        with self.assertRaises(CommitIndexError):
+            index.describe(self.commits[-1])
+
+        self.chdir()
+
+        self.assertEqual(get_describe(), get_describe(refs=refs, engine=DESCRIBE_INDEX))
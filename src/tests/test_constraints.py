@@ -0,0 +1,66 @@
+from unittest import TestCase
+
+from tagversion.constraints import VersionRange
+from tagversion.exceptions import VersionError
+from tagversion.tagindex import index_listed
+
+TAGS = [
+    "0.3.1",
+    "0.3.2",
+    "0.4.0",
+    "1.3.9",
+    "1.4.0rc1",
+    "1.4.0",
+    "1.4.2",
+    "1.5.0",
+    "2.0.0rc1",
+    "2.0.0",
+    "3.2.0rc1",
+    "3.2.0rc2",
+    "3.2.0",
+    "3.2.1",
+]
+
+
+class VersionRangeTestCase(TestCase):
+    def setUp(self):
+        self.tags = index_listed(TAGS)[""]
+
+    def select(self, constraint):
+        version_range = VersionRange(constraint)
+
+        return [
+            x.name
+            for x in self.tags.between(version_range.low, version_range.high)
+            if version_range.matches(x.key)
+        ]
+
+    def test_bounds(self):
+        """Ensure comparisons leave out prereleases below the bound"""
+        self.assertEqual(["1.4.0", "1.4.2", "1.5.0"], self.select(">=1.4,<2"))
+        self.assertEqual(["1.4.0rc1", "1.4.0"], self.select(">1.3,<=1.4.0"))
+        self.assertEqual(["3.2.1"], self.select(">3.2.0"))
+        self.assertEqual(["0.3.1", "0.3.2"], self.select("<0.4"))
+        self.assertEqual(["2.0.0rc1", "2.0.0"], self.select(">=2.0.0rc1,<3"))
+
+    def test_equal(self):
+        """Ensure == and wildcards cover prereleases and every version they start"""
+        self.assertEqual(["3.2.0rc1", "3.2.0rc2", "3.2.0"], self.select("==3.2.0"))
+        self.assertEqual(["3.2.0rc2"], self.select("3.2.0rc2"))
+        self.assertEqual(
+            ["3.2.0rc1", "3.2.0rc2", "3.2.0", "3.2.1"], self.select("3.2.*")
+        )
+        self.assertEqual(["1.3.9", "1.5.0"], self.select("1.*,!=1.4.*"))
+
+    def test_compatible(self):
+        """Ensure ~= and ^ stop at the next significant version"""
+        self.assertEqual(["1.4.2"], self.select("~=1.4.1"))
+        self.assertEqual(["1.4.0", "1.4.2", "1.5.0"], self.select("~=1.4"))
+        self.assertEqual(["1.4.2", "1.5.0"], self.select("^1.4.1"))
+        self.assertEqual(["0.3.2"], self.select("^0.3.2"))
+
+    def test_invalid(self):
+        """Ensure malformed clauses are rejected"""
+        for constraint in (">=x", "1.2.3.*", ">=1.*", "~=1", "=>1.0"):
+            with self.assertRaises(VersionError, msg=constraint):
+                VersionRange(constraint)
@@ -0,0 +1,92 @@
+from unittest import mock
+
+from tagversion.commitindex import CommitIndex
+from tagversion.contains import ContainingVersions, sort_versions
+from tagversion.exceptions import ObjectError
+from tagversion.refs import RefReader
+
+from .utils import RepoTestCase, git
+
+
+class ContainingVersionsTestCase(RepoTestCase):
+    command = ContainingVersions
+    command_args = dict(component=None, releases=False)
+
+    def setUp(self):
+        super().setUp()
+
+        # the fix is merged into main after 1.0.0 and tagged on its branch first
+        self.base = self.commit("first")
+        git(self.path, "tag", "-a", "-m", "release", "1.0.0")
+        git(self.path, "tag", "api/1.0.0")
+
+        git(self.path, "checkout", "-q", "-b", "fix")
+        self.fix = self.commit("fix")
+        git(self.path, "tag", "1.0.1rc1")
+
+        git(self.path, "checkout", "-q", "main")
+        self.commit("second")
+        git(self.path, "tag", "1.1.0")
+        git(self.path, "merge", "-q", "--no-ff", "-m", "merge", "fix")
+        git(self.path, "tag", "-a", "-m", "release", "1.2.0")
+        git(self.path, "tag", "api/1.1.0")
+        git(self.path, "tag", "api/internal/0.1.0")
+        git(self.path, "tag", "latest")
+
+        self.chdir()
+
+    def test_sort_versions(self):
+        """Ensure tags are ordered by precedence and non-versions are dropped"""
+        names = ["1.10.0", "latest", "1.2.0", "1.2.0rc10", "1.2.0rc9"]
+
+        self.assertEqual(
+            ["1.2.0rc9", "1.2.0rc10", "1.2.0", "1.10.0"], sort_versions(names)
+        )
+        self.assertEqual(["1.2.0", "1.10.0"], sort_versions(names, releases=True))
+
+    def test_matches_git(self):
+        """Ensure the index finds the same tags as git tag --contains"""
+        index = CommitIndex(RefReader(self.path))
+        self.addCleanup(index.close)
+
+        for commit in (self.base, self.fix, "1.1.0", "HEAD"):
+            oid = git(self.path, "rev-parse", commit + "^{commit}")
+            self.assertEqual(
+                sorted(git(self.path, "tag", "--contains", oid).splitlines()),
+                sorted(index.contains(oid)),
+            )
+
+    def test_run(self):
+        """Ensure the containing versions are printed in order of precedence"""
+        status, lines = self.run_command(commit=self.fix)
+
+        self.assertEqual(0, status)
+        self.assertEqual(
+            ["1.0.1rc1", "1.2.0", "api/1.1.0", "api/internal/0.1.0"], lines
+        )
+
+    def test_run_filters(self):
+        """Ensure versions can be restricted to releases and to a component"""
+        self.assertEqual(
+            (0, ["1.2.0", "api/1.1.0", "api/internal/0.1.0"]),
+            self.run_command(commit=self.fix, releases=True),
+        )
+        self.assertEqual(
+            (0, ["api/1.0.0", "api/1.1.0"]),
+            self.run_command(commit=self.base, component="api"),
+        )
+
+    def test_git_fallback(self):
+        """Ensure git answers when the index can not be used"""
+        with mock.patch.object(CommitIndex, "contains", side_effect=ObjectError("x")):
+            self.assertEqual(
+                (0, ["api/1.0.0", "api/1.1.0"]),
+                self.run_command(commit=self.base, component="api"),
+            )
+
+    def test_unknown_commit(self):
+        """Ensure an unknown commit is reported"""
+        with mock.patch("tagversion.contains.print_error") as print_error_mock:
+            self.assertEqual((1, []), self.run_command(commit="nope"))
+
+        print_error_mock.assert_called_once()
@@ -0,0 +1,195 @@
+
+from tagversion.describe import Describer, describe_head, group_by_component
+from tagversion.refs import RefReader
+from tagversion.snapshot import (
+    DESCRIBE_GIT,
+    DESCRIBE_NATIVE,
+    describe_components,
+    get_describe,
+)
+
+from .utils import RepoTestCase, git
+
+BASE_DATE = 1600000000
+
+
+class DescribeTestCase(RepoTestCase):
+    def setUp(self):
+        super().setUp()
+
+        # a history with merges, clock skew, commits sharing a timestamp and
+        # both annotated and lightweight tags
+        self.commits = [self.commit("root", date=BASE_DATE + 1000)]
+        git(self.path, "tag", "-a", "-m", "root", "0.0.1")
+        self.commits.append(self.commit("second", date=BASE_DATE + 1000))
+
+        git(self.path, "checkout", "-q", "-b", "feature")
+        self.commits.append(self.commit("feature 1", date=BASE_DATE + 1060))
+        git(self.path, "tag", "0.1.0rc1")
+        self.commits.append(self.commit("feature 2", date=BASE_DATE + 900))
+
+        git(self.path, "checkout", "-q", "main")
+        self.commits.append(self.commit("main 1", date=BASE_DATE + 1060))
+        git(self.path, "tag", "-a", "-m", "api", "api/1.0.0")
+        self.commits.append(self.commit("main 2", date=BASE_DATE + 1200))
+        git(
+            self.path,
+            "merge",
+            "-q",
+            "--no-ff",
+            "-m",
+            "merge",
+            "feature",
+            env={"GIT_COMMITTER_DATE": "{} +0000".format(BASE_DATE + 1300)},
+        )
+        self.commits.append(git(self.path, "rev-parse", "HEAD"))
+        self.commits.append(self.commit("main 3", date=BASE_DATE + 1300))
+
+    def assertMatchesGit(self):
+        describer = Describer(RefReader(self.path))
+
+        for commit in self.commits:
+            self.assertEqual(
+                git(self.path, "describe", "--tags", "--always", commit),
+                describer.describe(commit),
+            )
+
+    def test_loose_objects(self):
+        """Ensure loose objects are described like git describe"""
+        self.assertMatchesGit()
+
+    def test_packed_objects(self):
+        """Ensure packed objects, packed refs and the commit-graph give the same result"""
+        git(self.path, "gc", "-q")
+        git(self.path, "commit-graph", "write", "--reachable")
+
+        self.assertMatchesGit()
+
+    def test_describe_head(self):
+        """Ensure the exact match is only returned on a tagged commit"""
+        refs = RefReader(self.path)
+
+        describe, exact_match = describe_head(refs)
+        self.assertEqual(git(self.path, "describe", "--tags"), describe)
+        self.assertIsNone(exact_match)
+
+        git(self.path, "tag", "1.0.0")
+
+        self.assertEqual(("1.0.0", "1.0.0"), describe_head(refs))
+
+    def test_untagged(self):
+        """Ensure the abbreviated commit is returned when there are no tags"""
+        for name in git(self.path, "tag", "--list").splitlines():
+            git(self.path, "tag", "-d", name)
+
+        self.assertEqual(
+            git(self.path, "describe", "--tags", "--always"),
+            describe_head(RefReader(self.path))[0],
+        )
+
+
+class ComponentsTestCase(RepoTestCase):
+    def setUp(self):
+        super().setUp()
+
+        # interleaved component tags, with more `web` tags than git keeps as
+        # candidates so that one component gives up while the others carry on
+        date = BASE_DATE
+        self.commits = []
+        for i in range(14):
+            date += 60
+            self.commits.append(self.commit("commit {}".format(i), date=date))
+
+            if i in (1, 6):
+                git(self.path, "tag", "-a", "-m", "api", "api/1.{}.0".format(i))
+
+            if i > 1:
+                git(self.path, "tag", "web/0.{}.0".format(i))
+
+            if i == 3:
+                git(self.path, "tag", "0.0.{}".format(i))
+                git(self.path, "tag", "deploy/prod/2.0.{}".format(i))
+
+        self.commits.append(self.commit("untagged", date=date + 60))
+
+        self.chdir()
+
+    def git_describe(self, component, commit="HEAD"):
+        return git(
+            self.path,
+            "describe",
+            "--tags",
+            "--always",
+            "--match",
+            "{}/*".format(component),
+            "--exclude",
+            "{}/*/*".format(component),
+            commit,
+        )
+
+    def test_group_by_component(self):
+        """Ensure tags are indexed by the prefix before the last slash"""
+        self.assertEqual(
+            {"api": ["api/1.0.0"], "deploy/prod": ["deploy/prod/2.0.0"]},
+            group_by_component(["0.0.1", "api/1.0.0", "deploy/prod/2.0.0"]),
+        )
+
+    def test_matches_git(self):
+        """Ensure every component is described like git describe --match"""
+        describer = Describer(RefReader(self.path))
+
+        for commit in self.commits:
+            components = describer.describe_components(commit)
+
+            self.assertEqual({"api", "deploy/prod", "web"}, set(components))
+            for component, (describe, _is_tagged) in components.items():
+                self.assertEqual(self.git_describe(component, commit), describe)
+
+    def test_single_group_unchanged(self):
+        """Ensure the full tag set still matches plain git describe"""
+        describer = Describer(RefReader(self.path))
+
+        for commit in self.commits:
+            self.assertEqual(
+                git(self.path, "describe", "--tags", "--always", commit),
+                describer.describe(commit),
+            )
+
+    def test_engines_agree(self):
+        """Ensure the git fallback and the single walk give the same map"""
+        git(self.path, "checkout", "-q", self.commits[6])
+
+        native = describe_components(RefReader(self.path), engine=DESCRIBE_NATIVE)
+
+        self.assertEqual(
+            native, describe_components(RefReader(self.path), engine=DESCRIBE_GIT)
+        )
+        self.assertEqual(("api/1.6.0", True), native["api"])
+        self.assertFalse(native["deploy/prod"][1])
+
+    def test_component_scoped(self):
+        """Ensure a component ignores nearer tags of other components"""
+        git(self.path, "tag", "deploy/9.0.0", self.commits[0])
+
+        for component in ("api", "deploy", "web"):
+            describer = Describer(RefReader(self.path), component=component)
+
+            for commit in self.commits:
+                self.assertEqual(
+                    self.git_describe(component, commit), describer.describe(commit)
+                )
+
+    def test_component_exact_match(self):
+        """Ensure the exact match only considers the component's tags"""
+        git(self.path, "checkout", "-q", self.commits[6])
+        refs = RefReader(self.path)
+
+        for engine in (DESCRIBE_GIT, DESCRIBE_NATIVE):
+            self.assertEqual(
+                ("api/1.6.0", "api/1.6.0"),
+                get_describe(refs, engine=engine, component="api"),
+            )
+            self.assertEqual(
+                (self.git_describe("deploy/prod"), None),
+                get_describe(refs, engine=engine, component="deploy/prod"),
+            )
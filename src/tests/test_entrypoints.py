@@ -0,0 +1,108 @@
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+import tagversion
+from tagversion.entrypoints import get_subcommand
+
+# modules only needed by other subcommands or by the native describe engine
+DEFERRED_MODULES = (
+    "concurrent.futures",
+    "tagversion.api",
+    "tagversion.at",
+    "tagversion.client",
+    "tagversion.changed",
+    "tagversion.commitgraph",
+    "tagversion.contains",
+    "tagversion.constraints",
+    "tagversion.describe",
+    "tagversion.listing",
+    "tagversion.objects",
+    "tagversion.scan",
+    "tagversion.serve",
+    "tagversion.tagindex",
+    "tagversion.watch",
+    "tagversion.write",
+)
+
+# about twice what the imports take with compiled sources
+STARTUP_BUDGET_US = 150000
+
+
+class StartupTestCase(TestCase):
+    def get_env(self):
+        return dict(
+            os.environ,
+            PYTHONPATH=os.path.dirname(os.path.dirname(tagversion.__file__)),
+        )
+
+    def get_import_times(self):
+        """
+        Returns the cumulative import time of each module imported to print the version
+        """
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-c",
+                "import tagversion.entrypoints, tagversion.git",
+            ],
+            env=self.get_env(),
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        ).stderr
+
+        times = {}
+        for line in output.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+
+        return times
+
+    def test_get_subcommand(self):
+        """Ensure the subcommand is only read from the first argument"""
+        self.assertEqual("version", get_subcommand([]))
+        self.assertEqual("version", get_subcommand(["--format", "docker"]))
+        self.assertEqual("write", get_subcommand(["write", "--no-cache", "setup.py"]))
+        self.assertEqual("list", get_subcommand(["--help", "list"]))
+
+        # option values are not subcommands
+        self.assertEqual("version", get_subcommand(["--bump", "-m", "list"]))
+        self.assertEqual("version", get_subcommand(["--format", "write"]))
+
+    def test_deferred_imports(self):
+        """Ensure printing the version does not import other subcommands' modules"""
+        times = self.get_import_times()
+
+        self.assertIn("tagversion.git", times)
+        self.assertEqual([], [x for x in DEFERRED_MODULES if x in times])
+
+        # and against sys.modules, which does not rely on parsing the timings
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, tagversion.entrypoints, tagversion.git; print(*sys.modules)",
+            ],
+            env=self.get_env(),
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        ).stdout
+
+        self.assertEqual([], [x for x in DEFERRED_MODULES if x in output.split()])
+
+    def test_startup_budget(self):
+        """Ensure the modules needed to print the version import within the budget"""
+        times = self.get_import_times()
+
+        self.assertLess(
+            times["tagversion.entrypoints"] + times["tagversion.git"], STARTUP_BUDGET_US
+        )
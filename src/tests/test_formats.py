@@ -0,0 +1,94 @@
+import contextlib
+import io
+from unittest import TestCase, mock
+
+from tagversion.exceptions import VersionError
+from tagversion.formats import (
+    OUTPUT_ENV,
+    OUTPUT_EXPORT,
+    OutputFormat,
+    format_output,
+    parse_formats,
+)
+from tagversion.git import GitVersion
+from tagversion.version import Version
+
+
+class FormatsTestCase(TestCase):
+    def setUp(self):
+        self.version = Version.parse("api/1.2.3-rc1")
+
+    def test_parse_formats(self):
+        """Ensure built-in formats and templates are split on top-level commas"""
+        formats = parse_formats("default,docker,{major},{minor},short={major}.{minor}")
+
+        self.assertEqual(
+            ["default", "docker", "template1", "template2", "short"],
+            [x.name for x in formats],
+        )
+        self.assertEqual(
+            ["api/1.2.3-rc1", "api-1.2.3-rc1", "1", "2", "1.2"],
+            [x.render(self.version) for x in formats],
+        )
+
+    def test_template(self):
+        """Ensure templates render any version field, missing fields as empty"""
+        output_format = OutputFormat("t", "{prefix}:{major:03}{build}{patch!r}")
+
+        self.assertEqual("api:0013", output_format.render(self.version))
+
+    def test_invalid(self):
+        """Ensure unknown formats and fields are reported"""
+        for value in ("nope", "{nope}", "{major", ""):
+            with self.assertRaises(VersionError):
+                parse_formats(value)
+
+    def test_output(self):
+        """Ensure env and export output name a variable after each format"""
+        rendered = [
+            (x, x.render(self.version)) for x in parse_formats("default,short={major}")
+        ]
+
+        self.assertEqual("api/1.2.3-rc1\n1", format_output(rendered))
+        self.assertEqual(
+            "TAG_VERSION_DEFAULT=api/1.2.3-rc1\nTAG_VERSION_SHORT=1",
+            format_output(rendered, output=OUTPUT_ENV),
+        )
+        self.assertEqual(
+            "export TAG_VERSION_DEFAULT=api/1.2.3-rc1\nexport TAG_VERSION_SHORT=1",
+            format_output(rendered, output=OUTPUT_EXPORT),
+        )
+
+    @mock.patch("tagversion.git.GitVersion.is_clean", new_callable=mock.PropertyMock)
+    @mock.patch("tagversion.git.GitVersion.get_git_tag_version")
+    def test_run(self, version_mock, is_clean_mock):
+        """Ensure every format is printed from a single version lookup"""
+        version_mock.return_value = "1.2.3"
+
+        args = mock.Mock(
+            all_components=False,
+            build=None,
+            bump=False,
+            calver=False,
+            force=False,
+            format="default,docker,json",
+            output=OUTPUT_EXPORT,
+            prefix=None,
+            prefix_separator=None,
+            rc=False,
+            semver=False,
+            set=None,
+        )
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(0, GitVersion(args).run())
+
+        lines = output.getvalue().splitlines()
+        self.assertEqual(3, len(lines))
+        self.assertEqual("export TAG_VERSION_DOCKER=1.2.3", lines[1])
+        self.assertTrue(lines[2].startswith("export TAG_VERSION_JSON='{"))
+        version_mock.assert_called_once_with()
+
+        # the working copy only matters when a tag is created
+        is_clean_mock.assert_not_called()
@@ -1,17 +1,22 @@
+import contextlib
+import io
+from datetime import datetime
 from unittest import TestCase, mock
 
 from tagversion.git import GitVersion, is_rc
 from tagversion.version import Version
 
+from .utils import RepoTestCase, git
+
 RC_VERSION = "0.1.28rc1-1-g4fafe09-feature--skip-prefix-rows"
 
 
-@mock.patch("tagversion.git.sh")
 @mock.patch("tagversion.git.GitVersion.get_git_tag_version")
 class GitTestCase(TestCase):
     def _get_args(self, **kwargs):
         args = mock.Mock(
             calver=False,
+            component=None,
             major=False,
             minor=False,
             patch=False,
@@ -28,15 +33,11 @@ class GitTestCase(TestCase):
         return args
 
     def _setup_version(self, *mocks, version=RC_VERSION):
-        version_mock = mocks[-2]
+        version_mock = mocks[-1]
         version_mock.return_value = version
 
         return version_mock
 
-    def _setup_git_describe(self, *mocks, version: str) -> None:
-        sh_mock = mocks[-1]
-        sh_mock.git.return_value.stdout = version.encode("utf8")
-
     def test_bump_no_tag(self, *mocks):
         """
         Ensures bumping when there is no tag produces 0.0.1
@@ -51,6 +52,20 @@ class GitTestCase(TestCase):
 
         self.assertEqual("0.0.1", str(new_version))
 
+    def test_bump_no_component_tag(self, *mocks):
+        """
+        Ensures the first bump of a component is prefixed with its name
+        """
+        self._setup_version(*mocks, version="000000-master")
+
+        args = self._get_args(patch=True, component="api")
+
+        git_version = GitVersion(args)
+
+        new_version = git_version.bump()
+
+        self.assertEqual("api/0.0.1", str(new_version))
+
     def test_bump_rc(self, *mocks):
         """
         Ensures running bump results in a stable, non-rc, release
@@ -155,9 +170,9 @@ class GitTestCase(TestCase):
 
         new_version = git_version.check_set()
 
-        self.assertEqual("1", new_version.major)
-        self.assertEqual("2", new_version.minor)
-        self.assertEqual("3", new_version.patch)
+        self.assertEqual(1, new_version.major)
+        self.assertEqual(2, new_version.minor)
+        self.assertEqual(3, new_version.patch)
 
     def test_stringify_change_prefix_separator(self, *mocks):
         """
@@ -173,3 +188,64 @@ class GitTestCase(TestCase):
         new_version_s = git_version.stringify(git_version.version)
 
         self.assertEqual("TestModule-0.0.1-16-g5befeb2", new_version_s)
+
+    def test_get_tag_args(self, *mocks):
+        """Ensure the tag message is passed to git as a single argument"""
+        args = self._get_args(message='release "one"; rm -rf /')
+        git_version = GitVersion(args)
+
+        self.assertEqual(
+            ["tag", "-a", "-m", 'release "one"; rm -rf /', "1.2.3"],
+            git_version.get_tag_args("1.2.3"),
+        )
+
+
+class CalverBumpTestCase(RepoTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.commit("first")
+        git(self.path, "tag", "-a", "-m", "release", "201809.05.3")
+        self.commit("second")
+
+        self.chdir()
+
+    @mock.patch("tagversion.git.datetime")
+    def test_run(self, datetime_mock):
+        """Ensure a calver bump tags HEAD with the next patch of the day"""
+        datetime_mock.now.return_value = datetime(2018, 9, 5)
+
+        args = mock.Mock(
+            all_components=False,
+            branch=True,
+            build=None,
+            bump=True,
+            cache=False,
+            calver=True,
+            calver_format="%Y%m.%d",
+            component=None,
+            daemon=False,
+            describe="git",
+            display_prefix=True,
+            force=True,
+            format="default",
+            major=False,
+            message="release",
+            minor=False,
+            output="text",
+            patch=True,
+            prefix=None,
+            prefix_separator=None,
+            rc=False,
+            semver=False,
+            set=None,
+        )
+
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            self.assertEqual(0, GitVersion(args).run())
+
+        self.assertEqual("201809.5.4\n", stdout.getvalue())
+        self.assertEqual(
+            "201809.5.4", git(self.path, "describe", "--tags", "--exact-match")
+        )
@@ -0,0 +1,74 @@
+from unittest import mock
+
+from tagversion.listing import ListVersions
+
+from .utils import RepoTestCase, git
+
+TAGS = [
+    "1.3.0",
+    "1.4.0rc1",
+    "1.4.0",
+    "1.10.0",
+    "2.0.0",
+    "latest",
+    "api/1.4.0",
+    "api/1.5.0rc1",
+    "api/1.5.0",
+    "api/2.0.0",
+    "api/internal/1.6.0",
+    "web/0.1.0",
+]
+
+
+class ListVersionsTestCase(RepoTestCase):
+    command = ListVersions
+    command_args = dict(
+        all_components=False, component=None, constraint="", kind=None, latest=False
+    )
+
+    def setUp(self):
+        super().setUp()
+
+        self.commit("first")
+        for name in TAGS:
+            git(self.path, "tag", name)
+
+        # packed and loose tags are read alike
+        git(self.path, "pack-refs", "--all")
+        git(self.path, "tag", "1.4.1")
+
+        self.chdir()
+
+    def test_ordered(self):
+        """Ensure unprefixed versions are listed by precedence, not by name"""
+        self.assertEqual(
+            (0, ["1.3.0", "1.4.0rc1", "1.4.0", "1.4.1", "1.10.0", "2.0.0"]),
+            self.run_command(),
+        )
+
+    def test_constraint(self):
+        """Ensure the highest release of a component within a range is found"""
+        self.assertEqual(
+            (0, ["api/1.5.0"]),
+            self.run_command(
+                constraint=">=1.4,<2", component="api", kind="releases", latest=True
+            ),
+        )
+        self.assertEqual(
+            (0, ["api/1.5.0rc1"]),
+            self.run_command(constraint="==1.5.0", component="api", kind="rc"),
+        )
+
+    def test_all_components(self):
+        """Ensure every prefix is listed, unprefixed versions first"""
+        self.assertEqual(
+            (0, ["2.0.0", "api/2.0.0", "api/internal/1.6.0", "web/0.1.0"]),
+            self.run_command(all_components=True, latest=True),
+        )
+
+    def test_invalid_constraint(self):
+        """Ensure a malformed constraint is reported"""
+        with mock.patch("tagversion.listing.print_error") as print_error_mock:
+            self.assertEqual((1, []), self.run_command(constraint=">=x"))
+
+        print_error_mock.assert_called_once()
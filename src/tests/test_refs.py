@@ -0,0 +1,84 @@
+import os
+import tempfile
+
+from tagversion.exceptions import RefError
+from tagversion.refs import RefReader, read_packed_refs
+
+from .utils import RepoTestCase, git
+
+
+class RefReaderTestCase(RepoTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.commit("first")
+        git(self.path, "tag", "0.0.1")
+        git(self.path, "tag", "-a", "-m", "annotated", "api/0.1.0")
+
+    def test_branch(self):
+        """Ensure the branch matches rev-parse --abbrev-ref HEAD"""
+        git(self.path, "checkout", "-q", "-b", "feature/thing")
+
+        self.assertEqual("feature/thing", RefReader(self.path).branch())
+
+    def test_branch_detached(self):
+        """Ensure a detached HEAD is reported like git does"""
+        git(self.path, "checkout", "-q", "--detach")
+
+        self.assertEqual("HEAD", RefReader(self.path).branch())
+
+    def test_head(self):
+        """Ensure HEAD resolves to the commit"""
+        self.assertEqual(
+            git(self.path, "rev-parse", "HEAD"), RefReader(self.path).head()
+        )
+
+    def test_tags_loose_and_packed(self):
+        """Ensure loose and packed tags are listed like git tag --list"""
+        git(self.path, "pack-refs", "--all")
+        git(self.path, "tag", "0.0.2")
+
+        refs = RefReader(self.path)
+
+        self.assertEqual(git(self.path, "tag", "--list").splitlines(), refs.tags())
+        self.assertEqual(["0.0.1", "0.0.2"], refs.tags("0.0.*"))
+
+    def test_tags_prefix(self):
+        """Ensure only the tags under the prefix are read"""
+        git(self.path, "tag", "api/0.2.0")
+        git(self.path, "pack-refs", "--all")
+        git(self.path, "tag", "api/0.3.0")
+        git(self.path, "tag", "apiary/1.0.0")
+
+        self.assertEqual(
+            ["api/0.1.0", "api/0.2.0", "api/0.3.0"],
+            sorted(RefReader(self.path).tag_refs("api/")),
+        )
+
+    def test_packed_peeled(self):
+        """Ensure annotated tags keep the peeled commit from packed-refs"""
+        git(self.path, "pack-refs", "--all")
+
+        packed = read_packed_refs(os.path.join(self.path, ".git", "packed-refs"))
+
+        self.assertEqual(
+            git(self.path, "rev-parse", "HEAD"), packed["refs/tags/api/0.1.0"].peeled
+        )
+
+    def test_worktree(self):
+        """Ensure a linked worktree reads its own HEAD and the shared tags"""
+        worktree = os.path.join(self._tmp.name, "worktree")
+        git(self.path, "worktree", "add", "-q", "-b", "other", worktree)
+
+        refs = RefReader(os.path.join(worktree))
+
+        self.assertEqual("other", refs.branch())
+        self.assertEqual(["0.0.1", "api/0.1.0"], refs.tags())
+
+    def test_not_a_repository(self):
+        """Ensure a RefError is raised outside a repository"""
+        with tempfile.TemporaryDirectory() as path:
+            os.environ["GIT_DIR"] = os.path.join(path, "missing")
+
+            with self.assertRaises(RefError):
+                RefReader(path)
@@ -0,0 +1,129 @@
+import functools
+import threading
+import time
+from unittest import TestCase
+
+from tagversion.exceptions import GitError
+from tagversion.runner import MAX_GATHER_THREADS, GitRunner, gather, get_runner
+
+from .utils import RepoTestCase, git
+
+
+class RunnerTestCase(RepoTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.first = self.commit("first")
+        git(self.path, "tag", "-a", "-m", "release", "1.0.0")
+        self.second = self.commit("second")
+
+        self.runner = GitRunner(cwd=self.path)
+        self.addCleanup(self.runner.close)
+
+    def test_run(self):
+        """Ensure output is returned and every call is timed"""
+        self.assertEqual(self.second, self.runner.run("rev-parse", "HEAD").strip())
+
+        call = self.runner.calls[-1]
+        self.assertEqual(("rev-parse", "HEAD"), call.args)
+        self.assertGreater(call.seconds, 0)
+
+    def test_error(self):
+        """Ensure a failing command raises with git's exit status"""
+        with self.assertRaises(GitError) as context:
+            self.runner.run("describe", "--exact-match", "HEAD")
+
+        self.assertEqual(128, context.exception.returncode)
+        self.assertIn("no tag exactly matches", context.exception.stderr)
+
+    def test_iter_lines(self):
+        """Ensure output is streamed and git is stopped when the iterator is closed"""
+        lines = self.runner.iter_lines("log", "--format=%H")
+
+        self.assertEqual(self.second, next(lines))
+        lines.close()
+
+        self.assertEqual(
+            [self.second, self.first],
+            list(self.runner.iter_lines("log", "--format=%H")),
+        )
+
+    def test_deadline(self):
+        """Ensure commands still running at the deadline are stopped"""
+        runner = GitRunner(executable="sleep", deadline=time.monotonic() + 0.2)
+
+        start = time.monotonic()
+        with self.assertRaisesRegex(GitError, "timed out"):
+            runner.run("5")
+
+        with self.assertRaisesRegex(GitError, "timed out"):
+            list(runner.iter_lines("5"))
+
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_check_object(self):
+        """Ensure revisions are peeled by one long-lived batch process"""
+        header = self.runner.check_object("1.0.0^{commit}")
+
+        self.assertEqual((self.first, "commit"), (header.oid, header.type))
+
+        process = self.runner._batches[next(iter(self.runner._batches))].process
+
+        self.assertIsNone(self.runner.check_object("2.0.0"))
+        self.assertEqual(1, len(self.runner._batches))
+        self.assertIsNone(process.poll())
+
+    def test_shared_runner(self):
+        """Ensure the shared runner follows the current directory"""
+        self.chdir()
+
+        runner = get_runner()
+        self.assertIs(runner, get_runner())
+        self.assertEqual(self.first, runner.check_object("1.0.0^{commit}").oid)
+
+
+class GatherTestCase(TestCase):
+    def test_results_in_order(self):
+        """Ensure results are returned in the order of the calls"""
+        for concurrent in (True, False):
+            self.assertEqual(
+                [1, 2, 3],
+                gather(lambda: 1, lambda: 2, lambda: 3, concurrent=concurrent),
+            )
+
+    def test_concurrent(self):
+        """Ensure the calls run at the same time"""
+        barrier = threading.Barrier(2, timeout=5)
+
+        self.assertEqual([0, 1], sorted(gather(barrier.wait, barrier.wait)))
+
+    def test_bounded(self):
+        """Ensure the calls share a bounded number of threads"""
+        idents = set()
+
+        def call(x):
+            idents.add(threading.get_ident())
+            time.sleep(0.01)
+
+            return x
+
+        calls = [functools.partial(call, x) for x in range(MAX_GATHER_THREADS * 3)]
+
+        self.assertEqual(list(range(len(calls))), gather(*calls))
+        self.assertLessEqual(len(idents), MAX_GATHER_THREADS)
+
+    def test_error(self):
+        """Ensure an error is raised after every call has finished"""
+        finished = threading.Event()
+
+        def fail():
+            raise GitError("failed")
+
+        def slow():
+            finished.wait(0.1)
+            finished.set()
+
+        with self.assertRaises(GitError):
+            gather(fail, slow)
+
+        self.assertTrue(finished.is_set())
@@ -0,0 +1,92 @@
+import contextlib
+import io
+import json
+import os
+from unittest import mock
+
+from tagversion.api import VersionOptions
+from tagversion.scan import ScanRepositories, find_repositories, scan_repository
+
+from .utils import RepoTestCase, git
+
+
+class ScanTestCase(RepoTestCase):
+    command = ScanRepositories
+
+    def setUp(self):
+        super().setUp()
+
+        self.root = self._tmp.name
+        self.command_args = dict(
+            branch=True,
+            cache=False,
+            describe="git",
+            directory=self.root,
+            format="default",
+            jobs=2,
+            submodules=False,
+            timeout=None,
+        )
+
+        self.commit("first")
+        git(self.path, "tag", "-a", "-m", "release", "1.0.0")
+
+        self.other = os.path.join(self.root, "group", "other")
+        git(self.root, "init", "-q", "-b", "main", self.other)
+
+        # a submodule's `.git` is a file pointing at the git directory
+        self.nested = os.path.join(self.path, "vendor", "lib")
+        os.makedirs(self.nested)
+        with open(os.path.join(self.nested, ".git"), "w") as fh:
+            fh.write("gitdir: ../../.git/modules/lib\n")
+
+    def test_find_repositories(self):
+        """Ensure working copies are found without looking inside them by default"""
+        self.assertEqual([self.other, self.path], list(find_repositories(self.root)))
+        self.assertEqual(
+            [self.other, self.path, self.nested],
+            list(find_repositories(self.root, submodules=True)),
+        )
+
+    def test_scan_repository(self):
+        """Ensure a repository without tags is reported with the reason"""
+        options = VersionOptions(cache=False)
+
+        self.assertEqual(
+            {"path": self.path, "version": "1.0.0"},
+            scan_repository(self.path, "default", options),
+        )
+
+        result = scan_repository(self.other, "default", options)
+        self.assertIsNone(result["version"])
+        self.assertIn("error", result)
+
+    def test_scan_repository_os_error(self):
+        """Ensure an OS error, e.g. git missing, is reported for that repository"""
+        with mock.patch(
+            "tagversion.scan.get_version", side_effect=PermissionError("denied")
+        ):
+            result = scan_repository(self.path, "default", VersionOptions())
+
+        self.assertEqual(
+            {"path": self.path, "version": None, "error": "denied"}, result
+        )
+
+    def test_run(self):
+        """Ensure one JSON object is printed per repository"""
+        status, lines = self.run_command(format="{major}.{minor}")
+
+        self.assertEqual(0, status)
+
+        results = [json.loads(x) for x in lines]
+        self.assertEqual(
+            [(self.other, None), (self.path, "1.0")],
+            sorted((x["path"], x["version"]) for x in results),
+        )
+
+    def test_invalid(self):
+        """Ensure a missing directory or an invalid format is an error"""
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            self.assertEqual((1, []), self.run_command(format="{x}"))
+            self.assertEqual((1, []), self.run_command(directory=self.path + "x"))
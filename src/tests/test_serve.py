@@ -0,0 +1,161 @@
+import contextlib
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+from unittest import mock
+
+from tagversion import api
+from tagversion.client import SOCKET_ENV, query
+from tagversion.git import GitVersion
+from tagversion.serve import VersionServer, is_listening
+from tagversion.watch import InotifyWatcher, StatWatcher, get_watcher
+
+from .utils import RepoTestCase, git
+
+
+class WatcherTestCase(RepoTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.commit("first")
+
+    def check(self, watcher):
+        self.addCleanup(watcher.close)
+
+        self.assertFalse(watcher.changed())
+
+        git(self.path, "tag", "-a", "-m", "release", "api/1.0.0")
+        self.assertTrue(watcher.changed())
+        self.assertFalse(watcher.changed())
+
+        self.commit("second")
+        self.assertTrue(watcher.changed())
+
+        git(self.path, "checkout", "-q", "-b", "feature")
+        self.assertTrue(watcher.changed())
+
+        # `.git/index` changes, the version does not
+        with open(os.path.join(self.path, "file"), "w") as fh:
+            fh.write("change\n")
+        git(self.path, "add", "file")
+        self.assertFalse(watcher.changed())
+
+    def test_stat(self):
+        """Ensure HEAD, branch and tag changes are seen by comparing stat calls"""
+        self.check(StatWatcher(self.path))
+
+    def test_inotify(self):
+        """Ensure HEAD, branch and tag changes are seen through inotify"""
+        watcher = get_watcher(self.path)
+        if not isinstance(watcher, InotifyWatcher):
+            watcher.close()
+            self.skipTest("inotify is unavailable")
+
+        self.check(watcher)
+
+
+class ServerTestCase(RepoTestCase):
+    def setUp(self):
+        super().setUp()
+
+        api.clear_cache()
+        self.addCleanup(api.clear_cache)
+
+        self.commit("first")
+        git(self.path, "tag", "-a", "-m", "release", "1.0.0")
+
+        # unix socket paths are limited to about 100 bytes
+        socket_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(socket_dir.cleanup)
+        self.socket_path = os.path.join(socket_dir.name, "serve.sock")
+
+        self.server = VersionServer(self.socket_path, path=self.path)
+        self.addCleanup(self.server.server_close)
+
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.shutdown)
+
+    def test_query(self):
+        """Ensure the formats and options of a request are answered"""
+        self.assertTrue(is_listening(self.socket_path))
+        self.assertEqual({"output": "1.0.0"}, query(self.socket_path, {}))
+
+        request = {"format": "docker,{major}", "output": "env", "prefix": "app"}
+        self.assertEqual(
+            {"output": "TAG_VERSION_DOCKER=app-1.0.0\nTAG_VERSION_TEMPLATE1=1"},
+            query(self.socket_path, request),
+        )
+
+        self.assertIn("error", query(self.socket_path, {"format": "unknown"}))
+
+    def test_invalidated(self):
+        """Ensure responses are recomputed once a tag is created"""
+        self.assertEqual({"output": "1.0.0"}, query(self.socket_path, {}))
+
+        git(self.path, "tag", "-a", "-m", "release", "1.1.0")
+        self.commit("second")
+        git(self.path, "tag", "-a", "-m", "release", "1.2.0")
+
+        self.assertEqual({"output": "1.2.0"}, query(self.socket_path, {}))
+
+    def test_branch_name(self):
+        """Ensure each client's branch name is used and cached on its own"""
+        self.commit("second")
+
+        first = query(self.socket_path, {"branch_name": "feature/one"})
+        second = query(self.socket_path, {"branch_name": "feature/two"})
+
+        self.assertTrue(first["output"].endswith("-feature--one"), first)
+        self.assertTrue(second["output"].endswith("-feature--two"), second)
+
+    def test_invalid_request(self):
+        """Ensure anything but a JSON object is answered with an error"""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.socket_path)
+            sock.sendall(b"version please\n")
+
+            with sock.makefile("rb") as fh:
+                self.assertIn("error", json.loads(fh.readline()))
+
+    def test_version_daemon(self):
+        """Ensure `tag-version --daemon` prints the daemon's answer"""
+        os.environ[SOCKET_ENV] = self.socket_path
+
+        args = mock.Mock(
+            daemon=True,
+            all_components=False,
+            bump=False,
+            set=None,
+            rc=False,
+            semver=False,
+            calver=False,
+            format="{major}.{minor}",
+            output="text",
+            component=None,
+            branch=True,
+            build=None,
+            prefix=None,
+            prefix_separator=None,
+            display_prefix=True,
+        )
+
+        stdout = io.StringIO()
+        with mock.patch("tagversion.git.RepoSnapshot") as snapshot_mock:
+            with contextlib.redirect_stdout(stdout):
+                self.assertEqual(0, GitVersion(args).run())
+
+        self.assertEqual("1.0\n", stdout.getvalue())
+        snapshot_mock.collect.assert_not_called()
+
+        # the client's branch is sent along, the daemon's environment is its own
+        os.environ["GIT_BRANCH"] = "feature/one"
+        response = {"output": "1.0"}
+        with mock.patch("tagversion.client.query", return_value=response) as query_mock:
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(0, GitVersion(args).run())
+
+        self.assertEqual("feature/one", query_mock.call_args[0][1]["branch_name"])
@@ -0,0 +1,157 @@
+import contextlib
+import io
+import os
+from unittest import TestCase, mock
+
+from tagversion.git import GitVersion
+from tagversion.snapshot import STATUS_LIMIT, RepoSnapshot, get_status
+
+from .utils import RepoTestCase, git
+
+
+@mock.patch("tagversion.snapshot.get_status")
+@mock.patch("tagversion.snapshot.get_branch")
+@mock.patch("tagversion.snapshot.describe_tags")
+@mock.patch("tagversion.snapshot.describe_exact_match")
+class SnapshotTestCase(TestCase):
+    def _get_args(self, **kwargs):
+        args = mock.Mock(
+            branch=True,
+            build=None,
+            cache=False,
+            component=None,
+            describe="git",
+            calver=False,
+            calver_format="%Y%m.%d",
+            semver=True,
+            rc=True,
+            format="default",
+        )
+
+        for k, v in kwargs.items():
+            setattr(args, k, v)
+
+        return args
+
+    def test_collect_tagged(self, exact_mock, describe_mock, branch_mock, status_mock):
+        """Ensure the branch is not looked up when HEAD is tagged"""
+        exact_mock.return_value = "0.1.0"
+        describe_mock.return_value = "0.1.0"
+
+        snapshot = RepoSnapshot.collect()
+
+        self.assertEqual(RepoSnapshot(describe="0.1.0", is_tagged=True), snapshot)
+        branch_mock.assert_not_called()
+        status_mock.assert_not_called()
+
+    def test_collect_status(self, exact_mock, describe_mock, branch_mock, status_mock):
+        """Ensure the working copy status is gathered with the describe output"""
+        exact_mock.return_value = "0.1.0"
+        describe_mock.return_value = "0.1.0"
+        status_mock.return_value = [" M setup.py"]
+
+        for concurrent in (True, False):
+            snapshot = RepoSnapshot.collect(status=True, concurrent=concurrent)
+
+            self.assertEqual(
+                RepoSnapshot(describe="0.1.0", is_tagged=True, status=[" M setup.py"]),
+                snapshot,
+            )
+
+        self.assertEqual(2, status_mock.call_count)
+
+    def test_git_queried_once(
+        self, exact_mock, describe_mock, branch_mock, status_mock
+    ):
+        """Ensure every property shares a single set of git queries"""
+        exact_mock.return_value = None
+        describe_mock.return_value = "0.1.0rc1-2-g5bd60a7"
+        branch_mock.return_value = "feature/thing"
+        status_mock.return_value = ()
+
+        git_version = GitVersion(self._get_args())
+
+        self.assertEqual(True, git_version.is_clean)
+        self.assertEqual("0.1.0rc1-2-g5bd60a7-feature--thing", str(git_version.version))
+        self.assertTrue(git_version.is_rc)
+        self.assertTrue(git_version.is_semver)
+        git_version.bump()
+
+        self.assertEqual(1, exact_mock.call_count)
+        self.assertEqual(1, describe_mock.call_count)
+        self.assertEqual(1, branch_mock.call_count)
+        self.assertEqual(1, status_mock.call_count)
+
+    def test_version_is_copied(
+        self, exact_mock, describe_mock, branch_mock, status_mock
+    ):
+        """Ensure callers modifying the version do not change the cached one"""
+        exact_mock.return_value = "0.1.0"
+        describe_mock.return_value = "0.1.0"
+
+        git_version = GitVersion(self._get_args())
+
+        version = git_version.version
+        version.bump(bump_minor=True)
+
+        self.assertEqual("0.1.0", str(git_version.version))
+
+
+class StatusTestCase(RepoTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.chdir()
+
+    def write(self, filename, content="change\n"):
+        with open(os.path.join(self.path, filename), "w") as fh:
+            fh.write(content)
+
+    def test_unborn(self):
+        """Ensure a repository without commits lists its files"""
+        self.write("new.txt")
+
+        self.assertEqual(("?? new.txt",), get_status())
+
+    def test_clean(self):
+        """Ensure a clean working copy has no status"""
+        self.write("tracked.txt")
+        git(self.path, "add", "tracked.txt")
+        self.commit()
+
+        self.assertEqual((), get_status())
+
+        self.write("untracked.txt")
+        self.assertEqual(("?? untracked.txt",), get_status())
+
+        git(self.path, "config", "status.showUntrackedFiles", "no")
+        self.assertEqual((), get_status())
+
+    def test_tracked(self):
+        """Ensure untracked files are not looked for once a tracked file changed"""
+        self.write("tracked.txt")
+        git(self.path, "add", "tracked.txt")
+        self.commit()
+
+        self.write("tracked.txt", "other\n")
+        self.write("untracked.txt")
+
+        self.assertEqual((" M tracked.txt",), get_status())
+
+    def test_limit(self):
+        """Ensure only the first changes are read and shown"""
+        self.commit()
+        for i in range(STATUS_LIMIT * 3):
+            self.write("file{:02}.txt".format(i))
+
+        self.assertEqual(STATUS_LIMIT + 1, len(get_status()))
+
+        args = mock.Mock(branch=False, cache=False, component=None, describe="git")
+        output = io.StringIO()
+        with contextlib.redirect_stderr(output):
+            self.assertFalse(GitVersion(args).is_clean)
+
+        lines = output.getvalue().splitlines()
+        self.assertEqual(STATUS_LIMIT + 1, len(lines))
+        self.assertEqual("?? file00.txt", lines[0])
+        self.assertIn("only the first", lines[-1])
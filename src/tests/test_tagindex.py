@@ -0,0 +1,131 @@
+from datetime import datetime
+from unittest import TestCase, mock
+
+from tagversion.git import GitVersion
+from tagversion.tagindex import (
+    TagIndex,
+    index_listed,
+    parse_listed,
+    version_key,
+)
+from tagversion.version import Version
+
+from .test_version import PARSER_EXAMPLES
+
+TAGS = [
+    "0.9.9",
+    "1.0.0",
+    "1.0.0rc1",
+    "1.0.1rc2",
+    "1.0.1rc10",
+    "1.1.0rc1",
+    "api/2.0.0",
+    "api/2.1.0-rc1",
+    "latest",
+    "201809.05.1",
+    "201809.05.9",
+    "201809.05.10",
+    "201809.25.0",
+    "api/201809.05.3",
+]
+
+
+class TagIndexTestCase(TestCase):
+    def setUp(self):
+        self.index = TagIndex(TAGS)
+
+    def test_latest_release(self):
+        """Ensure releases are ordered by version, not by name"""
+        index = TagIndex(["1.9.0", "1.10.0", "1.2.0", "1.10.0rc1"])
+
+        self.assertEqual("1.10.0", index.latest_release().name)
+        self.assertEqual("api/2.0.0", self.index.latest_release("api").name)
+
+    def test_latest_rc(self):
+        """Ensure release candidates compare numerically"""
+        self.assertEqual("1.0.1rc10", self.index.latest_rc(1, 0).name)
+        self.assertEqual("1.1.0rc1", self.index.latest_rc(1, 1).name)
+        self.assertEqual("api/2.1.0-rc1", self.index.latest_rc(2, 1, "api").name)
+        self.assertIsNone(self.index.latest_rc(2, 0))
+
+    def test_latest_within(self):
+        """Ensure a release sorts after its release candidates"""
+        index = TagIndex(["1.0.0rc1", "1.0.0", "1.0.1rc1", "0.9.0"])
+
+        self.assertEqual("1.0.1rc1", index.latest_within(1, 0).name)
+        self.assertEqual("0.9.0", index.latest_within(0, 9).name)
+        self.assertIsNone(index.latest_within(1, 1))
+
+    def test_latest_calver(self):
+        """Ensure the patch of today's tags compares numerically"""
+        self.assertEqual("201809.05.10", self.index.latest_calver("201809.05").name)
+        self.assertEqual(3, self.index.latest_calver("201809.05", "api").patch)
+        self.assertIsNone(self.index.latest_calver("201809.06"))
+
+    @mock.patch("tagversion.git.datetime")
+    def test_next_calver_version(self, datetime_mock):
+        """Ensure the calver bump continues from the highest patch of the day"""
+        datetime_mock.now.return_value = datetime(2018, 9, 5)
+
+        args = mock.Mock(
+            calver=True,
+            calver_format="%Y%m.%d",
+            component=None,
+            display_prefix=True,
+            format="default",
+            major=False,
+            minor=False,
+            patch=True,
+            prefix=None,
+            prefix_separator=None,
+        )
+        git_version = GitVersion(args)
+        git_version._tag_index = self.index
+
+        current = Version.parse("201809.05.10")
+        new_version = git_version.bump(version=current)
+        self.assertEqual("201809.5.11", git_version.stringify(new_version))
+
+        # the tags written by a bump are found by the next one
+        git_version._tag_index = TagIndex(TAGS + ["201809.5.11"])
+        self.assertEqual("201809.5.12", str(git_version.bump(version=current)))
+
+        args.component = "api"
+        self.assertEqual("api/201809.5.4", str(git_version.bump(version=current)))
+
+        args.patch = False
+        datetime_mock.now.return_value = datetime(2018, 9, 6)
+        self.assertEqual("api/201809.6.0", str(git_version.bump(version=current)))
+
+    def test_parse_listed(self):
+        """Ensure the quick parse of version tags agrees with Version"""
+        names = list(PARSER_EXAMPLES) + TAGS + ["1.2.3-beta.2", "1.2.30rc1", "a/1.0.0"]
+        for name in names:
+            version = Version.parse_many([name], ignore_errors=True).__next__()
+            parsed = parse_listed(name)
+
+            if version is None or not version.is_semver:
+                self.assertIsNone(parsed, name)
+                continue
+
+            self.assertEqual(
+                (version.prefix, version_key(version)),
+                (
+                    parsed[0],
+                    parsed[1].key,
+                ),
+                name,
+            )
+
+    def test_between(self):
+        """Ensure a range of keys is found in both directions"""
+        tags = index_listed(TAGS)[""]
+
+        self.assertEqual(
+            ["1.0.0", "1.0.1rc2", "1.0.1rc10"],
+            [x.name for x in tags.between((1, 0, 0, True), (1, 1))],
+        )
+        self.assertEqual(
+            ["1.1.0rc1", "1.0.1rc10", "1.0.1rc2"],
+            [x.name for x in tags.between((1, 0, 1), (2,), reverse=True)],
+        )
@@ -1,6 +1,41 @@
+import random
 from unittest import TestCase, mock
 
-from tagversion.version import Version
+from tagversion.exceptions import VersionError
+from tagversion.tagindex import TagIndex
+from tagversion.version import SEMVER_RE, Version, parse_semver
+
+# strings where the order SEMVER_RE tries its alternatives decides the groups
+PARSER_EXAMPLES = (
+    "",
+    "1.2.3",
+    "1.2",
+    "api/1.2.3",
+    "a/b/1.2.3-rc1",
+    "/1.2.3",
+    "api/",
+    "201809.05.1",
+    "1.05.1",
+    "1.2.05",
+    "01.2.3",
+    "1.2.3rc10",
+    "1.2.3-",
+    "1.2.3+",
+    "1.2.3+build.1",
+    "1.2.3-rc.1+build..1",
+    "1.2.3-a_b",
+    "1.2.3-x.a_b",
+    "1_a",
+    "-",
+    "--",
+    "1.2.3\n",
+    "1.2.3\n\n",
+    "1.\n2.3",
+    "0.1.28rc1-1-g4fafe09-feature--skip-prefix-rows",
+    "4fafe09-master",
+)
+
+PARSER_ALPHABET = "0123456789.-+_/arZ\n"
 
 
 class VersionTestCase(TestCase):
@@ -213,3 +248,131 @@ class VersionTestCase(TestCase):
             "0.0.0-1234-6-gb57b5ca-env--dev-TestModule",
             version_s,
         )
+
+
+class ParserTestCase(TestCase):
+    def assertMatchesRegex(self, version_s):
+        matches = SEMVER_RE.match(version_s)
+
+        self.assertEqual(
+            matches.groupdict() if matches else None,
+            parse_semver(version_s),
+            "groups differ for {!r}".format(version_s),
+        )
+
+    def test_examples(self):
+        """Ensure the parser splits ambiguous strings exactly like SEMVER_RE"""
+        for version_s in PARSER_EXAMPLES:
+            self.assertMatchesRegex(version_s)
+
+    def test_random(self):
+        """Ensure random strings give the same groups as SEMVER_RE"""
+        rnd = random.Random(0)
+
+        for _ in range(20000):
+            length = rnd.randint(0, 16)
+            self.assertMatchesRegex(
+                "".join(rnd.choice(PARSER_ALPHABET) for _ in range(length))
+            )
+
+    def test_random_versions(self):
+        """Ensure version-like strings give the same groups as SEMVER_RE"""
+        rnd = random.Random(0)
+        parts = ("0", "1", "12", "05", "a", "rc1", "-", "x-y", "_", "1a")
+
+        for _ in range(20000):
+            self.assertMatchesRegex(
+                "".join(
+                    rnd.choice(parts) + rnd.choice(("", ".", ".", "-", "+", "/"))
+                    for _ in range(rnd.randint(1, 6))
+                )
+            )
+
+    def test_parse_many(self):
+        """Ensure versions are parsed lazily and errors can be skipped"""
+        versions = Version.parse_many(["1.2.3", "!", "api/0.1.0"], ignore_errors=True)
+
+        self.assertEqual(["1.2.3", None, "api/0.1.0"], [x and str(x) for x in versions])
+
+        versions = Version.parse_many(["1.2.3", "!"])
+        self.assertEqual("1.2.3", str(next(versions)))
+        with self.assertRaises(VersionError):
+            next(versions)
+
+    def test_parse_returns_copies(self):
+        """Ensure memoized parsing never shares a mutable Version"""
+        version = Version.parse("1.2.3")
+        version.bump(bump_major=True)
+
+        self.assertEqual("1.2.3", str(Version.parse("1.2.3")))
+
+
+class ValueTestCase(TestCase):
+    def test_integer_components(self):
+        """Ensure the numbers are stored as integers"""
+        version = Version.parse("api/1.20.3")
+
+        self.assertEqual((1, 20, 3), (version.major, version.minor, version.patch))
+
+        version.minor = "21"
+        self.assertEqual(21, version.minor)
+
+    def test_precedence(self):
+        """Ensure versions sort by semantic version precedence"""
+        ordered = [
+            "1.0.0-alpha",
+            "1.0.0-alpha.1",
+            "1.0.0-alpha.beta",
+            "1.0.0-beta",
+            "1.0.0-beta.2",
+            "1.0.0-beta.11",
+            "1.0.0-rc.1",
+            "1.0.0",
+            "1.9.0",
+            "1.10.0",
+            "2.0.0",
+        ]
+
+        shuffled = ordered[::2] + ordered[1::2]
+        versions = sorted(Version.parse(x) for x in shuffled)
+
+        self.assertEqual(ordered, [str(x) for x in versions])
+        self.assertLess(Version.parse("1.0.0+build.2"), Version.parse("1.0.1"))
+
+    def test_precedence_rc(self):
+        """Ensure release candidates sort numerically, like the tag index"""
+        names = ["1.0.0rc10", "1.0.0", "1.0.0rc2", "1.0.0rc9"]
+
+        versions = sorted(Version.parse(x) for x in names)
+
+        self.assertEqual(
+            ["1.0.0rc2", "1.0.0rc9", "1.0.0rc10", "1.0.0"], [str(x) for x in versions]
+        )
+        self.assertEqual(
+            TagIndex(names).latest_rc(1, 0).name,
+            str(max(x for x in versions if x.is_rc)),
+        )
+
+    def test_hash(self):
+        """Ensure equal versions de-duplicate in a set"""
+        versions = {
+            Version.parse("1.2.3"),
+            Version.parse("1.2.3"),
+            Version.parse("1.2.4"),
+        }
+
+        self.assertEqual(2, len(versions))
+
+    def test_mutation_resets_cache(self):
+        """Ensure the cached string follows changes to the version"""
+        version = Version.parse("1.2.3")
+        self.assertEqual("1.2.3", str(version))
+
+        copy = version.copy()
+        version.bump(bump_patch=True)
+        version.prefix = "api"
+        version.prefix_separator = "/"
+
+        self.assertEqual("api/1.2.4", str(version))
+        self.assertEqual(hash(Version.parse("api/1.2.4")), hash(version))
+        self.assertEqual("1.2.3", str(copy))
@@ -0,0 +1,249 @@
+import argparse
+import contextlib
+import io
+import os
+import random
+import stat
+import tempfile
+from unittest import TestCase, mock
+
+from tagversion.version import Version
+from tagversion.write import (
+    DEFAULT_VERSION_PATTERN,
+    WriteFile,
+    get_placeholder_re,
+    get_replacements,
+    get_version_re,
+    substitute,
+    substitute_whole,
+)
+
+
+class SubstituteTestCase(TestCase):
+    def _substitute(self, pattern, content, **kwargs):
+        outfile = io.StringIO()
+        count = substitute(
+            get_placeholder_re(pattern),
+            {None: "1.2.3"},
+            io.StringIO(content),
+            outfile,
+            **kwargs
+        )
+
+        return outfile.getvalue(), count
+
+    def test_default_pattern(self):
+        """Ensure the default pattern is searched for as the bare placeholder"""
+        self.assertEqual(
+            r"{{\s*version(?:_(?P<format>[a-z]+))?\s*}}",
+            get_placeholder_re(DEFAULT_VERSION_PATTERN).pattern,
+        )
+
+        self.assertEqual(
+            ("v=1.2.3; w=1.2.3\n", 2),
+            self._substitute(
+                DEFAULT_VERSION_PATTERN, "v={{ version }}; w={{version}}\n"
+            ),
+        )
+
+    def test_publish_pattern(self):
+        """Ensure custom patterns wrapped in start and content groups keep working"""
+        self.assertEqual(
+            ('version="1.2.3"', 1),
+            self._substitute(r"(?P<start>.*?)0.0.0(?P<content>.*)", 'version="0.0.0"'),
+        )
+
+    def test_bare_pattern(self):
+        """Ensure a pattern without groups is used as the placeholder"""
+        self.assertEqual(
+            ("1.2.3-1.2.3", 2), self._substitute(r"@VERSION@", "@VERSION@-@VERSION@")
+        )
+
+    def test_formats(self):
+        """Ensure each placeholder is rendered in the format it names"""
+        replacements = get_replacements(Version.parse("api/1.2.3-rc1"))
+
+        outfile = io.StringIO()
+        count = substitute(
+            get_placeholder_re(DEFAULT_VERSION_PATTERN),
+            replacements,
+            io.StringIO(
+                "{{ version }} {{ version_docker }} {{version_json}} {{ version_other }}"
+            ),
+            outfile,
+        )
+
+        self.assertEqual(4, count)
+        self.assertEqual(
+            "api/1.2.3-rc1 api-1.2.3-rc1 {} {{{{ version_other }}}}".format(
+                replacements["json"]
+            ),
+            outfile.getvalue(),
+        )
+
+    def test_whole_pattern(self):
+        """Ensure patterns that need the whole file fall back to a full match"""
+        pattern = r"(?P<start>.*?\n)VERSION(?P<content>.*)"
+
+        self.assertIsNone(get_placeholder_re(pattern))
+        self.assertEqual(
+            "a\n1.2.3\nb VERSION",
+            substitute_whole(
+                get_version_re(pattern), {None: "1.2.3"}, "a\nVERSION\nb VERSION"
+            ),
+        )
+
+    def test_whole_pattern_unknown_format(self):
+        """Ensure an unknown format is left as is without repeating the rest of the file"""
+        pattern = (
+            r"(?P<start>.*?\n){{ version(?:_(?P<format>[a-z]+))? }}(?P<content>.*)"
+        )
+        replacements = {None: "1.2.3", "default": "1.2.3"}
+
+        self.assertIsNone(get_placeholder_re(pattern))
+        self.assertEqual(
+            "a\n{{ version_xyz }}\nb\n1.2.3 c",
+            substitute_whole(
+                get_version_re(pattern),
+                replacements,
+                "a\n{{ version_xyz }}\nb\n{{ version }} c",
+            ),
+        )
+
+    def test_chunk_boundaries(self):
+        """Ensure placeholders spanning chunks are replaced like a whole-file scan"""
+        rnd = random.Random(0)
+        placeholder_re = get_placeholder_re(DEFAULT_VERSION_PATTERN)
+
+        for _ in range(200):
+            content = "".join(
+                rnd.choice(
+                    ("x", "\n", "{", "}", " ", "{{ version }}", "{{version   }}")
+                )
+                for _ in range(rnd.randint(0, 60))
+            )
+
+            outfile = io.StringIO()
+            count = substitute(
+                placeholder_re,
+                {None: "1.2.3"},
+                io.StringIO(content),
+                outfile,
+                chunk_size=rnd.randint(1, 8),
+                overlap=16,
+            )
+
+            expected, expected_count = placeholder_re.subn("1.2.3", content)
+            self.assertEqual(expected, outfile.getvalue(), content)
+            self.assertEqual(expected_count, count)
+
+
+class WriteFileTestCase(TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+        self.path = self.make_file("version.py", '__version__ = "{{ version }}"\n')
+        os.chmod(self.path, 0o755)
+
+        patcher = mock.patch("tagversion.write.GitVersion")
+        self.git_version_mock = patcher.start()
+        self.git_version_mock.return_value.version = Version.parse("1.2.3")
+        self.addCleanup(patcher.stop)
+
+    def make_file(self, name, content):
+        path = os.path.join(self._tmp.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as fh:
+            fh.write(content)
+
+        return path
+
+    def read_file(self, name):
+        with open(os.path.join(self._tmp.name, name)) as fh:
+            return fh.read()
+
+    def run_write(self, *paths):
+        args = mock.Mock(jobs=None, paths=list(paths), pattern=DEFAULT_VERSION_PATTERN)
+
+        return WriteFile(args).run()
+
+    def test_run(self):
+        """Ensure the file is replaced in place and keeps its permissions"""
+        self.assertEqual(0, self.run_write(self.path))
+
+        self.assertEqual('__version__ = "1.2.3"\n', self.read_file("version.py"))
+        self.assertEqual(0o755, stat.S_IMODE(os.stat(self.path).st_mode))
+        self.assertEqual(["version.py"], os.listdir(self._tmp.name))
+
+    def test_globs(self):
+        """Ensure globs are expanded and the version is computed once for all files"""
+        self.make_file("dist/a.js", "a={{ version }}")
+        self.make_file("dist/lib/b.js", "b={{ version }}")
+
+        self.assertEqual(
+            0, self.run_write(self.path, os.path.join(self._tmp.name, "dist/**/*.js"))
+        )
+
+        self.assertEqual("a=1.2.3", self.read_file("dist/a.js"))
+        self.assertEqual("b=1.2.3", self.read_file("dist/lib/b.js"))
+        self.assertEqual(1, self.git_version_mock.call_count)
+
+    def test_glob_directories(self):
+        """Ensure directories matched by a glob are skipped and binary files reported"""
+        self.make_file("dist/lib/b.js", "b={{ version }}")
+        with open(os.path.join(self._tmp.name, "dist/a.bin"), "wb") as fh:
+            fh.write(b"\xff\xfe{{ version }}")
+
+        pattern = os.path.join(self._tmp.name, "dist/**")
+        with mock.patch("tagversion.write.print_error") as print_error_mock:
+            self.assertEqual(1, self.run_write(pattern))
+
+        print_error_mock.assert_called_once()
+        self.assertIn("a.bin", print_error_mock.call_args[0][0])
+        self.assertEqual("b=1.2.3", self.read_file("dist/lib/b.js"))
+
+    def test_jobs(self):
+        """Ensure --jobs must be at least 1"""
+        parser = argparse.ArgumentParser()
+        WriteFile.setup_subparser(parser.add_subparsers())
+
+        self.assertEqual(2, parser.parse_args(["write", "-j", "2", "x"]).jobs)
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            parser.parse_args(["write", "-j", "0", "x"])
+
+    def test_unchanged(self):
+        """Ensure a file whose output is identical is not rewritten"""
+        path = self.make_file("static.txt", "no placeholders\n")
+        os.utime(path, (1600000000, 1600000000))
+        inode = os.stat(path).st_ino
+
+        self.assertEqual(0, self.run_write(path))
+
+        self.assertEqual(1600000000, os.stat(path).st_mtime)
+        self.assertEqual(inode, os.stat(path).st_ino)
+        self.assertEqual(
+            ["static.txt", "version.py"], sorted(os.listdir(self._tmp.name))
+        )
+
+    def test_no_version(self):
+        """Ensure a repository without a version is reported and no file is written"""
+        self.git_version_mock.return_value.version = None
+
+        with mock.patch("tagversion.write.print_error") as print_error_mock:
+            self.assertEqual(1, self.run_write(self.path))
+
+        print_error_mock.assert_called_once()
+        self.assertEqual(
+            '__version__ = "{{ version }}"\n', self.read_file("version.py")
+        )
+
+    def test_missing(self):
+        """Ensure a missing file is reported without stopping the other files"""
+        missing = os.path.join(self._tmp.name, "missing.txt")
+
+        with mock.patch("tagversion.write.print_error") as print_error_mock:
+            self.assertEqual(1, self.run_write(missing, self.path))
+
+        print_error_mock.assert_called_once()
+        self.assertEqual('__version__ = "1.2.3"\n', self.read_file("version.py"))
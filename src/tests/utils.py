@@ -0,0 +1,85 @@
+import contextlib
+import io
+import os
+import subprocess
+import tempfile
+from unittest import TestCase, mock
+
+
+def git(path, *args, env=None):
+    full_env = dict(
+        os.environ,
+        GIT_AUTHOR_NAME="test",
+        GIT_AUTHOR_EMAIL="test@example.com",
+        GIT_COMMITTER_NAME="test",
+        GIT_COMMITTER_EMAIL="test@example.com",
+    )
+    full_env.update(env or {})
+
+    return subprocess.check_output(
+        ["git", "-C", path] + list(args), env=full_env, universal_newlines=True
+    ).strip()
+
+
+class RepoTestCase(TestCase):
+    """
+    Runs each test against a freshly initialized repository at self.path
+    """
+
+    # the subcommand class run by run_command() and the arguments it is given
+    command = None
+    command_args = {}
+
+    def setUp(self):
+        environ_patcher = mock.patch.dict(os.environ)
+        environ_patcher.start()
+        self.addCleanup(environ_patcher.stop)
+
+        for name in ("GIT_DIR", "GIT_COMMON_DIR", "GIT_BRANCH"):
+            os.environ.pop(name, None)
+
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "repo")
+
+        git(self._tmp.name, "init", "-q", "-b", "main", self.path)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def chdir(self):
+        """
+        Runs the rest of the test from the repository
+        """
+        cwd = os.getcwd()
+        os.chdir(self.path)
+        self.addCleanup(os.chdir, cwd)
+
+    def run_command(self, stdin="", **kwargs):
+        """
+        Runs the subcommand, returns its exit status and the lines it printed
+
+        Args:
+            stdin: what the subcommand reads from stdin
+            kwargs: the arguments that differ from command_args
+        """
+        args = mock.Mock(**dict(self.command_args, **kwargs))
+
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout), mock.patch(
+            "sys.stdin", io.StringIO(stdin)
+        ):
+            status = self.command(args).run()
+
+        return status, stdout.getvalue().splitlines()
+
+    def commit(self, message="commit", date=None, **kwargs):
+        env = {}
+        if date is not None:
+            env = {
+                "GIT_AUTHOR_DATE": "{} +0000".format(date),
+                "GIT_COMMITTER_DATE": "{} +0000".format(date),
+            }
+
+        git(self.path, "commit", "-q", "--allow-empty", "-m", message, env=env)
+
+        return git(self.path, "rev-parse", "HEAD")